@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Process latency of fretboard_cli.py: tables (no inkex) against the svg drawing
+
+    python benchmarks/bench_cli.py --runs 20
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMMANDS = {
+    "table json": ["table", "--frets=24"],
+    "table csv passes": ["table", "--frets=24", "--format=csv", "--table=passes"],
+    "svg": ["svg", "--frets=24"],
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    for name, command in COMMANDS.items():
+        elapsed = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, os.path.join(ROOT, "fretboard_cli.py"), *command],
+                stdout=subprocess.DEVNULL,
+                check=True,
+            )
+            elapsed.append(time.perf_counter() - start)
+        print(
+            f"{name:18}  median {statistics.median(elapsed) * 1000:8.2f} ms"
+            f"  min {min(elapsed) * 1000:8.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Sheet DXF writing against the number of boards, fine stepover toolpaths
+included: time, peak memory and file size
+
+    python benchmarks/bench_dxf.py --boards 10 50 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fretboard_dxf import dxf_lines, write_dxf  # noqa: E402
+from fretboard_nest import board, sheet_entities, shelf_pack  # noqa: E402
+
+PARAMS = {
+    "scale": 25.5,
+    "scale_unit": "in",
+    "frets": 24,
+    "ftp_tool_draw": True,
+    "ftp_tool_diameter": 0.1,
+    "ftp_slot_width": 0.6,
+    "ftp_tool_stepover": 5,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--boards", type=int, nargs="+", default=[10, 50, 200])
+    args = parser.parse_args()
+    template = board("board", PARAMS)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sheet.dxf")
+        for count in args.boards:
+            boards = [template] * count
+            size = template.bounds[1] - template.bounds[0]
+            placements = shelf_pack(
+                np.tile(size, (count, 1)), 100000, 100000, spacing=10
+            )
+            start = time.perf_counter()
+            with open(path, "w", encoding="ascii") as output:
+                write_dxf(output, dxf_lines(sheet_entities(boards, placements)))
+            elapsed = time.perf_counter() - start
+            # tracing slows every allocation down: peak memory of a second run
+            tracemalloc.start()
+            with open(path, "w", encoding="ascii") as output:
+                write_dxf(output, dxf_lines(sheet_entities(boards, placements)))
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(
+                f"{count:5d} boards: {elapsed:6.2f} s, peak {peak / 1e6:6.1f} MB, "
+                f"{os.path.getsize(path) / 1e6:7.1f} MB dxf"
+            )
+
+
+if __name__ == "__main__":
+    main()
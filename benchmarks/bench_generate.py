@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Wall time and peak memory of the generation hot paths across the .inx ranges,
+every svg being checked against benchmarks/golden.json and benchmarks/golden/
+
+    python benchmarks/bench_generate.py               # frets 1,12,24,28, strings 1,6,8
+    python benchmarks/bench_generate.py --full        # frets 1-28, strings 1-8
+    python benchmarks/bench_generate.py --full --golden-only --update-golden
+
+Every configuration draws toolpaths and the side view, with stepover from 1%
+(many passes) to 100%, debug off and on, followed by fanned, tempered and
+compensated boards (CASES). Drawings are compared as snapshots: the svg
+indented one element per line, params reminder and part fingerprints left
+out so that new options don't change them; debug must not change them
+either. golden.json holds a sha256 prefix of the snapshot of every
+configuration, golden/ the snapshots of the default grid and CASES, so that
+a difference can be read; differing snapshots are written to a
+fretboard_golden temporary directory.
+"""
+
+import argparse
+import contextlib
+import difflib
+import hashlib
+import io
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lxml import etree  # noqa: E402
+
+from fretboard_extension import FretboardExtension, render_svg  # noqa: E402
+from fretboard_geometry import distance_to_nut  # noqa: E402
+from fretboard_params import blank_document, to_argv  # noqa: E402
+from fretboard_trace import Tracer  # noqa: E402
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_FILE = os.path.join(BENCHMARKS_DIR, "golden.json")
+GOLDEN_DIR = os.path.join(BENCHMARKS_DIR, "golden")
+ACTUAL_DIR = os.path.join(tempfile.gettempdir(), "fretboard_golden")
+FRETS = (1, 12, 24, 28)
+STRINGS = (1, 6, 8)
+STEPOVERS = (1, 50, 100)
+FULL_FRETS = tuple(range(1, 29))
+FULL_STRINGS = tuple(range(1, 9))
+FULL_STEPOVERS = (1, 10, 25, 50, 100)
+GAUGES = (10, 13, 17, 26, 36, 46, 56, 66)
+# a compound radius, so that the side view and passes differ from fret to fret
+BASE_PARAMS = {
+    "nut_radius": 12,
+    "nut_radius_unit": "in",
+    "bridge_radius": 16,
+    "bridge_radius_unit": "in",
+    "ftp_tool_draw": True,
+    "draw_profile": True,
+}
+COMPENSATION = "-2,1.5,0,2.5,-1;1,-2,0.5,0,3;0,0,-1.5,1;2,-1;-3,2,1;1.5,0,0,-2"
+# boards off the 12-TET, straight frets grid, snapshots kept in golden/
+CASES = {
+    "fanned": {"frets": 24, "strings": 7, "multiscale": True, "bass_scale": 27},
+    "tempered": {
+        "frets": 22,
+        "strings": 6,
+        "temperament": "16/15,9/8,6/5,5/4,4/3,45/32,3/2,8/5,5/3,9/5,15/8,2/1",
+    },
+    "compensated": {
+        "frets": 22,
+        "strings": 6,
+        "temperament_offsets": COMPENSATION,
+    },
+    "fanned-19-compensated": {
+        "frets": 28,
+        "strings": 8,
+        "multiscale": True,
+        "bass_scale": 28,
+        "perpendicular_fret": 12,
+        "temperament": "19",
+        "temperament_offsets": COMPENSATION,
+        "ftp_3d": True,
+    },
+}
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Tuple[float, int]:
+    """Best wall time of repeat calls, then peak traced memory of one more"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def prepared(params: Dict[str, Any]) -> FretboardExtension:
+    """Extension with options parsed and shared geometry ready, as in effect()"""
+    extension = FretboardExtension()
+    extension.parse_arguments(to_argv(params) + [blank_document()])
+    extension.load_raw()
+    if extension.options.debug:
+        extension.tracer = Tracer(message_sink=extension.msg)
+    extension.prepare()
+    return extension
+
+
+def render(params: Dict[str, Any]) -> bytes:
+    output = io.BytesIO()
+    render_svg(params, output)
+    return output.getvalue()
+
+
+def drawing_snapshot(svg: bytes) -> bytes:
+    """svg indented one element per line, without the params reminder and
+    part fingerprints"""
+    root = etree.fromstring(svg)
+    for reminder in root.xpath(
+        "//*[@inkscape:label='params_reminder']",
+        namespaces={"inkscape": "http://www.inkscape.org/namespaces/inkscape"},
+    ):
+        reminder.getparent().remove(reminder)
+    for element in root.iter():
+        for attribute in list(element.attrib):
+            if attribute.startswith("data-fretboard-"):
+                del element.attrib[attribute]
+    etree.indent(root)
+    return etree.tostring(root, encoding="utf-8") + b"\n"
+
+
+def snapshot_digest(snapshot: bytes) -> str:
+    return hashlib.sha256(snapshot).hexdigest()[:16]
+
+
+def snapshot_path(key: str, directory: str = GOLDEN_DIR) -> str:
+    return os.path.join(directory, f"{key}.svg")
+
+
+def snapshot_diff(key: str, snapshot: bytes, lines: int = 12) -> List[str]:
+    """First lines of the diff between the golden and the current snapshot"""
+    if not os.path.exists(snapshot_path(key)):
+        return []
+    with open(snapshot_path(key), encoding="utf-8") as golden_file:
+        golden = golden_file.read().splitlines()
+    diff = difflib.unified_diff(
+        golden,
+        snapshot.decode("utf-8").splitlines(),
+        "golden",
+        "current",
+        n=1,
+        lineterm="",
+    )
+    return list(itertools.islice(diff, lines))
+
+
+def configurations(
+    grid: Tuple[Tuple[int, ...], ...],
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Golden key and parameters of every grid point, then of every case"""
+    for frets, strings, stepover in itertools.product(*grid):
+        yield f"f{frets}-s{strings}-p{stepover}", {
+            **BASE_PARAMS,
+            "frets": frets,
+            "strings": strings,
+            "strings_gauges": ",".join(map(str, GAUGES[:strings])),
+            "ftp_tool_stepover": stepover,
+        }
+    for key, case in CASES.items():
+        strings = case["strings"]
+        yield key, {
+            **BASE_PARAMS,
+            "strings_gauges": ",".join(map(str, GAUGES[:strings])),
+            **case,
+        }
+
+
+def stages(params: Dict[str, Any]) -> Dict[str, Callable[[], Any]]:
+    extension = prepared(params)
+    frets = params["frets"]
+    return {
+        "render": lambda: render(params),
+        "generate_frets": lambda: [
+            extension.generate_fret_tangs(),
+            extension.generate_fret_crowns(),
+            extension.generate_fret_toolpaths(),
+        ],
+        "generate_ftp": lambda: [
+            extension.generate_ftp(fret_i, points[:, :2])
+            for fret_i, points in extension.slots
+        ],
+        "generate_strings": extension.generate_strings,
+        "generate_sideview": extension.generate_sideview,
+        "distance_to_nut": lambda: [
+            FretboardExtension.distance_to_nut(scale=647.7, n=n)
+            for n in range(frets + 2)
+        ],
+        "distance_to_nut_vectorized": lambda: distance_to_nut(
+            scale=647.7, n=range(frets + 2)
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--full", action="store_true", help="Sweep every value")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--update-golden", action="store_true")
+    parser.add_argument(
+        "--golden-only", action="store_true", help="Check svg, skip measurements"
+    )
+    parser.add_argument("--json", help="Write the measurements to this file")
+    args = parser.parse_args()
+
+    grid = (
+        (FULL_FRETS, FULL_STRINGS, FULL_STEPOVERS)
+        if args.full
+        else (FRETS, STRINGS, STEPOVERS)
+    )
+    golden = {}
+    if os.path.exists(GOLDEN_FILE):
+        with open(GOLDEN_FILE, encoding="utf-8") as golden_file:
+            golden = json.load(golden_file)
+    blank_document()
+
+    kept = {key for key, _ in configurations((FRETS, STRINGS, STEPOVERS))}
+    results: List[Dict[str, Any]] = []
+    mismatches = []
+    totals: Dict[str, float] = {}
+    configs = list(configurations(grid))
+    for (key, config), debug in itertools.product(configs, (False, True)):
+        params = {**config, "debug": debug}
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull):
+            snapshot = drawing_snapshot(render(params))
+            digest = snapshot_digest(snapshot)
+            if args.update_golden and not debug:
+                golden[key] = digest
+                if key in kept:
+                    os.makedirs(GOLDEN_DIR, exist_ok=True)
+                    with open(snapshot_path(key), "wb") as snapshot_file:
+                        snapshot_file.write(snapshot)
+            elif golden.get(key) != digest:
+                mismatches.append(f"{key} debug={debug}")
+                mismatches.extend(
+                    f"    {line}" for line in snapshot_diff(key, snapshot)
+                )
+                os.makedirs(ACTUAL_DIR, exist_ok=True)
+                with open(snapshot_path(key, ACTUAL_DIR), "wb") as snapshot_file:
+                    snapshot_file.write(snapshot)
+            if args.golden_only:
+                continue
+            for stage, func in stages(params).items():
+                wall_time, peak = measure(func, args.repeat)
+                totals[stage] = totals.get(stage, 0.0) + wall_time
+                results.append(
+                    {
+                        "config": key,
+                        "debug": debug,
+                        "stage": stage,
+                        "time": wall_time,
+                        "peak_memory": peak,
+                    }
+                )
+
+    for stage, total in totals.items():
+        peak = max(r["peak_memory"] for r in results if r["stage"] == stage)
+        print(
+            f"{stage:26}  total {total * 1000:9.2f} ms"
+            f"  worst peak {peak / 1024:8.1f} KiB"
+        )
+    if results:
+        slowest = max(
+            (r for r in results if r["stage"] == "render"), key=lambda r: r["time"]
+        )
+        print(
+            f"slowest render: {slowest['config']} debug={slowest['debug']}"
+            f" {slowest['time'] * 1000:.2f} ms"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=1)
+    if args.update_golden:
+        with open(GOLDEN_FILE, "w", encoding="utf-8") as golden_file:
+            json.dump(golden, golden_file, indent=0, sort_keys=True)
+            golden_file.write("\n")
+        print(f"{len(golden)} golden entries written")
+    elif mismatches:
+        differing = sum(not line.startswith(" ") for line in mismatches)
+        print(f"{differing} svg differ from golden:", *mismatches, sep="\n  ")
+        print(f"their snapshots are in {ACTUAL_DIR}")
+        sys.exit(1)
+    else:
+        print("every svg matches golden")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Fretboard mesh resolution against time, peak memory and file size, from the
+chord tolerance alone down to a 0.1 mm grid
+
+    python benchmarks/bench_mesh.py --format stl
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fretboard_mesh import MESH_FORMATS, FretboardMesh, write_mesh  # noqa: E402
+from fretboard_params import normalize_units, typed_params  # noqa: E402
+
+PARAMS = {
+    "scale": 25.5,
+    "scale_unit": "in",
+    "frets": 24,
+    "nut_radius": 10,
+    "nut_radius_unit": "in",
+    "bridge_radius": 16,
+    "bridge_radius_unit": "in",
+}
+# chord tolerance, longest edge (mm)
+RESOLUTIONS = [(0.01, None), (0.001, None), (0.01, 1.0), (0.01, 0.2), (0.01, 0.1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--format", choices=MESH_FORMATS, default="stl")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"board.{args.format}")
+        for tolerance, max_edge in RESOLUTIONS:
+            params = normalize_units(
+                typed_params(dict(PARAMS, ftp_chord_tolerance=tolerance))
+            )
+            tracemalloc.start()
+            start = time.perf_counter()
+            mesh = FretboardMesh.from_params(params, max_edge=max_edge)
+            with open(path, "wb") as output:
+                write_mesh(output, mesh, args.format)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(
+                f"tolerance {tolerance:g} mm, edge {max_edge or '-'!s:>4}: "
+                f"{mesh.triangles:9d} triangles, {elapsed:6.2f} s, "
+                f"peak {peak / 1e6:6.1f} MB, {os.path.getsize(path) / 1e6:7.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Sheet nesting scaling: packing, slot sequencing and the whole sheet against
+the number of boards (geometry only, the svg drawings are left out)
+
+    python benchmarks/bench_nest.py --boards 10 50 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fretboard_nest import board, sheet_slots, shelf_pack  # noqa: E402
+from fretboard_toolpaths import toolpath_stats  # noqa: E402
+
+PARAMS = {"scale": 25.5, "scale_unit": "in", "frets": 22}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--boards", type=int, nargs="+", default=[10, 50, 200])
+    args = parser.parse_args()
+    template = board("template", PARAMS)
+    for count in args.boards:
+        boards = [template._replace(name=f"board_{i}") for i in range(count)]
+        sizes = np.array([b.bounds[1] - b.bounds[0] for b in boards])
+        start = time.perf_counter()
+        placements = shelf_pack(sizes, 1e5, 1e5, 10)
+        packed = time.perf_counter()
+        slots = list(sheet_slots(boards, placements))
+        sequenced = time.perf_counter()
+        stats = toolpath_stats(slots, 300, 100, 3000, 5, 3)
+        print(
+            f"{count:5d} boards: pack {(packed - start) * 1000:8.2f} ms, "
+            f"slots {(sequenced - packed) * 1000:8.2f} ms, "
+            f"{stats.slots} slots, rapids {stats.rapid_length:.0f} mm"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Slot passes of the fixed stepover and adaptive planners, 28 frets 8 strings
+fanned and compensated: passes, cut length, uncut slot width, overcut walls
+and planning time
+
+    python benchmarks/bench_passes.py --stepovers 1 10 25 50 100
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fretboard_geometry import FretboardGeometry  # noqa: E402
+from fretboard_params import normalize_units, typed_params  # noqa: E402
+from fretboard_toolpaths import pass_plan, pass_report, plan_slots  # noqa: E402
+
+PARAMS = {
+    "frets": 28,
+    "strings": 8,
+    "multiscale": True,
+    "bass_scale_unit": "in",
+    "scale_unit": "in",
+    "strings_gauges": "10,13,17,26,36,46,56,66",
+    "temperament_offsets": "1,-2,0.5;0,1.5;-1",
+    "ftp_slot_width": 0.6,
+    "ftp_tool_diameter": 0.5,
+}
+
+
+def uncut_overcut(
+    offsets: np.ndarray, tool_diameter: float, slot_width: float
+) -> Tuple[float, float]:
+    """Slot width left between the passes and against the walls, and depth cut
+    into the walls"""
+    edges = np.sort(offsets)
+    gaps = np.diff(edges) - tool_diameter
+    walls = np.array(
+        [
+            edges[0] - tool_diameter / 2 + slot_width / 2,
+            slot_width / 2 - edges[-1] - tool_diameter / 2,
+        ]
+    )
+    return (
+        float(np.clip(gaps, 0, None).sum() + np.clip(walls, 0, None).sum()),
+        float(np.clip(-walls, 0, None).sum()),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--stepovers", type=int, nargs="+", default=[1, 10, 25, 50, 100]
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    for stepover in args.stepovers:
+        for planner in ("fixed", "adaptive"):
+            params = normalize_units(
+                typed_params(
+                    dict(PARAMS, ftp_tool_stepover=stepover, ftp_passes=planner)
+                )
+            )
+            geometry = FretboardGeometry.from_params(params)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                plan_slots(geometry, params)
+            elapsed = (time.perf_counter() - start) / args.repeat
+            offsets = pass_plan(params).offsets
+            repeated = np.triu(np.isclose(offsets[:, np.newaxis], offsets), 1).any(
+                axis=0
+            )
+            uncut, overcut = uncut_overcut(
+                offsets, params["ftp_tool_diameter"], params["ftp_slot_width"]
+            )
+            print(
+                f"{stepover:3d}% {planner:8s} {len(offsets):3d} passes"
+                f" {np.count_nonzero(repeated):2d} repeated"
+                f" {pass_report(geometry, params).cut_length:9.1f} mm cut"
+                f" {uncut:.3f} mm uncut {overcut:.3f} mm overcut"
+                f" {elapsed * 1000:7.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Fret relief analysis time: every fret x string crown top, straightedges and
+cross-sections, 8 strings and 28 frets, fanned and compensated
+
+    python benchmarks/bench_relief.py --samples 64 1024
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fretboard_geometry import FretboardGeometry  # noqa: E402
+from fretboard_relief import fret_relief, fret_sections  # noqa: E402
+from fretboard_temperament import parse_temperament  # noqa: E402
+
+GEOMETRY = dict(
+    scale=647.7,
+    frets=28,
+    strings=8,
+    nut_width=54,
+    bridge_width=76,
+    nut_string_space=48,
+    bridge_string_space=10.5,
+    midline_y=70,
+    bass_scale=711.2,
+    perpendicular_fret=8,
+    temperament=parse_temperament("12", "1,-2,0.5;0,1.5;-1"),
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, nargs="+", default=[64, 1024])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    geometry = FretboardGeometry(**GEOMETRY)
+    for samples in args.samples:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            fret_relief(geometry, 254, 508, 1.2)
+            fret_sections(geometry, 254, 508, samples=samples)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(f"{samples:5d} samples per fret segment: {elapsed * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Cold versus warm latency of a default board: a new extension process per run,
+the thin client handing over to a running server, and requests to the server
+from a warm process
+
+    python benchmarks/bench_server.py --runs 20
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fretboard_client import SERVER_ENV, post, request  # noqa: E402
+from fretboard_params import blank_document, to_argv  # noqa: E402
+
+PARAMS = {"frets": 24, "ftp_tool_draw": True}
+
+
+def timings(func: Callable[[], None], runs: int) -> List[float]:
+    elapsed = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - start)
+    return elapsed
+
+
+def wait_for(address: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            request(address, "GET", "/health")
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    argv = to_argv(PARAMS) + [blank_document()]
+    socket_path = os.path.join(tempfile.mkdtemp(), "fretboard.sock")
+    address = f"unix:{socket_path}"
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(ROOT, "fretboard_server.py"),
+            "--unix",
+            socket_path,
+        ],
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for(address)
+        client_env = dict(os.environ, **{SERVER_ENV: address})
+        modes = {
+            "cold process": lambda: subprocess.run(
+                [sys.executable, os.path.join(ROOT, "fretboard_extension.py"), *argv],
+                stdout=subprocess.DEVNULL,
+                check=True,
+            ),
+            "client process + server": lambda: subprocess.run(
+                [sys.executable, os.path.join(ROOT, "fretboard_client.py"), *argv],
+                stdout=subprocess.DEVNULL,
+                env=client_env,
+                check=True,
+            ),
+            "warm request /run": lambda: post(address, "/run", {"argv": argv}),
+            "warm request /svg": lambda: post(address, "/svg", PARAMS),
+            "warm request /gcode": lambda: post(address, "/gcode", PARAMS),
+            "warm request /geometry": lambda: post(address, "/geometry", PARAMS),
+        }
+        for mode, func in modes.items():
+            elapsed = timings(func, args.runs)
+            print(
+                f"{mode:24}  median {statistics.median(elapsed) * 1000:8.2f} ms"
+                f"  min {min(elapsed) * 1000:8.2f} ms"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Peak memory of the streamed sheet svg against the number of boards, fine
+stepover toolpaths drawn, next to the same sheet held as an lxml tree
+
+    python benchmarks/bench_stream.py --boards 10 50 200
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PARAMS = [
+    "--scale=25.5",
+    "--scale-unit=in",
+    "--frets=24",
+    "--ftp-tool-draw=true",
+    "--ftp-tool-diameter=0.1",
+    "--ftp-slot-width=0.6",
+    "--ftp-tool-stepover=5",
+]
+
+
+def peak_rss(command: List[str]) -> Tuple[float, float]:
+    """Wall time (s) and peak resident memory (MB) of a child process"""
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stderr=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command)
+    # ru_maxrss is in kB on Linux
+    return time.perf_counter() - start, usage.ru_maxrss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--boards", type=int, nargs="+", default=[10, 50, 200])
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        sheet = os.path.join(directory, "sheet.svg")
+        for count in args.boards:
+            elapsed, streamed = peak_rss(
+                [
+                    sys.executable,
+                    os.path.join(ROOT, "fretboard_nest.py"),
+                    f"--copies={count}",
+                    "--sheet-width=100000",
+                    "--sheet-height=100000",
+                    f"--output={sheet}",
+                    *PARAMS,
+                ]
+            )
+            _, tree = peak_rss(
+                [
+                    sys.executable,
+                    "-c",
+                    "import sys; from lxml import etree; etree.parse(sys.argv[1])",
+                    sheet,
+                ]
+            )
+            print(
+                f"{count:5d} boards: {elapsed:6.2f} s, "
+                f"{os.path.getsize(sheet) / 1e6:7.1f} MB svg, "
+                f"streamed peak {streamed:6.1f} MB, as a tree {tree:6.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
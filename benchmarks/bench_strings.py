@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+String set solver time: random 6 string catalogs against the default board
+in inches, every set x nut string space x spacing at once
+
+    python benchmarks/bench_strings.py --sets 100 1000 10000 --spans 40
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fretboard_geometry import FretboardGeometry  # noqa: E402
+from fretboard_params import normalize_units, typed_params  # noqa: E402
+from fretboard_strings import (  # noqa: E402
+    WOUND_FROM,
+    parse_tuning,
+    solve_string_sets,
+)
+
+PARAMS = {"scale_unit": "in", "nut_width": 43, "bridge_width": 56}
+
+
+def catalog(sets: int, seed: int = 0) -> np.ndarray:
+    """Gauge sets, bass first, around a 10-46"""
+    base = np.array([46, 36, 26, 17, 13, 10], dtype=float)
+    rng = np.random.default_rng(seed)
+    return np.round(
+        base * rng.uniform(0.8, 1.3, (sets, 1)) + rng.integers(-2, 3, (sets, 6))
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sets", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--spans", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    params = normalize_units(typed_params(PARAMS))
+    geometry = FretboardGeometry.from_params(params)
+    frequencies = parse_tuning(params["strings_tuning"], geometry.strings)
+    spans = np.linspace(34, 40, args.spans)
+    for sets in args.sets:
+        gauges = catalog(sets)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            solutions = solve_string_sets(
+                geometry, gauges, gauges >= WOUND_FROM, frequencies, spans
+            )
+        elapsed = (time.perf_counter() - start) / args.repeat
+        combinations = sets * len(spans) * 2
+        print(
+            f"{combinations:8d} combinations {len(solutions.set_index):7d} feasible"
+            f" {elapsed * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
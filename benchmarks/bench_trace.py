@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Cost of debug tracing: a full render with tracing off, with the message sink
+and with the JSON lines file sink, plus a disabled trace call against the
+eager f-string it replaces
+
+    python benchmarks/bench_trace.py --repeat 20
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from fretboard_extension import render_svg  # noqa: E402
+from fretboard_params import blank_document  # noqa: E402
+from fretboard_trace import Tracer  # noqa: E402
+
+PARAMS = {"frets": 24, "ftp_tool_draw": True, "ftp_tool_stepover": 10}
+
+
+def render(params) -> None:
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull):
+        render_svg(params, io.BytesIO())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    blank_document()
+    trace_file = os.path.join(tempfile.gettempdir(), "fretboard_bench_trace.jsonl")
+    modes = {
+        "off": PARAMS,
+        "messages": dict(PARAMS, debug=True),
+        "jsonl file": dict(PARAMS, debug_file=trace_file),
+    }
+    render(PARAMS)
+    for mode, params in modes.items():
+        best = min(timeit.repeat(lambda: render(params), number=1, repeat=args.repeat))
+        print(f"render, trace {mode}: {best * 1000:.2f} ms")
+    print(f"trace file: {os.path.getsize(trace_file)} bytes")
+    os.remove(trace_file)
+
+    points = np.random.default_rng(0).random((40, 2)) * 600
+    tracer = Tracer()
+    number = 10000
+    eager = timeit.timeit(lambda: f"points={points.tolist()}", number=number)
+    lazy = timeit.timeit(
+        lambda: tracer("toolpath", fret=1, points=points), number=number
+    )
+    print(f"eager f-string: {eager / number * 1e6:.2f} us/call")
+    print(f"disabled trace: {lazy / number * 1e6:.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Headless batch generator: renders one svg per row of a CSV or JSON manifest,
+spreading the boards over a process pool
+
+    python fretboard_batch.py catalog.csv --output-dir boards --jobs 8
+
+Manifest columns (or JSON object keys) are extension parameters, either as
+`nut-width` or `nut_width`; missing ones take the .inx defaults. An optional
+`name` column sets the output file name, without path separators or "..".
+
+A row failing (invalid parameters, generation aborted) leaves no file: it is
+reported with its error once the other rows are rendered, and the exit
+status is then 1.
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import inkex
+
+from fretboard_extension import render_svg
+from fretboard_params import blank_document
+
+
+def read_manifest(path: str) -> List[Dict[str, str]]:
+    """Parameter sets of a .csv or .json manifest"""
+    with open(path, newline="", encoding="utf-8") as manifest:
+        if path.lower().endswith(".json"):
+            rows = json.load(manifest)
+        else:
+            rows = list(csv.DictReader(manifest))
+    # empty CSV cells fall back to defaults
+    return [{k: v for k, v in row.items() if v not in ("", None)} for row in rows]
+
+
+class BoardJob(NamedTuple):
+    row: int  # 1 for the first manifest row
+    path: str
+    params: Dict[str, str]
+    error: Optional[str] = None
+
+
+def board_jobs(rows: List[Dict[str, str]], output_dir: str) -> List[BoardJob]:
+    """Job of every manifest row, failed already when its name isn't a plain
+    file name"""
+    jobs = []
+    for row_i, row in enumerate(rows, 1):
+        params = dict(row)
+        name = str(params.pop("name", None) or f"fretboard_{row_i:04d}")
+        path = os.path.join(output_dir, f"{name}.svg")
+        error = None
+        if (
+            "/" in name
+            or os.sep in name
+            or (os.altsep and os.altsep in name)
+            or ".." in name
+        ):
+            error = f"invalid name {name!r}: path separators and .. are not allowed"
+        jobs.append(BoardJob(row_i, path, params, error))
+    return jobs
+
+
+def render_board(job: BoardJob) -> BoardJob:
+    """The job, with an error if it failed, leaving no partial svg behind"""
+    messages = io.StringIO()
+    try:
+        with open(job.path, "wb") as output, contextlib.redirect_stderr(messages):
+            render_svg(job.params, output)
+    except (SystemExit, inkex.AbortExtension, ValueError) as e:
+        if os.path.exists(job.path):
+            os.remove(job.path)
+        # argparse and inkex print the reason before exiting
+        error = messages.getvalue().strip().splitlines()[-1:] or [str(e)]
+        return job._replace(error=error[0])
+    return job
+
+
+def main(argv=None) -> int:
+    pars = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    pars.add_argument("manifest", help="CSV or JSON list of parameter sets")
+    pars.add_argument("--output-dir", default=".", help="Where svg files go")
+    pars.add_argument("--jobs", type=int, default=None, help="Worker processes")
+    args = pars.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    jobs = board_jobs(read_manifest(args.manifest), args.output_dir)
+    # created before forking so that workers share it
+    blank_document()
+
+    start = time.perf_counter()
+    failed = [job for job in jobs if job.error]
+    todo = [job for job in jobs if not job.error]
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        chunksize = max(1, len(todo) // (4 * (args.jobs or os.cpu_count() or 1)))
+        for job in pool.map(render_board, todo, chunksize=chunksize):
+            if job.error:
+                failed.append(job)
+            else:
+                print(job.path)
+    elapsed = time.perf_counter() - start
+    rendered = len(jobs) - len(failed)
+    print(
+        f"{rendered} boards in {elapsed:.2f}s "
+        f"({rendered / elapsed if elapsed else 0:.1f} boards/s)",
+        file=sys.stderr,
+    )
+    for job in sorted(failed):
+        print(f"row {job.row} ({job.path}) failed: {job.error}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,404 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Command line fretboard tables, inkex being imported only to draw
+
+    python fretboard_cli.py table --frets=22 --scale=25.5 --scale-unit=in
+    python fretboard_cli.py table --format csv --table passes --ftp-tool-stepover=25
+    python fretboard_cli.py svg --frets=22 --output board.svg
+    python fretboard_cli.py mesh --format obj --output board.obj
+    python fretboard_cli.py mesh --output fine.stl --ftp-chord-tolerance=0.005
+    python fretboard_cli.py dxf --output board.dxf --ftp-tool-draw=true
+    python fretboard_cli.py strings --spans 38 42 0.5 --choose best.json
+
+Parameters are the extension ones, `--name=value` or `--name value`, and/or a
+JSON object given with --params; missing ones take the .inx defaults. Tables
+are in millimetres, drawing axes (bridge at x=0, y pointing down):
+
+    frets    fret (0 the nut, frets + 1 the end of the fretboard),
+             distance_to_nut (along x, from the farthest nut end on fanned
+             boards), x, x1, y1, x2, y2, slot_length
+    strings  string (1 on the y1 side), x1, y1 (bridge), x2, y2 (nut)
+    passes   fret, point, x, y, z: slot toolpaths in machining order
+    relief   fret, string, x, y, distance (along the string from the nut),
+             radius, surface_z, crown_z, deviation, rocker: crown tops
+             leveling, see fretboard_relief.py; left out of "all" as it
+             needs radii wider than the fretboard
+
+String sets are the combinations of a gauge catalog (built-in sets, or a CSV
+file with name and gauges columns, or a JSON object of them), nut string
+spaces and spacings keeping clear of the fretboard edges and within tension
+range for the strings-tuning parameter, most even tensions first: set,
+gauges, spacing, nut_string_space, margin, gap, tension_1... (kgf, treble
+string first as gauges and tuning are). --choose writes the parameters with
+the first one.
+
+Meshes are the fretboard solid, radiused top and slots cut ftp-slot-depth
+deep, in G-code coordinates (Y pointing up), see fretboard_mesh.py.
+
+DXF files hold the outlines, fret tangs, strings and, with ftp-tool-draw,
+the slot toolpaths in machining order, a layer each, see fretboard_dxf.py.
+"""
+
+import argparse
+import csv
+import json
+import math
+import sys
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from fretboard_dxf import board_entities, dxf_lines, write_dxf
+from fretboard_geometry import FretboardGeometry
+from fretboard_mesh import MESH_FORMATS, FretboardMesh, write_mesh
+from fretboard_params import normalize_units, option_name, typed_params
+from fretboard_relief import fret_relief
+from fretboard_strings import (
+    MIN_EDGE_MARGIN,
+    SPACINGS,
+    STRING_SETS,
+    TENSION_RANGE,
+    catalog_gauges,
+    parse_tuning,
+    read_catalog,
+    solve_string_sets,
+)
+from fretboard_toolpaths import plan_slots
+
+TABLES = ("frets", "strings", "passes", "relief")
+
+
+def warn(message: str) -> None:
+    print(message, file=sys.stderr)
+
+
+def parse_params(extra: List[str]) -> Dict[str, str]:
+    """`--name=value` and `--name value` arguments as a parameter set, a lone
+    `--name` meaning true"""
+    params = {}
+    arg_i = 0
+    while arg_i < len(extra):
+        arg = extra[arg_i]
+        arg_i += 1
+        if not arg.startswith("--"):
+            raise ValueError(f"unexpected argument {arg}")
+        name, separator, value = arg[2:].partition("=")
+        if not separator:
+            if arg_i < len(extra) and not extra[arg_i].startswith("--"):
+                value = extra[arg_i]
+                arg_i += 1
+            else:
+                value = "true"
+        params[option_name(name)] = value
+    return params
+
+
+def tables(
+    params: Dict[str, Any], names: Sequence[str] = TABLES[:-1]
+) -> Dict[str, List[Dict[str, Any]]]:
+    params = normalize_units(typed_params(params))
+    geometry = FretboardGeometry.from_params(params)
+    x1, y1, x2, y2 = (
+        geometry.fret_x1,
+        geometry.fret_y1,
+        geometry.fret_x2,
+        geometry.fret_y2,
+    )
+    frets = np.stack(
+        [
+            np.arange(geometry.frets + 2),
+            geometry.length - geometry.fret_x,
+            geometry.fret_x,
+            x1,
+            y1,
+            x2,
+            y2,
+            np.hypot(x2 - x1, y2 - y1),
+        ],
+        axis=-1,
+    )
+    strings = np.column_stack(
+        [np.arange(1, geometry.strings + 1), geometry.string_lines]
+    )
+    passes = []
+    for fret_i, points in plan_slots(geometry, params, warn=warn):
+        if points.shape[1] == 2:
+            points = np.pad(points, ((0, 0), (0, 1)))
+        passes.append(
+            np.column_stack(
+                [np.full(len(points), fret_i), np.arange(len(points)), points]
+            )
+        )
+    passes = np.concatenate(passes) if passes else np.empty((0, 5))
+    result = {
+        "frets": rows(
+            frets,
+            ["fret", "distance_to_nut", "x", "x1", "y1", "x2", "y2", "slot_length"],
+        ),
+        "strings": rows(strings, ["string", "x1", "y1", "x2", "y2"]),
+        "passes": rows(passes, ["fret", "point", "x", "y", "z"], indexes=2),
+    }
+    if "relief" in names:
+        relief = fret_relief(
+            geometry,
+            nut_radius=params["nut_radius"],
+            bridge_radius=params["bridge_radius"],
+            crown_height=params["frets_crown_height"],
+        )
+        fret_i, string_i = np.indices(relief.x.shape)
+        result["relief"] = rows(
+            np.stack([fret_i + 1, string_i + 1, *relief], axis=-1).reshape(
+                -1, 2 + len(relief)
+            ),
+            ["fret", "string", *relief._fields],
+            indexes=2,
+        )
+        # outer frets have no rocker: null in JSON, empty in CSV
+        for record in result["relief"]:
+            if math.isnan(record["rocker"]):
+                record["rocker"] = None
+    return {name: result[name] for name in names}
+
+
+def string_sets(
+    params: Dict[str, Any],
+    catalog: Dict[str, str],
+    spans: Sequence[float] = None,
+    spacings: Sequence[str] = SPACINGS,
+    min_margin: float = MIN_EDGE_MARGIN,
+    min_gap: float = 0.0,
+    tension_range: Sequence[float] = TENSION_RANGE,
+) -> List[Dict[str, Any]]:
+    """Feasible catalog sets on the board of params, as records; spans are
+    the nut string spaces tried, the params one by default"""
+    params = normalize_units(typed_params(params))
+    geometry = FretboardGeometry.from_params(params)
+    names, gauges = catalog_gauges(catalog, geometry.strings)
+    if spans is None:
+        spans = [params["nut_string_space"]]
+    solutions = solve_string_sets(
+        geometry,
+        gauges.gauges,
+        gauges.wound,
+        parse_tuning(params["strings_tuning"], geometry.strings),
+        nut_string_spaces=np.asarray(spans),
+        spacings=spacings,
+        min_margin=min_margin,
+        min_gap=min_gap,
+        tension_range=tuple(tension_range),
+    )
+    return [
+        {
+            "set": names[set_i],
+            "gauges": catalog[names[set_i]],
+            "spacing": spacings[spacing_i],
+            "nut_string_space": space,
+            "margin": margin,
+            "gap": gap,
+            **{
+                f"tension_{string_i}": tension
+                # solutions are bass first
+                for string_i, tension in enumerate(tensions[::-1], 1)
+            },
+        }
+        for set_i, space, spacing_i, margin, gap, tensions in zip(
+            *(column.tolist() for column in solutions)
+        )
+    ]
+
+
+def rows(
+    table: np.ndarray, columns: List[str], indexes: int = 1
+) -> List[Dict[str, Any]]:
+    """Records of table, its first columns being integer indexes"""
+    return [
+        {
+            **{column: int(value) for column, value in zip(columns, row[:indexes])},
+            **dict(zip(columns[indexes:], row[indexes:])),
+        }
+        for row in table.tolist()
+    ]
+
+
+def write_csv(records: List[Dict[str, Any]], output) -> None:
+    if not records:
+        return
+    writer = csv.DictWriter(output, fieldnames=list(records[0]), lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(records)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    table = commands.add_parser("table", help="Fret, string and toolpath tables")
+    table.add_argument("--format", choices=["json", "csv"], default="json")
+    table.add_argument(
+        "--table",
+        choices=TABLES + ("all",),
+        default="all",
+        help="Table written, csv holds a single one (frets by default)",
+    )
+    svg = commands.add_parser("svg", help="Drawing, as the extension makes it")
+    mesh = commands.add_parser("mesh", help="Fretboard solid, binary STL or OBJ")
+    mesh.add_argument("--format", choices=MESH_FORMATS, default="stl")
+    mesh.add_argument(
+        "--max-edge",
+        type=float,
+        help="Longest grid edge in mm, when finer than the chord tolerance",
+    )
+    dxf = commands.add_parser("dxf", help="Outlines, frets, strings and slots, DXF")
+    strings = commands.add_parser("strings", help="Feasible string sets")
+    strings.add_argument("--format", choices=["json", "csv"], default="json")
+    strings.add_argument(
+        "--catalog", help="CSV or JSON gauge sets, built-in ones by default"
+    )
+    strings.add_argument(
+        "--spans",
+        type=float,
+        nargs=3,
+        metavar=("FROM", "TO", "STEP"),
+        help="Nut string spaces tried in mm, the nut-string-space one by default",
+    )
+    strings.add_argument("--spacings", nargs="+", choices=SPACINGS, default=SPACINGS)
+    strings.add_argument("--min-margin", type=float, default=MIN_EDGE_MARGIN, help="mm")
+    strings.add_argument("--min-gap", type=float, default=0.0, help="mm")
+    strings.add_argument(
+        "--tension-range",
+        type=float,
+        nargs=2,
+        default=TENSION_RANGE,
+        metavar=("MIN", "MAX"),
+        help="kgf",
+    )
+    strings.add_argument(
+        "--choose", help="JSON file written with the parameters of the first set"
+    )
+    for command in (table, svg, mesh, dxf, strings):
+        command.add_argument("--params", help="JSON file of parameters")
+        command.add_argument("--output", help="Output file, stdout by default")
+    args, extra = parser.parse_known_args(argv)
+
+    params = {}
+    if args.params:
+        with open(args.params, encoding="utf-8") as params_file:
+            params.update(json.load(params_file))
+    try:
+        params.update(parse_params(extra))
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.command == "svg":
+        from fretboard_extension import render_svg
+
+        if args.output:
+            with open(args.output, "wb") as output:
+                render_svg(params, output)
+        else:
+            render_svg(params, sys.stdout.buffer)
+        return 0
+
+    if args.command == "mesh":
+        try:
+            solid = FretboardMesh.from_params(
+                normalize_units(typed_params(params)), max_edge=args.max_edge
+            )
+        except (KeyError, ValueError) as e:
+            parser.error(f"invalid parameters: {e}")
+        if args.output:
+            with open(args.output, "wb") as output:
+                write_mesh(output, solid, args.format)
+        else:
+            write_mesh(sys.stdout.buffer, solid, args.format)
+        return 0
+
+    if args.command == "dxf":
+        try:
+            mm_params = normalize_units(typed_params(params))
+            geometry = FretboardGeometry.from_params(mm_params)
+        except (KeyError, ValueError) as e:
+            parser.error(f"invalid parameters: {e}")
+        slots = (
+            plan_slots(geometry, mm_params, warn=warn)
+            if mm_params["ftp_tool_draw"]
+            else []
+        )
+        lines = dxf_lines(board_entities(geometry, slots))
+        if args.output:
+            with open(args.output, "w", encoding="ascii") as output:
+                write_dxf(output, lines)
+        else:
+            write_dxf(sys.stdout, lines)
+        return 0
+
+    if args.command == "strings":
+        spans = None
+        if args.spans:
+            start, stop, step = args.spans
+            spans = np.arange(start, stop + step / 2, step)
+        try:
+            written = string_sets(
+                params,
+                read_catalog(args.catalog) if args.catalog else STRING_SETS,
+                spans=spans,
+                spacings=args.spacings,
+                min_margin=args.min_margin,
+                min_gap=args.min_gap,
+                tension_range=args.tension_range,
+            )
+        except (KeyError, ValueError) as e:
+            parser.error(f"invalid parameters: {e}")
+        if args.choose and written:
+            with open(args.choose, "w", encoding="utf-8") as chosen:
+                json.dump(
+                    dict(
+                        params,
+                        strings_gauges=written[0]["gauges"],
+                        strings_spacing=written[0]["spacing"],
+                        nut_string_space=written[0]["nut_string_space"],
+                        nut_string_space_unit="mm",
+                    ),
+                    chosen,
+                    indent=1,
+                )
+    else:
+        try:
+            result = tables(
+                params, TABLES[:-1] if args.table == "all" else [args.table]
+            )
+        except (KeyError, ValueError) as e:
+            parser.error(f"invalid parameters: {e}")
+        if args.table != "all":
+            written = result[args.table]
+        elif args.format == "csv":
+            written = result["frets"]
+        else:
+            written = result
+    output = (
+        open(args.output, "w", newline="", encoding="utf-8")
+        if args.output
+        else sys.stdout
+    )
+    try:
+        if args.format == "csv":
+            write_csv(written, output)
+        else:
+            json.dump(written, output)
+            output.write("\n")
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
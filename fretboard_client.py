@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Thin extension entry point handing runs over to fretboard_server.py
+
+With FRETBOARD_SERVER set ("http://127.0.0.1:8765" or "unix:/path/to.sock"),
+the command line is sent to the running server and its output written back
+as the extension would; inkex is not even imported. Without it, or when the
+server can't be reached, the extension runs here as usual.
+"""
+
+import json
+import os
+import socket
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+SERVER_ENV = "FRETBOARD_SERVER"
+TIMEOUT = 30
+
+
+def open_socket(address: str) -> socket.socket:
+    if address.startswith("unix:"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(TIMEOUT)
+        sock.connect(address[len("unix:") :])
+        return sock
+    url = urlsplit(address)
+    return socket.create_connection((url.hostname, url.port), timeout=TIMEOUT)
+
+
+def request(
+    address: str, method: str, path: str, payload: Any = None
+) -> Tuple[int, bytes]:
+    """Status and body of a plain HTTP/1.0 exchange, http.client being slow
+    to import for a process that only lives for one request"""
+    body = b"" if payload is None else json.dumps(payload).encode()
+    host = "localhost"
+    if not address.startswith("unix:"):
+        host = urlsplit(address).netloc
+    head = (
+        f"{method} {path} HTTP/1.0\r\nHost: {host}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    )
+    with open_socket(address) as sock:
+        sock.sendall(head.encode() + body)
+        response = b"".join(iter(lambda: sock.recv(1 << 16), b""))
+    status_line, _, rest = response.partition(b"\r\n")
+    try:
+        status = int(status_line.split()[1])
+    except (IndexError, ValueError):
+        raise OSError(f"{path}: invalid reply") from None
+    return status, rest.partition(b"\r\n\r\n")[2]
+
+
+def post(address: str, path: str, payload: Any) -> bytes:
+    """Body of the server reply, raises OSError when it isn't a success"""
+    status, body = request(address, "POST", path, payload)
+    if status != 200:
+        raise OSError(f"{path}: {status} {body.decode(errors='replace')}")
+    return body
+
+
+def remote_run(address: str, argv: List[str]) -> Optional[Dict[str, Any]]:
+    """Result of the server run of argv, None if the server can't be reached"""
+    try:
+        return json.loads(post(address, "/run", {"argv": argv, "cwd": os.getcwd()}))
+    except (OSError, ValueError):
+        return None
+
+
+def main(argv: List[str]) -> int:
+    address = os.environ.get(SERVER_ENV)
+    result = remote_run(address, argv) if address else None
+    if result is None:
+        from fretboard_extension import FretboardExtension
+
+        FretboardExtension().run(args=argv)
+        return 0
+    sys.stderr.write(result["messages"])
+    sys.stdout.buffer.write(result["output"].encode("utf-8"))
+    return result["status"]
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
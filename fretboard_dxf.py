@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+DXF streaming of fretboard outlines, fret tangs, strings and slot toolpaths
+
+Entities are written as they come, so a file can hold any number of boards
+without holding them in memory. Files are AutoCAD 2000 (AC1015) text DXF in
+millimetres, from geometry built on normalized parameters, with the tables,
+blocks, owner handles and root dictionary the format requires.
+
+Each extension group has its layer. Two point lines are LINE entities;
+outlines, compensated fret lines and slot passes are LWPOLYLINE ones.
+Coordinates are the G-code ones, Y pointing up (svg y is negated).
+"""
+
+import itertools
+from typing import Dict, Iterable, Iterator, List, Mapping, Sequence, TextIO, Tuple
+
+import numpy as np
+
+from fretboard_geometry import FretboardGeometry
+from fretboard_toolpaths import Slot
+
+# layer: AutoCAD colour index, as drawn by the extension
+LAYERS = {
+    "fretboard_scale_outline": 7,
+    "fretboard_outline": 1,
+    "fret_tangs": 8,
+    "strings": 3,
+    "frets_toolpath_lines": 5,
+}
+# layer, (x, y) drawing points, closed
+Entity = Tuple[str, np.ndarray, bool]
+# symbol tables, in the order AutoCAD writes them, and their record classes
+RECORD_CLASSES = {
+    "VPORT": "AcDbViewportTableRecord",
+    "LTYPE": "AcDbLinetypeTableRecord",
+    "LAYER": "AcDbLayerTableRecord",
+    "STYLE": "AcDbTextStyleTableRecord",
+    "VIEW": "AcDbViewTableRecord",
+    "UCS": "AcDbUCSTableRecord",
+    "APPID": "AcDbRegAppTableRecord",
+    "DIMSTYLE": "AcDbDimStyleTableRecord",
+    "BLOCK_RECORD": "AcDbBlockTableRecord",
+}
+# next free handle, written before the entities are counted: far beyond them
+HANDSEED = 0x7FFFFFFF
+Groups = Tuple[Tuple[int, object], ...]
+# polyline vertices are formatted at once, a line each being slow on fine passes
+VERTEX = " 10\n%.6f\n 20\n%.6f"
+
+
+def board_entities(
+    geometry: FretboardGeometry,
+    slots: Iterable[Slot] = (),
+    offset: Sequence[float] = (0.0, 0.0),
+) -> Iterator[Entity]:
+    """Entities of a board, moved by offset in drawing coordinates
+
+    Fret crowns (the tangs again) and the side view are left out, slots are
+    flat whatever their z.
+    """
+    yield "fretboard_scale_outline", geometry.scale_outline + offset, True
+    yield "fretboard_outline", geometry.outline + offset, True
+    for line in geometry.fret_lines:
+        yield "fret_tangs", line + offset, False
+    for line in geometry.string_lines:
+        yield "strings", line.reshape(2, 2) + offset, False
+    for _, points in slots:
+        yield "frets_toolpath_lines", points[:, :2] + offset, False
+
+
+def dxf_lines(
+    entities: Iterable[Entity], layers: Mapping[str, int] = LAYERS
+) -> Iterator[str]:
+    """DXF lines, group code then value, an entity at a time (polyline vertices
+    come as one multi-line string)
+
+    The structure AutoCAD requires of an R2000 file comes first: symbol
+    tables, model and paper space blocks, then the entities owned by the
+    model space, then the root dictionary.
+    """
+    handles = (f"{handle:X}" for handle in itertools.count(1))
+    tables = {name: next(handles) for name in RECORD_CLASSES}
+    model, paper = next(handles), next(handles)
+    root, groups = next(handles), next(handles)
+    records: Dict[str, List[Tuple[str, Groups]]] = {
+        "VPORT": [],
+        "LTYPE": [
+            (next(handles), ((2, name), (70, 0), (3, ""), (72, 65), (73, 0), (40, 0.0)))
+            for name in ("ByBlock", "ByLayer", "Continuous")
+        ],
+        "LAYER": [
+            (next(handles), ((2, name), (70, 0), (62, color), (6, "Continuous")))
+            for name, color in itertools.chain([("0", 7)], layers.items())
+        ],
+        "STYLE": [
+            (
+                next(handles),
+                (
+                    (2, "Standard"),
+                    (70, 0),
+                    (40, 0.0),
+                    (41, 1.0),
+                    (50, 0.0),
+                    (71, 0),
+                    (42, 2.5),
+                    (3, "txt"),
+                    (4, ""),
+                ),
+            )
+        ],
+        "VIEW": [],
+        "UCS": [],
+        "APPID": [(next(handles), ((2, "ACAD"), (70, 0)))],
+        "DIMSTYLE": [(next(handles), ((2, "Standard"), (70, 0)))],
+        "BLOCK_RECORD": [
+            (model, ((2, "*Model_Space"),)),
+            (paper, ((2, "*Paper_Space"),)),
+        ],
+    }
+    yield from group_lines(
+        (0, "SECTION"),
+        (2, "HEADER"),
+        (9, "$ACADVER"),
+        (1, "AC1015"),
+        (9, "$HANDSEED"),
+        (5, f"{HANDSEED:X}"),
+        (9, "$INSUNITS"),
+        (70, 4),
+        (9, "$MEASUREMENT"),
+        (70, 1),
+        (0, "ENDSEC"),
+        (0, "SECTION"),
+        (2, "CLASSES"),
+        (0, "ENDSEC"),
+        (0, "SECTION"),
+        (2, "TABLES"),
+    )
+    for name, table in tables.items():
+        yield from group_lines(
+            (0, "TABLE"),
+            (2, name),
+            (5, table),
+            (330, "0"),
+            (100, "AcDbSymbolTable"),
+            (70, len(records[name])),
+        )
+        if name == "DIMSTYLE":
+            yield from group_lines((100, "AcDbDimStyleTable"), (71, 0))
+        for handle, record in records[name]:
+            yield from group_lines(
+                (0, name),
+                # dimension styles have their handle under another code
+                (105 if name == "DIMSTYLE" else 5, handle),
+                (330, table),
+                (100, "AcDbSymbolTableRecord"),
+                (100, RECORD_CLASSES[name]),
+                *record,
+            )
+        yield from group_lines((0, "ENDTAB"))
+    yield from group_lines((0, "ENDSEC"), (0, "SECTION"), (2, "BLOCKS"))
+    for owner, name, space in ((model, "*Model_Space", 0), (paper, "*Paper_Space", 1)):
+        yield from group_lines(
+            (0, "BLOCK"),
+            (5, next(handles)),
+            (330, owner),
+            (100, "AcDbEntity"),
+            (67, space),
+            (8, "0"),
+            (100, "AcDbBlockBegin"),
+            (2, name),
+            (70, 0),
+            (10, 0.0),
+            (20, 0.0),
+            (30, 0.0),
+            (3, name),
+            (1, ""),
+            (0, "ENDBLK"),
+            (5, next(handles)),
+            (330, owner),
+            (100, "AcDbEntity"),
+            (67, space),
+            (8, "0"),
+            (100, "AcDbBlockEnd"),
+        )
+    yield from group_lines((0, "ENDSEC"), (0, "SECTION"), (2, "ENTITIES"))
+    for layer, points, closed in entities:
+        head = ((5, next(handles)), (330, model), (100, "AcDbEntity"), (8, layer))
+        if len(points) == 2 and not closed:
+            (x1, y1), (x2, y2) = points.tolist()
+            yield from group_lines(
+                (0, "LINE"),
+                *head,
+                (100, "AcDbLine"),
+                (10, x1),
+                (20, -y1),
+                (30, 0.0),
+                (11, x2),
+                (21, -y2),
+                (31, 0.0),
+            )
+            continue
+        yield from group_lines(
+            (0, "LWPOLYLINE"),
+            *head,
+            (100, "AcDbPolyline"),
+            (90, len(points)),
+            (70, 1 if closed else 0),
+        )
+        yield "\n".join(VERTEX % (x, -y) for x, y in points.tolist())
+    yield from group_lines(
+        (0, "ENDSEC"),
+        (0, "SECTION"),
+        (2, "OBJECTS"),
+        (0, "DICTIONARY"),
+        (5, root),
+        (330, "0"),
+        (100, "AcDbDictionary"),
+        (281, 1),
+        (3, "ACAD_GROUP"),
+        (350, groups),
+        (0, "DICTIONARY"),
+        (5, groups),
+        (330, root),
+        (100, "AcDbDictionary"),
+        (281, 1),
+        (0, "ENDSEC"),
+        (0, "EOF"),
+    )
+
+
+def group_lines(*groups: Tuple[int, object]) -> Iterator[str]:
+    for code, value in groups:
+        yield f"{code:>3}"
+        yield f"{value:.6f}" if isinstance(value, float) else str(value)
+
+
+def write_dxf(output: TextIO, lines: Iterable[str]) -> None:
+    for line in lines:
+        output.write(line)
+        output.write("\n")
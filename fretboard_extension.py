@@ -12,23 +12,72 @@
 Simple extension for inkscape to draw guitar scale, fretboard boundaries and fret lines
 """
 
+import hashlib
+import json
 import math
-from typing import List, Union
+import re
+from typing import (Any, BinaryIO, Callable, Dict, Iterable, Iterator, List,
+                    Mapping, Optional, Tuple, Union)
 
 import inkex
+import numpy as np
 from inkex import (Group, PathElement, Polygon, Polyline, Rectangle, Style,
-                   TextElement)
+                   StyleElement, TextElement)
 from inkex.paths import Arc, Line, Move
+from lxml import etree
+
+from fretboard_gcode import gcode_program, write_gcode
+from fretboard_geometry import FretboardGeometry, distance_to_nut, midline
+from fretboard_params import blank_document, normalize_units, to_argv
+from fretboard_profile import DEFAULT_PROFILE_FILE, StageProfiler
+from fretboard_relief import ROCKER_TOLERANCE, fret_relief, fret_sections
+from fretboard_strings import (SPACINGS, Gauges, edge_margins, parse_gauges,
+                               parse_tuning, string_tensions)
+from fretboard_toolpaths import (DIRECTIONS, PASS_PLANNERS, PassReport, Slot,
+                                 ToolpathStats, pass_report, plan_slots,
+                                 toolpath_stats)
+from fretboard_trace import Tracer
 
 
 class FretboardExtension(inkex.GenerateExtension):
     """FretboardExtension designer class"""
 
+    NOT_PARAMS = ["tabs", "input_file", "output", "ids", "selected_nodes"]
+    # a stylesheet rule of compact output, as written by add_stylesheet
+    CSS_CLASS_RULE = re.compile(r"\.(fretboard-[0-9a-f]{8})\{[^}]*\}$")
+    # options every generated part depends on
+    GEOMETRY_OPTIONS = [
+        "scale",
+        "multiscale",
+        "bass_scale",
+        "perpendicular_fret",
+        "frets",
+        "strings",
+        "nut_width",
+        "bridge_width",
+        "ignore_bridge_width",
+        "nut_string_space",
+        "bridge_string_space",
+        "temperament",
+        "temperament_offsets",
+        "strings_spacing",
+        "strings_gauges",
+        "ignore_custom_width",
+        "compact",
+        "precision",
+    ]
+
     def __init__(self) -> None:
         super().__init__()
         self.container_label = "Fretboard"
         self.midline_y = 0
         self.fretboard_angle_tan = 0.0
+        self.toolpath_stats: Optional[ToolpathStats] = None
+        self.pass_report: Optional[PassReport] = None
+        self.css_classes: Dict[str, str] = {}
+        self.slots: List[Slot] = []
+        self.tracer = Tracer()
+        self.profiler = StageProfiler()
 
     def add_arguments(self, pars) -> None:
         unit_choices = ["in", "mm"]
@@ -37,6 +86,21 @@ class FretboardExtension(inkex.GenerateExtension):
         pars.add_argument(
             "--scale-unit", type=str, help="Scale unit", choices=unit_choices
         )
+        pars.add_argument(
+            "--multiscale",
+            type=inkex.Boolean,
+            help="Fanned frets, scale being the treble one",
+        )
+        pars.add_argument("--bass-scale", type=float, help="Bass side scale")
+        pars.add_argument(
+            "--bass-scale-unit",
+            type=str,
+            help="Bass side scale unit",
+            choices=unit_choices,
+        )
+        pars.add_argument(
+            "--perpendicular-fret", type=int, help="Fret square to the midline"
+        )
         pars.add_argument(
             "--fretboard-thickness", type=float, help="Fretboard thickness"
         )
@@ -87,8 +151,27 @@ class FretboardExtension(inkex.GenerateExtension):
             choices=unit_choices,
         )
         pars.add_argument("--frets", type=int, help="Number of frets")
+        pars.add_argument(
+            "--temperament",
+            type=str,
+            help="Equal divisions of the octave, or fret ratios of one period",
+        )
+        pars.add_argument(
+            "--temperament-offsets",
+            type=str,
+            help="Per string fret offsets in cents, treble first, ; separated",
+        )
         pars.add_argument("--frets-color", type=int, help="frets color")
         pars.add_argument("--strings-gauges", type=str, help="List of string gauges")
+        pars.add_argument(
+            "--strings-spacing",
+            type=str,
+            help="Equal string centers or gaps",
+            choices=list(SPACINGS),
+        )
+        pars.add_argument(
+            "--strings-tuning", type=str, help="Open string notes, for tensions"
+        )
         pars.add_argument("--frets-tang-width", type=float, help="Frets tang width")
         pars.add_argument(
             "--frets-tang-width-unit", type=str, help="Scale unit", choices=unit_choices
@@ -115,6 +198,17 @@ class FretboardExtension(inkex.GenerateExtension):
         pars.add_argument(
             "--draw-profile", type=inkex.Boolean, help="Draw fretboard side view"
         )
+        pars.add_argument(
+            "--draw-sections",
+            type=inkex.Boolean,
+            help="Draw fret cross-sections with crown tops leveling",
+        )
+        pars.add_argument(
+            "--sections-z-scale",
+            type=float,
+            default=10.0,
+            help="Cross-sections vertical exaggeration",
+        )
         pars.add_argument(
             "--ftp-tool-draw", type=inkex.Boolean, help="Draw fret slots toolpaths"
         )
@@ -126,6 +220,34 @@ class FretboardExtension(inkex.GenerateExtension):
             choices=unit_choices,
         )
         pars.add_argument("--ftp-tool-stepover", type=int, help="Tool stepover %")
+        pars.add_argument(
+            "--ftp-passes",
+            type=str,
+            help="Slot passes planner",
+            choices=list(PASS_PLANNERS),
+        )
+        pars.add_argument("--ftp-scallop", type=float, help="Max scallop height")
+        pars.add_argument(
+            "--ftp-scallop-unit",
+            type=str,
+            help="Max scallop height unit",
+            choices=unit_choices,
+        )
+        pars.add_argument(
+            "--ftp-finish-allowance", type=float, help="Finishing pass allowance"
+        )
+        pars.add_argument(
+            "--ftp-finish-allowance-unit",
+            type=str,
+            help="Finishing pass allowance unit",
+            choices=unit_choices,
+        )
+        pars.add_argument(
+            "--ftp-direction",
+            type=str,
+            help="Slot passes cutting direction",
+            choices=list(DIRECTIONS),
+        )
         pars.add_argument("--ftp-slot-width", type=float, help="Slot width")
         pars.add_argument(
             "--ftp-slot-width-unit",
@@ -140,162 +262,450 @@ class FretboardExtension(inkex.GenerateExtension):
             help="Slot margin unit",
             choices=unit_choices,
         )
+        pars.add_argument(
+            "--ftp-3d", type=inkex.Boolean, help="Toolpaths follow the radius"
+        )
+        pars.add_argument(
+            "--ftp-chord-tolerance", type=float, help="Radiused toolpaths tolerance"
+        )
+        pars.add_argument(
+            "--ftp-chord-tolerance-unit",
+            type=str,
+            help="Radiused toolpaths tolerance unit",
+            choices=unit_choices,
+        )
+        pars.add_argument(
+            "--ftp-export",
+            type=str,
+            help="Fret slots toolpaths output",
+            choices=["svg", "gcode"],
+        )
+        pars.add_argument(
+            "--ftp-order",
+            type=str,
+            help="Fret slots machining order",
+            choices=["index", "optimized"],
+        )
+        pars.add_argument(
+            "--ftp-merge", type=inkex.Boolean, help="Draw toolpaths as a single path"
+        )
+        pars.add_argument("--ftp-gcode-file", type=str, help="G-code output file")
+        pars.add_argument("--ftp-feed", type=float, help="Cutting feed, mm/min")
+        pars.add_argument("--ftp-plunge-feed", type=float, help="Plunge feed, mm/min")
+        pars.add_argument("--ftp-rapid-feed", type=float, help="Rapid feed, mm/min")
+        pars.add_argument(
+            "--ftp-spindle-speed", type=float, help="Spindle speed, rpm, 0 for none"
+        )
+        pars.add_argument("--ftp-safe-z", type=float, help="Safe Z above fretboard")
+        pars.add_argument(
+            "--ftp-safe-z-unit", type=str, help="Safe Z unit", choices=unit_choices
+        )
+        pars.add_argument("--ftp-slot-depth", type=float, help="Slot depth")
+        pars.add_argument(
+            "--ftp-slot-depth-unit",
+            type=str,
+            help="Slot depth unit",
+            choices=unit_choices,
+        )
+        pars.add_argument("--ftp-ramp-length", type=float, help="Ramped entry length")
+        pars.add_argument(
+            "--ftp-ramp-length-unit",
+            type=str,
+            help="Ramped entry length unit",
+            choices=unit_choices,
+        )
+        pars.add_argument(
+            "--compact",
+            type=inkex.Boolean,
+            help="Compound paths, shared styles and rounded coordinates",
+        )
+        pars.add_argument(
+            "--precision", type=int, help="Decimals kept by compact output"
+        )
+        pars.add_argument(
+            "--update-existing",
+            type=inkex.Boolean,
+            help="Regenerate the changed parts of the previous fretboard",
+        )
+        pars.add_argument(
+            "--profile", type=inkex.Boolean, help="Write a per-stage timing report"
+        )
+        pars.add_argument(
+            "--profile-file",
+            type=str,
+            help=f"Timing report (JSON), defaults to {DEFAULT_PROFILE_FILE}",
+        )
+        pars.add_argument(
+            "--profile-cprofile",
+            type=inkex.Boolean,
+            help="Add a cProfile summary to the timing report",
+        )
         pars.add_argument("--debug", type=inkex.Boolean, help="Show debug messages")
+        pars.add_argument("--debug-file", type=str, help="JSON lines debug trace")
 
     def generate(self):
-        self.debug_msg(msg="Debug messages\n===========\n")
-
-        for option in self.options.__dict__:
-            if (
-                f"{option}_unit" in self.options.__dict__.keys()
-                and self.options.__dict__.get(f"{option}_unit") == "in"
-            ):
-                setattr(
-                    self, option, self._to_mm(inches=self.options.__dict__.get(option))
-                )
+        self.prepare()
+        fretboard = Group.new(label="fretboard")
+        yield fretboard
+        for label, parent, builder, options, drawn in self.parts():
+            if not drawn:
+                continue
+            part = self.generate_part(builder, options)
+            if parent == "fretboard":
+                fretboard.append(part)
             else:
-                setattr(self, option, self.options.__dict__.get(option))
+                yield part
+        self.add_stylesheet()
+
+    def prepare(self) -> None:
+        """Options in millimetres, geometry and fret slots shared by every part"""
+        params = self.profiler.timed(
+            "normalize_units", normalize_units, self.options.__dict__
+        )
+        for option, value in params.items():
+            setattr(self, option, value)
+        self.mm_params = params
         # self.debug_msg(msg=f"===\noptions: {self.options.__dict__}")
         # self.debug_msg(msg=f"===\nself: {vars(self)}===\n")
 
         self.strings_color = f"#{hex(self.options.strings_color)[2:-2]}"
         self.strings_opacity = (self.options.strings_color & 255) / 255
-        self.debug_msg(
-            msg=f"strings_color: {self.options.strings_color}, {self.strings_color}, opacity: {self.strings_opacity}"
+        self.tracer(
+            "colors",
+            strings_color=self.options.strings_color,
+            strings_hex=self.strings_color,
+            strings_opacity=self.strings_opacity,
         )
         self.frets_color = f"#{hex(self.options.frets_color)[2:-2]}"
-        self.midline_y = self.set_midline()
-        self.debug_msg(msg=f"midline_y: {self.midline_y}")
 
+        try:
+            self.geometry = self.profiler.timed(
+                "geometry", FretboardGeometry.from_params, params
+            )
+        except ValueError as e:
+            raise inkex.AbortExtension(f"Invalid temperament: {e}") from e
+        self.midline_y = self.geometry.midline_y
         if self.options.ignore_bridge_width:
-            self.bridge_width = (
-                self.bridge_string_space * (self.options.strings - 1)
-                + self.nut_width
-                - self.nut_string_space
+            self.bridge_width = self.geometry.bridge_width
+        if self.nut_radius < self.nut_width / 2 or (
+            self.bridge_radius < self.bridge_width / 2
+        ):
+            raise inkex.AbortExtension(
+                "Fretboard radius smaller than half its width, check the radius units"
             )
-            self.debug_msg(msg=f"bridge_width: {self.bridge_width}")
 
-        self.fretboard_angle_tan = (
-            self.bridge_width / 2 - self.nut_width / 2
-        ) / self.scale
+        self.fretboard_angle_tan = self.geometry.fretboard_angle_tan
         self.fretboard_angle = math.atan(self.fretboard_angle_tan)
-        self.debug_msg(
-            msg=f"fretboard_angle: {self.fretboard_angle} rad, {self.fretboard_angle * 180 / math.pi}°"
+        self.tracer(
+            "geometry",
+            midline_y=self.midline_y,
+            bridge_width=self.bridge_width,
+            fretboard_angle=self.fretboard_angle,
+            fretboard_angle_deg=lambda: math.degrees(self.fretboard_angle),
         )
 
-        fretboard = Group.new(label="fretboard")
+        if self.options.ftp_tool_draw:
+            self.slots = self.profiler.timed("generate_slots", self.generate_slots)
+
+    def parts(self) -> List[Tuple[str, Optional[str], Callable[[], Group], Any, bool]]:
+        """Generated groups: label, parent label (None for the container), builder,
+        options it depends on besides GEOMETRY_OPTIONS, and whether it is drawn"""
+        ftp_options = [option for option in self.params() if option.startswith("ftp_")]
+        return [
+            (
+                "fretboard_scale_outline",
+                "fretboard",
+                self.generate_fretboard_scale_outline,
+                [],
+                True,
+            ),
+            (
+                "fretboard_outline",
+                "fretboard",
+                self.generate_fretboard_outline,
+                [],
+                True,
+            ),
+            (
+                "fret_tangs",
+                "fretboard",
+                self.generate_fret_tangs,
+                ["frets_tang_width"],
+                True,
+            ),
+            (
+                "strings",
+                "fretboard",
+                self.generate_strings,
+                ["strings_gauges", "strings_color", "ignore_custom_width"],
+                True,
+            ),
+            (
+                "fret_crowns",
+                "fretboard",
+                self.generate_fret_crowns,
+                ["frets_crown_width", "frets_color"],
+                not self.options.ignore_custom_width,
+            ),
+            (
+                "frets_toolpath_lines",
+                "fretboard",
+                self.generate_fret_toolpaths,
+                ftp_options + ["nut_radius", "bridge_radius"],
+                self.options.ftp_tool_draw and self.options.ftp_export == "svg",
+            ),
+            (
+                "side_view",
+                None,
+                self.generate_sideview,
+                [
+                    "fretboard_thickness",
+                    "nut_radius",
+                    "bridge_radius",
+                    "frets_crown_width",
+                    "frets_crown_height",
+                ],
+                self.options.draw_profile,
+            ),
+            (
+                "cross_sections",
+                None,
+                self.generate_sections,
+                [
+                    "nut_radius",
+                    "bridge_radius",
+                    "frets_crown_height",
+                    "frets_color",
+                    "strings_color",
+                    "sections_z_scale",
+                ],
+                self.options.draw_sections,
+            ),
+            (
+                "params_reminder",
+                None,
+                self.generate_params_text,
+                list(self.params()),
+                True,
+            ),
+        ]
+
+    def generate_part(self, builder: Callable[[], Group], options: List[str]) -> Group:
+        part = self.profiler.timed(builder.__name__, builder, count=self.element_count)
+        part.set("data-fretboard-hash", self.fingerprint(options))
+        return part
+
+    def write_fretboard(
+        self, xf: etree.xmlfile, id_prefix: str = "", **attributes: str
+    ) -> None:
+        """Write the fretboard group to an lxml incremental writer, part by part
+        and toolpath by toolpath, no element outliving its write: documents of
+        any number of boards then take the memory of their largest part. The
+        enclosing xf.element declares the svg (default) and inkscape namespaces
+        with nsmap, as fretboard_nest.write_sheet does"""
+        group = inkex.addNS("g", "svg")
+        label_attribute = inkex.addNS("label", "inkscape")
+        with xf.element(group, attributes):
+            with xf.element(group, {label_attribute: "fretboard"}):
+                for label, parent, builder, options, drawn in self.parts():
+                    if not drawn or parent != "fretboard":
+                        continue
+                    if builder != self.generate_fret_toolpaths:
+                        xf.write(
+                            self.writable(
+                                self.generate_part(builder, options), id_prefix
+                            )
+                        )
+                        continue
+                    with xf.element(
+                        group,
+                        {
+                            label_attribute: label,
+                            "data-fretboard-hash": self.fingerprint(options),
+                        },
+                    ):
+                        for toolpath in self.generate_ftp_elements():
+                            xf.write(self.writable(toolpath, id_prefix))
+
+    @staticmethod
+    def writable(element: etree.ElementBase, id_prefix: str) -> etree.ElementBase:
+        """Element ready for an incremental writer, ids prefixed to stay unique
+        on a sheet; the writer root declares the document namespaces"""
+        if id_prefix:
+            for child in element.iter():
+                if child.get("id"):
+                    child.set("id", id_prefix + child.get("id"))
+        return element
+
+    def create_container(self) -> Group:
+        container = super().create_container()
+        container.set("data-fretboard-params", json.dumps(self.params()))
+        return container
 
-        fretboard_scale_outline = self.generate_fretboard_scale_outline()
-        fretboard_outline = self.generate_fretboard_outline()
-        strings_lines = self.generate_strings()
+    def effect(self) -> None:
+        self.tracer = Tracer(
+            message_sink=self.msg if self.options.debug else None,
+            path=self.options.debug_file or None,
+        )
+        self.profiler = StageProfiler(
+            enabled=self.options.profile, cprofile=self.options.profile_cprofile
+        )
+        try:
+            container = (
+                self.previous_fretboard() if self.options.update_existing else None
+            )
+            if container is not None and self.fretboard_group(container) is None:
+                self.tracer(
+                    "update", part="fretboard", action="incomplete, regenerated"
+                )
+                container.delete()
+                container = None
+            if container is None:
+                super().effect()
+            else:
+                self.prepare()
+                self.update_fretboard(container)
+                self.add_stylesheet()
+                self.remove_unused_css_classes()
+        finally:
+            self.tracer.close()
 
-        frets_tang_lines, frets_crown_lines, fret_slots_toolpaths = (
-            self.generate_frets()
+    def save_raw(self, ret) -> None:
+        self.profiler.timed(
+            "serialization",
+            super().save_raw,
+            ret,
+            count=lambda _: self.element_count(self.document.getroot()),
         )
+        if self.profiler.enabled:
+            self.profiler.write(
+                self.options.profile_file or DEFAULT_PROFILE_FILE,
+                params=self.params(),
+                versions={"inkex": inkex.__version__},
+            )
 
-        fretboard.append(fretboard_scale_outline)
-        fretboard.append(fretboard_outline)
-        fretboard.append(frets_tang_lines)
-        fretboard.append(strings_lines)
-        if not self.options.ignore_custom_width:
-            fretboard.append(frets_crown_lines)
-        if self.options.ftp_tool_draw:
-            fretboard.append(fret_slots_toolpaths)
-        yield fretboard
+    def previous_fretboard(self) -> Optional[Group]:
+        """Selected fretboard, else the last one generated in the document"""
+        fretboards = self.svg.xpath("//svg:g[@data-fretboard-params]")
+        selected = set()
+        for elem in self.svg.selection.values():
+            selected.add(elem)
+            selected.update(elem.iterancestors())
+        for fretboard in reversed(fretboards):
+            if fretboard in selected:
+                return fretboard
+        return fretboards[-1] if fretboards else None
 
-        if self.options.draw_profile:
-            profile = self.generate_sideview()
-            yield profile
+    @staticmethod
+    def fretboard_group(container: Group) -> Optional[Group]:
+        return next(
+            (g for g in container.xpath("./svg:g") if g.label == "fretboard"), None
+        )
+
+    def update_fretboard(self, container: Group) -> None:
+        """Regenerate the parts of container whose fingerprint changed"""
+        fretboard = self.fretboard_group(container)
+        previous_parts = {
+            part.label: part for part in container.xpath(".//*[@data-fretboard-hash]")
+        }
+        # last part in place under each parent, new parts are inserted after it
+        anchors = {"fretboard": None, None: fretboard}
+        for label, parent, builder, options, drawn in self.parts():
+            previous = previous_parts.get(label)
+            if not drawn:
+                if previous is not None:
+                    previous.delete()
+                continue
+            if previous is not None and previous.get(
+                "data-fretboard-hash"
+            ) == self.fingerprint(options):
+                self.tracer("update", part=label, action="unchanged")
+                anchors[parent] = previous
+                continue
+            self.tracer("update", part=label, action="regenerated")
+            part = self.generate_part(builder, options)
+            if previous is not None:
+                previous.getparent().replace(previous, part)
+            elif anchors[parent] is not None:
+                anchors[parent].addnext(part)
+            else:
+                fretboard.insert(0, part)
+            anchors[parent] = part
+        container.set("data-fretboard-params", json.dumps(self.params()))
 
-        yield self.generate_params_text()
+    def params(self) -> Dict[str, Any]:
+        """Extension parameters, as given"""
+        return {
+            option: value
+            for option, value in self.options.__dict__.items()
+            if option not in self.NOT_PARAMS
+        }
+
+    def fingerprint(self, options: Iterable[str]) -> str:
+        values = {}
+        for option in [*self.GEOMETRY_OPTIONS, *options]:
+            values[option] = getattr(self.options, option)
+            if hasattr(self.options, f"{option}_unit"):
+                values[f"{option}_unit"] = getattr(self.options, f"{option}_unit")
+        return hashlib.sha1(json.dumps(values, sort_keys=True).encode()).hexdigest()
 
     def generate_fretboard_scale_outline(self) -> Group:
-        fretboard_scale_outline_points = [
-            f"0,{self.midline_y - self.bridge_width / 2}",
-            f"{self.scale},{self.midline_y - self.nut_width / 2}",
-            f"{self.scale},{self.midline_y + self.nut_width / 2}",
-            f"0,{self.midline_y + self.bridge_width / 2}",
-        ]
         fretboard_scale_outline = Group.new(label="fretboard_scale_outline")
         fretboard_scale_outline.append(
             Polygon(
-                points=" ".join(fretboard_scale_outline_points),
+                points=self.points_str(self.geometry.scale_outline),
                 id="fretboard_scale_outline",
-                attrib=Style(
-                    style={"fill": None, "stroke-width": 0.1, "stroke": "#000000"}
+                attrib=self.styled(
+                    {"fill": None, "stroke-width": 0.1, "stroke": "#000000"},
+                    presentation=True,
                 ),
             )
         )
         return fretboard_scale_outline
 
     def generate_fretboard_outline(self) -> Group:
-        pass
-        last_fret_x = self.scale - self.distance_to_nut(
-            scale=self.scale, n=self.options.frets + 1
-        )
-        last_fret_y1 = (
-            self.midline_y
-            - self.bridge_width / 2
-            + last_fret_x * self.fretboard_angle_tan
-        )
-        last_fret_y2 = (
-            self.midline_y
-            + self.bridge_width / 2
-            - last_fret_x * self.fretboard_angle_tan
-        )
-        fretboard_outline_points = [
-            f"{last_fret_x},{last_fret_y1}",
-            f"{self.scale},{self.midline_y - self.nut_width / 2}",
-            f"{self.scale},{self.midline_y + self.nut_width / 2}",
-            f"{last_fret_x},{last_fret_y2}",
-        ]
         fretboard_outline = Group.new(label="fretboard_outline")
         fretboard_outline.append(
             Polygon(
-                points=" ".join(fretboard_outline_points),
+                points=self.points_str(self.geometry.outline),
                 id="fretboard_outline",
-                attrib=Style(
-                    style={"fill": None, "stroke-width": 0.1, "stroke": "#ff0000"}
+                attrib=self.styled(
+                    {"fill": None, "stroke-width": 0.1, "stroke": "#ff0000"},
+                    presentation=True,
                 ),
             )
         )
         return fretboard_outline
 
     def generate_strings(self) -> Group:
-        strings_gauges = self.options.strings_gauges.split(",")
-        self.debug_msg(
-            msg=f"strings_gauges: {strings_gauges}, len(strings_gauges): {len(strings_gauges)}"
-        )
-
-        if self.options.ignore_custom_width:
-            strings_gauges = [10] * self.options.strings
-        elif len(strings_gauges) == self.options.strings:
-            for sg in range(len(strings_gauges)):
-                try:
-                    strings_gauges[sg] = int(strings_gauges[sg])
-                except Exception as e:
-                    self.debug_msg(msg=f"strings_gauges[sg], {e}")
-            strings_gauges.reverse()
-        else:
-            strings_gauges = [10] * self.options.strings
-            self.debug_msg(
-                msg=f"gauges list items don't match strings number\n{strings_gauges}"
-            )
+        strings_gauges = self.string_gauges().gauges.tolist()
 
         strings_lines = Group.new(label="strings")
-        for string_i in range(0, self.options.strings):
-            string_x1 = 0
-            string_y1 = (
-                self.midline_y
-                - self.bridge_string_space * (self.options.strings - 1) / 2
-                + self.bridge_string_space * string_i
-            )
-            string_x2 = self.scale
-            string_y2 = (
-                self.midline_y
-                - self.nut_string_space / 2
-                + self.nut_string_space / (self.options.strings - 1) * string_i
-            )
+        if self.options.compact:
+            strings_widths = [gauge / 100 * 2.54 for gauge in strings_gauges]
+            for width_i, width in enumerate(dict.fromkeys(strings_widths), 1):
+                strings_lines.append(
+                    self.compound_path(
+                        [
+                            line.reshape(2, 2)
+                            for line, line_width in zip(
+                                self.geometry.string_lines, strings_widths
+                            )
+                            if line_width == width
+                        ],
+                        id=f"strings_{width_i}",
+                        style={
+                            "fill": None,
+                            "stroke-opacity": self.strings_opacity,
+                            "stroke-width": width,
+                            "stroke": self.strings_color or "#00ff00",
+                        },
+                    )
+                )
+            return strings_lines
+        for string_i, (string_x1, string_y1, string_x2, string_y2) in enumerate(
+            self.geometry.string_lines.tolist()
+        ):
             string = PathElement.new(
                 path=[Move(x=string_x1, y=string_y1), Line(x=string_x2, y=string_y2)],
                 id=f"string_{string_i+1}",
@@ -311,57 +721,111 @@ class FretboardExtension(inkex.GenerateExtension):
             strings_lines.append(string)
         return strings_lines
 
-    def generate_frets(self) -> List[Group]:
+    def string_gauges(self) -> Gauges:
+        """Gauges drawn, bass first: all 10 when ignored or invalid"""
+        self.tracer("strings", gauges=self.options.strings_gauges)
+        default = Gauges(
+            np.full(self.options.strings, 10.0),
+            np.zeros(self.options.strings, dtype=bool),
+        )
+        if self.options.ignore_custom_width:
+            return default
+        try:
+            return parse_gauges(self.options.strings_gauges, self.options.strings)
+        except ValueError as e:
+            self.tracer("strings", error=e, gauges=self.options.strings_gauges)
+            return default
+
+    def strings_report(self) -> List[str]:
+        """Tensions and smallest edge margins of the strings drawn, when gauges
+        and tuning are valid"""
+        if self.options.ignore_custom_width:
+            return []
+        try:
+            gauges = parse_gauges(self.options.strings_gauges, self.options.strings)
+            frequencies = parse_tuning(
+                self.options.strings_tuning, self.options.strings
+            )
+        except ValueError:
+            return []
+        tensions = string_tensions(
+            gauges.gauges, gauges.wound, self.geometry.string_scales, frequencies
+        )
+        margins = edge_margins(self.geometry, gauges.diameters).min(axis=-1)
+        return [
+            "string tensions, treble first: "
+            + ", ".join(f"{tension:.1f}" for tension in tensions[::-1].tolist())
+            + " kgf",
+            f"edge margins: {margins[1]:.2f} mm treble side,"
+            f" {margins[0]:.2f} mm bass side",
+        ]
+
+    def generate_slots(self) -> List[Slot]:
+        """Fret slot toolpaths in machining order, exported when G-code is wanted"""
+        if self.ftp_tool_diameter > self.ftp_slot_width:
+            self.tracer(
+                "toolpaths",
+                error="tool diameter > slot width",
+                tool_diameter=self.ftp_tool_diameter,
+                slot_width=self.ftp_slot_width,
+            )
+            self.options.ftp_tool_draw = False
+            return []
+        slots = plan_slots(self.geometry, self.mm_params, self.tracer, self.msg)
+        self.pass_report = pass_report(self.geometry, self.mm_params)
+        self.toolpath_stats = toolpath_stats(
+            slots,
+            feed=self.options.ftp_feed,
+            plunge_feed=self.options.ftp_plunge_feed,
+            rapid_feed=self.options.ftp_rapid_feed,
+            safe_z=self.ftp_safe_z,
+            slot_depth=self.ftp_slot_depth,
+            ramp_length=self.ftp_ramp_length,
+        )
+        self.tracer(
+            "passes",
+            removed_length=self.pass_report.removed_length,
+            **self.pass_report._asdict(),
+        )
+        self.tracer("toolpaths", **self.toolpath_stats._asdict())
+        if self.options.ftp_export == "gcode":
+            self.export_gcode(slots)
+        return slots
+
+    def generate_fret_tangs(self) -> Group:
         frets_tang_lines = Group.new(label="fret_tangs")
-        frets_crown_lines = Group.new(label="fret_crowns")
-        frets_toolpath_lines = Group.new(label="frets_toolpath_lines")
-        if self.options.ftp_tool_draw:
-            if self.ftp_tool_diameter <= self.ftp_slot_width:
-                # 1 full pass min + remaining / cutting width
-                passes = math.ceil(
-                    1
-                    + (self.ftp_slot_width - self.ftp_tool_diameter)
-                    / (self.ftp_tool_diameter * self.options.ftp_tool_stepover / 100)
+        if self.options.compact:
+            fret_lines = self.geometry.fret_lines
+            frets_tang_lines.append(
+                self.compound_path(
+                    fret_lines[[0, -1]],
+                    id="fret_tangs_ends",
+                    style={"fill": None, "stroke-width": 0.1, "stroke": "#ff0000"},
                 )
-                self.debug_msg(f"frets_toolpath_lines: passes={passes}")
-            else:
-                self.debug_msg(
-                    f"tool diameter {self.ftp_tool_diameter} > tang width {self.frets_tang_width}"
+            )
+            frets_tang_lines.append(
+                self.compound_path(
+                    fret_lines[1:-1],
+                    id="fret_tangs",
+                    style={
+                        "fill": None,
+                        "stroke-width": self.frets_tang_width,
+                        "stroke": "#999999",
+                    },
                 )
-                self.options.ftp_tool_draw = False
-        for fret_i in range(self.options.frets + 2):
+            )
+            return frets_tang_lines
+        for fret_i, (fret_x, fret_line) in enumerate(
+            zip(self.geometry.fret_x.tolist(), self.geometry.fret_lines.tolist())
+        ):
             not_real_fret = False
             if fret_i == 0 or fret_i == self.options.frets + 1:
                 not_real_fret = True
-            fret_x = self.scale - self.distance_to_nut(scale=self.scale, n=fret_i)
-            self.debug_msg(
-                msg=f"generating fret_{fret_i}, distance to nut={self.scale - fret_x} mm"
+            self.tracer(
+                "fret", fret=fret_i, distance_to_nut=self.geometry.length - fret_x
             )
-            fret_y1 = (
-                self.midline_y
-                - self.bridge_width / 2
-                + fret_x * self.fretboard_angle_tan
-            )
-            fret_y2 = (
-                self.midline_y
-                + self.bridge_width / 2
-                - fret_x * self.fretboard_angle_tan
-            )
-            if not (self.options.ignore_custom_width or not_real_fret):
-                fret_crown = PathElement.new(
-                    path=[Move(x=fret_x, y=fret_y1), Line(x=fret_x, y=fret_y2)],
-                    id=f"fret_crown_{fret_i}",
-                    style=Style(
-                        style={
-                            "fill": None,
-                            "stroke-width": self.frets_crown_width,
-                            "stroke": self.frets_color or "#e0e0e0",
-                        }
-                    ),
-                )
-                frets_crown_lines.append(fret_crown)
             fret_tang = PathElement.new(
-                path=(Move(x=fret_x, y=fret_y1), Line(x=fret_x, y=fret_y2)),
+                path=self.fret_path(fret_line),
                 id=f"fret_tang_{fret_i}",
                 style=Style(
                     style={
@@ -374,26 +838,72 @@ class FretboardExtension(inkex.GenerateExtension):
                 ),
             )
             frets_tang_lines.append(fret_tang)
-            if self.options.ftp_tool_draw and not not_real_fret:
-                frets_toolpath_lines.append(
-                    self.generate_ftp(passes, fret_i, fret_x, fret_y1, fret_y2)
+        return frets_tang_lines
+
+    def generate_fret_crowns(self) -> Group:
+        frets_crown_lines = Group.new(label="fret_crowns")
+        if self.options.ignore_custom_width:
+            return frets_crown_lines
+        style = {
+            "fill": None,
+            "stroke-width": self.frets_crown_width,
+            "stroke": self.frets_color or "#e0e0e0",
+        }
+        if self.options.compact:
+            frets_crown_lines.append(
+                self.compound_path(
+                    self.geometry.fret_lines[1:-1], id="fret_crowns", style=style
                 )
+            )
+            return frets_crown_lines
+        for fret_i, fret_line in enumerate(self.geometry.fret_lines[1:-1].tolist(), 1):
+            fret_crown = PathElement.new(
+                path=self.fret_path(fret_line),
+                id=f"fret_crown_{fret_i}",
+                style=Style(style=style),
+            )
+            frets_crown_lines.append(fret_crown)
+        return frets_crown_lines
+
+    @staticmethod
+    def fret_path(fret_line: List[List[float]]) -> List[Union[Move, Line]]:
+        (x, y), *line = fret_line
+        return [Move(x=x, y=y)] + [Line(x=x, y=y) for x, y in line]
+
+    def generate_fret_toolpaths(self) -> Group:
+        frets_toolpath_lines = Group.new(label="frets_toolpath_lines")
+        for toolpath in self.generate_ftp_elements():
+            frets_toolpath_lines.append(toolpath)
+        return frets_toolpath_lines
 
-        return [frets_tang_lines, frets_crown_lines, frets_toolpath_lines]
+    def generate_ftp_elements(self) -> Iterator[Union[Polyline, PathElement]]:
+        """Toolpath elements one by one, a polyline per slot or a merged path"""
+        if not self.options.ftp_tool_draw:
+            return
+        if self.options.ftp_merge or self.options.compact:
+            yield self.generate_ftp_merged(self.slots)
+            return
+        for fret_i, points in self.slots:
+            yield self.profiler.timed(
+                "generate_ftp",
+                self.generate_ftp,
+                fret_i,
+                points[:, :2],
+                count=self.element_count,
+                fret=fret_i,
+            )
 
     def generate_sideview(self) -> Group:
         profile = Group.new(label="side_view")
         y_offset = self.set_midline() * 2
 
-        side_radiused_x = self.scale - self.distance_to_nut(
-            scale=self.scale, n=self.options.frets + 1
-        )
+        side_radiused_x = float(self.geometry.fret_x[-1])
         side_outline = Rectangle.new(
-            left=side_radiused_x,
+            left=self.quantize(side_radiused_x),
             top=y_offset,
-            width=self.scale - side_radiused_x,
-            height=self.fretboard_thickness,
-            style=Style(style={"fill": None, "stroke-width": 0.1, "stroke": "#000000"}),
+            width=self.quantize(self.geometry.length - side_radiused_x),
+            height=self.quantize(self.fretboard_thickness),
+            **self.styled({"fill": None, "stroke-width": 0.1, "stroke": "#000000"}),
         )
         side_radiused_y1 = (
             y_offset
@@ -410,11 +920,11 @@ class FretboardExtension(inkex.GenerateExtension):
         side_radiused_line = PathElement.new(
             path=[
                 Move(x=side_radiused_x, y=side_radiused_y1),
-                Line(x=self.scale, y=side_radiused_y2),
+                Line(x=self.geometry.length, y=side_radiused_y2),
             ],
             id="radiused_line",
-            style=Style(
-                style={
+            **self.styled(
+                {
                     "stroke-dasharray": "2 1",
                     "fill": None,
                     "stroke-width": 0.1,
@@ -426,8 +936,31 @@ class FretboardExtension(inkex.GenerateExtension):
         profile.append(side_radiused_line)
 
         # frets
-        for fret_i in range(1, self.options.frets + 1):
-            fret_x = self.scale - self.distance_to_nut(scale=self.scale, n=fret_i)
+        if self.options.compact:
+            crown_starts, crown_ends = self.quantize(
+                self.geometry.fret_x[1:-1, np.newaxis]
+                + [-self.frets_crown_width / 2, self.frets_crown_width / 2]
+            ).T.tolist()
+            crown_radii = self.quantize(
+                np.array([self.frets_crown_width / 2, self.frets_crown_height])
+            ).tolist()
+            y_offset = self.quantize(np.array(y_offset)).tolist()
+            side_frets = PathElement()
+            side_frets.set(
+                "d",
+                " ".join(
+                    f"M {x1},{y_offset}"
+                    f" A {crown_radii[0]},{crown_radii[1]} 0 0 1 {x2},{y_offset}"
+                    for x1, x2 in zip(crown_starts, crown_ends)
+                ),
+            )
+            side_frets.set("id", "side_frets")
+            side_frets.update(
+                **self.styled({"fill": None, "stroke-width": 0.1, "stroke": "#000000"})
+            )
+            profile.append(side_frets)
+            return profile
+        for fret_i, fret_x in enumerate(self.geometry.fret_x[1:-1].tolist(), 1):
             fret_path = PathElement.new(
                 path=[
                     Move(x=fret_x - self.frets_crown_width / 2, y=y_offset),
@@ -451,94 +984,259 @@ class FretboardExtension(inkex.GenerateExtension):
 
         return profile
 
-    def generate_ftp(self, passes: int, fret_i, fret_x, fret_y1, fret_y2) -> Polyline:
-        self.debug_msg(f"generating toolpath for fret_{fret_i}")
-        # pass 1
-        points = [
-            (
-                fret_x - self.ftp_slot_width / 2 + self.ftp_tool_diameter / 2,
-                fret_y1 + self.ftp_slot_margin + self.ftp_tool_diameter / 2,
-            ),
-            (
-                fret_x - self.ftp_slot_width / 2 + self.ftp_tool_diameter / 2,
-                fret_y2 - self.ftp_slot_margin - self.ftp_tool_diameter / 2,
-            ),
-        ]
-        # passes 2+
-        for pass_i in range(2, passes + 1):
-            if pass_i % 2 == 0:
-                y1 = fret_y2 - self.ftp_slot_margin - self.ftp_tool_diameter / 2
-                y2 = fret_y1 + self.ftp_slot_margin + self.ftp_tool_diameter / 2
-            else:
-                y1 = fret_y1 + self.ftp_slot_margin + self.ftp_tool_diameter / 2
-                y2 = fret_y2 - self.ftp_slot_margin - self.ftp_tool_diameter / 2
+    def generate_sections(self) -> Group:
+        """Cross-section of the radiused top at every fret, vertical scale
+        exaggerated, with the crown tops and a mark under each string; the
+        label gives the worst rocker along the strings"""
+        sections = Group.new(label="cross_sections")
+        try:
+            relief = fret_relief(
+                self.geometry,
+                nut_radius=self.nut_radius,
+                bridge_radius=self.bridge_radius,
+                crown_height=self.frets_crown_height,
+            )
+            along, _, surface_z = fret_sections(
+                self.geometry, self.nut_radius, self.bridge_radius
+            )
+        except ValueError as e:
+            self.tracer("relief", error=e)
+            return sections
+        rockers = np.nan_to_num(relief.rocker, nan=-np.inf).max(axis=1)
+        self.tracer(
+            "relief",
+            max_deviation=lambda: np.abs(relief.deviation).max(),
+            max_rocker=lambda: rockers.max(),
+            rocking_frets=lambda: np.flatnonzero(rockers > ROCKER_TOLERANCE) + 1,
+        )
 
-            x = (
-                fret_x
-                - self.ftp_slot_width / 2
-                + self.ftp_tool_diameter * self.options.ftp_tool_stepover / 100 * pass_i
+        z_scale = self.options.sections_z_scale
+        top_z = float(relief.crown_z.max())
+        height = (top_z - float(surface_z.min())) * z_scale + 8
+        pitch = float(along[:, -1].max()) + 10
+        per_row = max(1, int(self.geometry.length // pitch))
+        row, column = np.divmod(np.arange(self.options.frets), per_row)
+        left = column[:, np.newaxis] * pitch
+        top = self.set_midline() * 3 + row[:, np.newaxis] * height
+
+        def to_svg(u: np.ndarray, z: np.ndarray) -> np.ndarray:
+            return np.stack([left + u, top + 5 + (top_z - z) * z_scale], axis=-1)
+
+        surfaces = to_svg(along, surface_z)
+        crowns = to_svg(along, surface_z + self.frets_crown_height)
+        # strings along their fret, from its y1 end
+        lines = self.geometry.fret_lines[1:-1]
+        marks = to_svg(
+            np.hypot(relief.x - lines[:, :1, 0], relief.y - lines[:, :1, 1]),
+            relief.crown_z,
+        )
+        line_style = {"fill": None, "stroke-width": 0.1}
+        for fret_i in range(1, self.options.frets + 1):
+            section = Group.new(label=f"section_{fret_i}")
+            section.append(
+                Polyline.new(
+                    points=self.points_str(surfaces[fret_i - 1]),
+                    id=f"section_surface_{fret_i}",
+                    **self.styled(dict(line_style, stroke="#000000")),
+                )
+            )
+            section.append(
+                Polyline.new(
+                    points=self.points_str(crowns[fret_i - 1]),
+                    id=f"section_crown_{fret_i}",
+                    **self.styled(dict(line_style, stroke=self.frets_color)),
+                )
             )
-            if x >= fret_x + self.ftp_slot_width / 2 - self.ftp_tool_diameter / 2:
-                x = fret_x + self.ftp_slot_width / 2 - self.ftp_tool_diameter / 2
-            # go right
-            points.append((x, y1))
-            # go up/down
-            points.append((x, y2))
+            section.append(
+                self.compound_path(
+                    np.stack([marks[fret_i - 1], marks[fret_i - 1] - [0, 2]], axis=1),
+                    id=f"section_strings_{fret_i}",
+                    style=dict(line_style, stroke=self.strings_color),
+                )
+            )
+            label = TextElement()
+            label.set("id", f"section_label_{fret_i}")
+            label.set("x", float(left[fret_i - 1, 0]))
+            label.set("y", float(top[fret_i - 1, 0]) + 3)
+            label.update(
+                **self.styled(
+                    Style(
+                        "font-size:3px;text-align:left;text-anchor:start;fill:#000000"
+                    )
+                )
+            )
+            label.text = f"fret {fret_i}"
+            if np.isfinite(rockers[fret_i - 1]):
+                label.text += f", rocker {rockers[fret_i - 1] * 1000:.1f} um"
+            section.append(label)
+            sections.append(section)
+        return sections
 
-        self.debug_msg(
-            f"""to_nut={(self.scale-fret_x):.03f}, fret_x={fret_x:.03f}, points={points}"""
+    def generate_ftp(self, fret_i: int, points: np.ndarray) -> Polyline:
+        self.tracer(
+            "toolpath",
+            fret=fret_i,
+            fret_x=self.geometry.fret_x[fret_i],
+            to_nut=lambda: self.geometry.length - self.geometry.fret_x[fret_i],
+            points=points,
         )
         return Polyline.new(
-            points=" ".join([f"{p[0]},{p[1]}" for p in points]),
+            points=self.points_str(points),
             id=f"toolpath_fret_{fret_i}",
             style=Style(
                 style={"fill": None, "stroke-width": 0.001, "stroke": "#FF6600"}
             ),
         )
 
+    def generate_ftp_merged(self, slots: List[Slot]) -> PathElement:
+        return self.compound_path(
+            [points[:, :2] for _, points in slots],
+            id="toolpath_frets",
+            style={"fill": None, "stroke-width": 0.001, "stroke": "#FF6600"},
+        )
+
+    def export_gcode(self, slots: List[Slot]) -> None:
+        if not self.options.ftp_gcode_file:
+            raise inkex.AbortExtension(
+                "Toolpaths output is set to G-code file but no G-code file is given"
+            )
+        write_gcode(self.options.ftp_gcode_file, self.gcode_lines(slots))
+        self.tracer("gcode", path=self.options.ftp_gcode_file)
+
+    def gcode_lines(self, slots: List[Slot]) -> Iterator[str]:
+        return gcode_program(
+            slots=slots,
+            feed=self.options.ftp_feed,
+            plunge_feed=self.options.ftp_plunge_feed,
+            safe_z=self.ftp_safe_z,
+            slot_depth=self.ftp_slot_depth,
+            comments=self.toolpath_report(),
+            ramp_length=self.ftp_ramp_length,
+            spindle_speed=self.options.ftp_spindle_speed,
+        )
+
+    def toolpath_report(self) -> List[str]:
+        lines = []
+        if self.pass_report is not None:
+            lines.extend(self.pass_report.report())
+        if self.toolpath_stats is not None:
+            lines.extend(self.toolpath_stats.report())
+        return lines
+
     def generate_params_text(self) -> Group:
         texts = Group.new(label="params_reminder")
         title = TextElement()
         title.set("id", "title")
         title.set("x", 0)
         title.set("y", 0)
-        title.set(
-            "style", "font-size:4px;text-align:left;text-anchor:start;fill:#000000"
+        title.update(
+            **self.styled(
+                Style("font-size:4px;text-align:left;text-anchor:start;fill:#000000")
+            )
         )
         title.set("xml:space", "preserve")
         title.text = "Params:"
         texts.append(title)
-        i = 0
-        for option in self.options.__dict__:
-            if option in [
-                "tabs",
-                "input_file",
-                "output",
-                "ids",
-                "selected_nodes",
-            ] or option.endswith("_unit"):
+        lines = []
+        for option in self.params():
+            if option.endswith("_unit"):
                 continue
-            i += 1
+            if f"{option}_unit" in self.options.__dict__.keys():
+                lines.append(
+                    f"""{option}: {getattr(self.options, option)} {getattr(self.options, option + "_unit")}"""
+                )
+            elif option.endswith("_color"):
+                lines.append(f"{option}: #{hex(getattr(self.options, option))[2:-2]}")
+            else:
+                lines.append(f"{option}: {getattr(self.options, option)}")
+        lines.extend(self.strings_report())
+        lines.extend(self.toolpath_report())
+        for i, line in enumerate(lines, 1):
             elt = TextElement()
             elt.set("id", "scale")
             elt.set("x", 0)
             elt.set("y", 3 * i)
-            elt.set(
-                "style", "font-size:3px;text-align:left;text-anchor:start;fill:#000000"
+            elt.update(
+                **self.styled(
+                    Style(
+                        "font-size:3px;text-align:left;text-anchor:start;fill:#000000"
+                    )
+                )
             )
             elt.set("xml:space", "preserve")
-            if f"{option}_unit" in self.options.__dict__.keys():
-                elt.text = f"""{option}: {getattr(self.options, option)} {getattr(self.options, option + "_unit")}"""
-            elif option.endswith("_color"):
-
-                elt.text = f"{option}: #{hex(getattr(self.options, option))[2:-2]}"
-            else:
-                elt.text = f"{option}: {getattr(self.options, option)}"
+            elt.text = line
             texts.append(elt)
         return texts
 
+    def add_stylesheet(self) -> None:
+        """Add css classes used by compact output and missing from the document"""
+        existing = "".join(style.text or "" for style in self.svg.xpath("//svg:style"))
+        rules = [
+            f".{name}{{{declarations}}}"
+            for name, declarations in self.css_classes.items()
+            if f".{name}{{" not in existing
+        ]
+        if rules:
+            stylesheet = StyleElement()
+            stylesheet.text = "\n".join(rules)
+            self.svg.defs.add(stylesheet)
+
+    def remove_unused_css_classes(self) -> None:
+        """Drop compact output classes no element uses any more, and the
+        stylesheets left empty, as when updating a compact fretboard without
+        compact output"""
+        used = {
+            name
+            for element in self.svg.xpath("//*[@class]")
+            for name in element.get("class").split()
+        }
+        for style in self.svg.xpath("//svg:style"):
+            rules = (style.text or "").split("\n")
+            if not all(self.CSS_CLASS_RULE.match(rule) for rule in rules):
+                continue
+            kept = [
+                rule for rule in rules if self.CSS_CLASS_RULE.match(rule)[1] in used
+            ]
+            if kept:
+                style.text = "\n".join(kept)
+            else:
+                style.delete()
+
+    def compound_path(
+        self, subpaths: Iterable[np.ndarray], id: str, style: Dict[str, Any]
+    ) -> PathElement:
+        """Single path drawing every subpath (a points array) as a polyline"""
+        path = PathElement()
+        path.set("d", " ".join(f"M {self.points_str(p)}" for p in subpaths))
+        path.set("id", id)
+        path.update(**self.styled(style))
+        return path
+
+    def styled(
+        self, style: Dict[str, Any], presentation: bool = False
+    ) -> Dict[str, Any]:
+        """Attributes styling an element: a class shared through the document
+        stylesheet in compact mode, else inline style or presentation attributes"""
+        if self.options.compact:
+            return {"class": self.css_class(style)}
+        if presentation:
+            return Style(style=style)
+        return {"style": Style(style=style)}
+
+    def css_class(self, style: Dict[str, Any]) -> str:
+        declarations = str(Style(style=style))
+        # named after its content, so boards and runs sharing a style share a class
+        name = f"fretboard-{hashlib.sha1(declarations.encode()).hexdigest()[:8]}"
+        self.css_classes[name] = declarations
+        return name
+
+    def quantize(self, values: np.ndarray) -> np.ndarray:
+        if self.options.compact:
+            return np.round(values, self.options.precision)
+        return values
+
     def set_midline(self) -> int:
-        return 10 * int(self.bridge_width / 10)
+        return midline(self.bridge_width)
 
     def add_midline(self, y) -> int:
         return y + self.midline_y
@@ -549,15 +1247,44 @@ class FretboardExtension(inkex.GenerateExtension):
 
     @staticmethod
     def distance_to_nut(scale: float, n: int) -> float:
-        # d = s – (s / (2 ^ (n / 12)))
-        # d = distance from nut
-        # s = scale length
-        # n = fret number
-        return scale - (scale / (pow(base=2, exp=(n / 12))))
+        return float(distance_to_nut(scale=scale, n=n))
+
+    def points_str(self, points: np.ndarray) -> str:
+        return " ".join([f"{x},{y}" for x, y in self.quantize(points).tolist()])
+
+    @staticmethod
+    def element_count(element) -> int:
+        return sum(1 for _ in element.iter())
 
     def debug_msg(self, msg) -> None:
-        if self.options.debug:
-            self.msg(msg=msg)
+        self.tracer("message", msg=msg)
+
+
+def render_svg(
+    params: Mapping[str, Any], output: BinaryIO, document: Optional[str] = None
+) -> None:
+    """Run the extension headless for params, writing the svg to output"""
+    FretboardExtension().run(
+        args=to_argv(params) + [document or blank_document()], output=output
+    )
+
+
+def prepared_extension(params: Mapping[str, Any]) -> FretboardExtension:
+    """Extension with options parsed and geometry and slots ready, no document
+    loaded: for callers wanting numbers or G-code rather than a drawing"""
+    extension = FretboardExtension()
+    extension.parse_arguments(to_argv(params) + [blank_document()])
+    extension.prepare()
+    return extension
+
+
+def render_gcode(params: Mapping[str, Any]) -> Iterator[str]:
+    """G-code lines of the fret slots of params, whatever its export options,
+    AbortExtension when there are no slots"""
+    extension = prepared_extension(dict(params, ftp_tool_draw=True, ftp_export="svg"))
+    if not extension.slots:
+        raise inkex.AbortExtension("No fret slot toolpaths: tool wider than the slot")
+    return extension.gcode_lines(extension.slots)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+G-code streaming of fret slot toolpaths
+
+Coordinates are millimetres, X and Y as in the drawing with Y pointing up
+(svg y is negated), Z=0 on the top of the fretboard midline. Slot points are
+(x, y) for a flat cut or (x, y, surface z) to follow the fretboard radius.
+"""
+
+from typing import Iterable, Iterator, Tuple
+
+import numpy as np
+
+
+def cut_points(
+    points: np.ndarray, slot_depth: float, ramp_length: float = 0.0
+) -> np.ndarray:
+    """(x, y, z) tool positions cutting points slot_depth deep, the first one
+    being where the plunge ends
+
+    Without ramp_length the tool plunges to full depth. With it, the plunge
+    stops on the surface and the tool goes down a ramp over the first
+    ramp_length of the path, then back at depth to its first point.
+    """
+    if points.shape[1] == 2:
+        points = np.pad(points, ((0, 0), (0, 1)))
+    cut = points - [0, 0, slot_depth]
+    along = np.concatenate(
+        [[0], np.cumsum(np.hypot(*np.diff(points[:, :2], axis=0).T))]
+    )
+    ramp_length = min(ramp_length, along[-1])
+    if ramp_length <= 0:
+        return cut
+    inside = along < ramp_length
+    ramp = np.vstack(
+        [
+            points[inside],
+            [np.interp(ramp_length, along, points[:, i]) for i in range(3)],
+        ]
+    )
+    ramp[:, 2] -= slot_depth * np.append(along[inside], ramp_length) / ramp_length
+    back = ramp[-2::-1].copy()
+    back[:, 2] = cut[inside][::-1, 2]
+    return np.vstack([ramp, back, cut[1:]])
+
+
+def gcode_program(
+    slots: Iterable[Tuple[int, np.ndarray]],
+    feed: float,
+    plunge_feed: float,
+    safe_z: float,
+    slot_depth: float,
+    comments: Iterable[str] = (),
+    ramp_length: float = 0.0,
+    spindle_speed: float = 0.0,
+) -> Iterator[str]:
+    """G-code lines cutting every (fret number, points) slot, one line at a time
+
+    Points are cut slot_depth below their z, or below Z=0 when they have none,
+    entering each slot as cut_points does. The spindle is started clockwise,
+    at spindle_speed rpm when given, and stopped at the end.
+    """
+    yield "(fretboard fret slots)"
+    for comment in comments:
+        yield f"({comment})"
+    yield "G21 G90 G17"
+    yield f"M3 S{spindle_speed:g}" if spindle_speed > 0 else "M3"
+    yield f"G0 Z{safe_z:.4f}"
+    for fret_i, points in slots:
+        (x, y, z), *cut = cut_points(points, slot_depth, ramp_length).tolist()
+        yield f"(fret {fret_i})"
+        yield f"G0 X{x:.4f} Y{-y:.4f}"
+        yield f"G1 Z{z:.4f} F{plunge_feed:g}"
+        yield f"F{feed:g}"
+        for x, y, z in cut:
+            yield f"G1 X{x:.4f} Y{-y:.4f} Z{z:.4f}"
+        yield f"G0 Z{safe_z:.4f}"
+    yield "M5"
+    yield "M2"
+
+
+def write_gcode(path: str, lines: Iterable[str]) -> None:
+    with open(path, "w", encoding="ascii") as gcode:
+        for line in lines:
+            gcode.write(line)
+            gcode.write("\n")
@@ -0,0 +1,550 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Fretboard geometry: fret positions, taper endpoints, strings and slot
+toolpaths computed as numpy arrays, in millimetres
+"""
+
+import math
+from functools import lru_cache
+from typing import Any, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+from fretboard_strings import parse_gauges, string_offsets
+from fretboard_temperament import (
+    Temperament,
+    fret_matrix,
+    fret_ratios,
+    parse_temperament,
+)
+
+FRET_TABLE_CACHE_SIZE = 128
+
+
+def distance_to_nut(
+    scale: float,
+    n: Union[int, np.ndarray],
+    temperament: Union[int, Temperament] = 12,
+) -> Union[float, np.ndarray]:
+    # d = s – (s / r(n))
+    # d = distance from nut
+    # s = scale length
+    # n = fret number, or array of fret numbers
+    # r(n) = frequency ratio of fret n, 2 ^ (n / t) for t equal divisions
+    if isinstance(temperament, int):
+        temperament = Temperament(divisions=temperament)
+    return scale - (scale / fret_ratios(temperament, n))
+
+
+@lru_cache(maxsize=FRET_TABLE_CACHE_SIZE)
+def fret_table(
+    scale: float, frets: int, temperament: Union[int, Temperament] = 12
+) -> np.ndarray:
+    """Distances to nut of frets 0 to frets + 1, computed once per process
+
+    The table is shared by every caller and therefore read-only.
+    """
+    table = distance_to_nut(
+        scale=scale, n=np.arange(frets + 2), temperament=temperament
+    )
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=FRET_TABLE_CACHE_SIZE)
+def fret_string_table(
+    scale: float, frets: int, strings: int, temperament: Temperament
+) -> np.ndarray:
+    """Read-only fret_matrix, computed once per process"""
+    table = fret_matrix(scale, frets, strings, temperament)
+    table.setflags(write=False)
+    return table
+
+
+def midline(bridge_width: float) -> int:
+    return 10 * int(bridge_width / 10)
+
+
+class FretboardGeometry:
+    """Fretboard lying along x, bridge at x=0 and nut at x=scale
+
+    Fret 0 is the nut and fret frets + 1 the end of the fretboard, fret arrays
+    hold frets + 2 items. With a compensated temperament fret_x is the
+    uncompensated position and fret_string_x the one under each string.
+
+    Multiscale (fanned) boards go from bass_scale on string 0 to scale on the
+    last string, perpendicular_fret being the one square to the midline. Frets
+    then run from (fret_x1, fret_y1) to (fret_x2, fret_y2), fret_x being their
+    middle, the longest string bridge is at x=0 and length is the x of the
+    farthest string nut end; widths are taken at x=0 and x=length.
+
+    Strings are spaced center to center, or with string_diameters as
+    string_spacing tells (see fretboard_strings).
+    """
+
+    __slots__ = (
+        "scale",
+        "frets",
+        "strings",
+        "nut_width",
+        "bridge_width",
+        "nut_string_space",
+        "bridge_string_space",
+        "midline_y",
+        "fretboard_angle_tan",
+        "fret_distances",
+        "fret_x",
+        "fret_y1",
+        "fret_y2",
+        "string_lines",
+        "temperament",
+        "fret_string_x",
+        "bass_scale",
+        "perpendicular_fret",
+        "string_scales",
+        "length",
+        "fret_x1",
+        "fret_x2",
+        "bridge_line",
+        "string_diameters",
+        "string_spacing",
+    )
+
+    def __init__(
+        self,
+        scale: float,
+        frets: int,
+        strings: int,
+        nut_width: float,
+        bridge_width: float,
+        nut_string_space: float,
+        bridge_string_space: float,
+        midline_y: float,
+        temperament: Temperament = Temperament(),
+        bass_scale: Optional[float] = None,
+        perpendicular_fret: int = 0,
+        string_diameters: Optional[np.ndarray] = None,
+        string_spacing: str = "center",
+    ) -> None:
+        self.scale = scale
+        self.bass_scale = scale if bass_scale is None or strings < 2 else bass_scale
+        self.perpendicular_fret = min(max(perpendicular_fret, 0), frets + 1)
+        self.frets = frets
+        self.strings = strings
+        self.nut_width = nut_width
+        self.bridge_width = bridge_width
+        self.nut_string_space = nut_string_space
+        self.bridge_string_space = bridge_string_space
+        self.midline_y = midline_y
+        self.temperament = temperament
+        self.string_scales = np.linspace(self.bass_scale, scale, strings)
+        self.string_diameters = string_diameters
+        self.string_spacing = string_spacing
+
+        # x1, y1 on the bridge, x2, y2 on the nut
+        string_i = np.arange(strings)
+        self.string_lines = np.empty((strings, 4))
+        self.string_lines[:, 1] = (
+            midline_y
+            - bridge_string_space * (strings - 1) / 2
+            + bridge_string_space * string_i
+        )
+        self.string_lines[:, 3] = (
+            midline_y
+            - nut_string_space / 2
+            + nut_string_space / max(strings - 1, 1) * string_i
+        )
+        if string_spacing != "center" and string_diameters is not None:
+            self.string_lines[:, 1] = midline_y + string_offsets(
+                bridge_string_space * (strings - 1), string_diameters, string_spacing
+            )
+            self.string_lines[:, 3] = midline_y + string_offsets(
+                nut_string_space, string_diameters, string_spacing
+            )
+
+        uniform = temperament._replace(offsets=())
+        if not self.fanned:
+            self.length = scale
+            self.fretboard_angle_tan = (bridge_width / 2 - nut_width / 2) / scale
+            self.fret_distances = fret_table(
+                scale=scale, frets=frets, temperament=uniform
+            )
+            self.fret_x = scale - self.fret_distances
+            self.fret_x1 = self.fret_x2 = self.fret_x
+            self.fret_y1 = (
+                midline_y - bridge_width / 2 + self.fret_x * self.fretboard_angle_tan
+            )
+            self.fret_y2 = (
+                midline_y + bridge_width / 2 - self.fret_x * self.fretboard_angle_tan
+            )
+            self.bridge_line = np.array(
+                [
+                    (0, midline_y - bridge_width / 2),
+                    (0, midline_y + bridge_width / 2),
+                ]
+            )
+            self.string_lines[:, 0] = 0
+            self.string_lines[:, 2] = scale
+            self.fret_string_x = scale - fret_string_table(
+                scale, frets, strings, temperament
+            )
+            return
+
+        unit = fret_table(scale=1.0, frets=frets, temperament=uniform)
+        perpendicular_unit = unit[self.perpendicular_fret]
+        nut_x = (
+            np.max(self.string_scales * (1 - perpendicular_unit))
+            + self.string_scales * perpendicular_unit
+        )
+        self.length = float(np.max(nut_x))
+        self.fretboard_angle_tan = (bridge_width / 2 - nut_width / 2) / self.length
+        self.string_lines[:, 0] = nut_x - self.string_scales
+        self.string_lines[:, 2] = nut_x
+        self.fret_string_x = nut_x - self.string_scales * fret_string_table(
+            1.0, frets, strings, temperament
+        )
+
+        # every fret, then the bridge, through the outer strings
+        rows = np.append(unit, 1.0)[:, np.newaxis]
+        outer_x = nut_x[[0, -1]] - self.string_scales[[0, -1]] * rows
+        x1, y1, x2, y2 = self.edge_intersections(
+            outer_x[:, 0],
+            self.string_y(0, outer_x[:, 0]),
+            outer_x[:, 1],
+            self.string_y(-1, outer_x[:, 1]),
+        )
+        self.fret_x1, self.fret_y1 = x1[:-1], y1[:-1]
+        self.fret_x2, self.fret_y2 = x2[:-1], y2[:-1]
+        self.fret_x = (self.fret_x1 + self.fret_x2) / 2
+        self.fret_distances = self.length - self.fret_x
+        self.bridge_line = np.array([(x1[-1], y1[-1]), (x2[-1], y2[-1])])
+
+    @property
+    def fanned(self) -> bool:
+        return self.bass_scale != self.scale
+
+    def string_y(self, string_i: Union[int, np.ndarray], x: np.ndarray) -> np.ndarray:
+        """y of strings at x"""
+        x1, y1, x2, y2 = self.string_lines[string_i].T
+        return y1 + (y2 - y1) * (x - x1) / (x2 - x1)
+
+    def edge_intersections(
+        self, xa: np.ndarray, ya: np.ndarray, xb: np.ndarray, yb: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Ends x1, y1, x2, y2 on the outline of lines through (xa, ya), (xb, yb)"""
+        # x = xa + k (y - ya) along the line, y = c -/+ x tan along the edges
+        k = (xb - xa) / (yb - ya)
+        tan = self.fretboard_angle_tan
+        x_at_y0 = xa - k * ya
+        y1 = (self.midline_y - self.bridge_width / 2 + tan * x_at_y0) / (1 - tan * k)
+        y2 = (self.midline_y + self.bridge_width / 2 - tan * x_at_y0) / (1 + tan * k)
+        return x_at_y0 + k * y1, y1, x_at_y0 + k * y2, y2
+
+    @classmethod
+    def from_params(cls, params: Mapping[str, Any]) -> "FretboardGeometry":
+        """Geometry of extension parameters already converted to millimetres
+
+        Raises ValueError on an invalid temperament. Strings spaced by gap
+        fall back to center spacing without valid gauges.
+        """
+        bridge_width = params["bridge_width"]
+        # the midline follows the bridge width given, even when recomputed
+        midline_y = midline(bridge_width)
+        if params["ignore_bridge_width"]:
+            bridge_width = (
+                params["bridge_string_space"] * (params["strings"] - 1)
+                + params["nut_width"]
+                - params["nut_string_space"]
+            )
+        diameters = None
+        if params.get("strings_spacing", "center") != "center" and not params.get(
+            "ignore_custom_width"
+        ):
+            try:
+                diameters = parse_gauges(
+                    params["strings_gauges"], params["strings"]
+                ).diameters
+            except ValueError:
+                pass
+        return cls(
+            scale=params["scale"],
+            frets=params["frets"],
+            strings=params["strings"],
+            nut_width=params["nut_width"],
+            bridge_width=bridge_width,
+            nut_string_space=params["nut_string_space"],
+            bridge_string_space=params["bridge_string_space"],
+            midline_y=midline_y,
+            temperament=parse_temperament(
+                params.get("temperament", ""), params.get("temperament_offsets", "")
+            ),
+            bass_scale=params["bass_scale"] if params.get("multiscale") else None,
+            perpendicular_fret=params.get("perpendicular_fret", 0),
+            string_diameters=diameters,
+            string_spacing=params.get("strings_spacing", "center"),
+        )
+
+    @property
+    def scale_outline(self) -> np.ndarray:
+        """Bridge to nut trapezoid, shape (4, 2)"""
+        if self.fanned:
+            return np.array(
+                [
+                    self.bridge_line[0],
+                    (self.fret_x1[0], self.fret_y1[0]),
+                    (self.fret_x2[0], self.fret_y2[0]),
+                    self.bridge_line[1],
+                ]
+            )
+        return np.array(
+            [
+                (0, self.midline_y - self.bridge_width / 2),
+                (self.scale, self.midline_y - self.nut_width / 2),
+                (self.scale, self.midline_y + self.nut_width / 2),
+                (0, self.midline_y + self.bridge_width / 2),
+            ]
+        )
+
+    @property
+    def outline(self) -> np.ndarray:
+        """Fretboard outline, from its end to the nut, shape (4, 2)"""
+        if self.fanned:
+            return np.array(
+                [
+                    (self.fret_x1[-1], self.fret_y1[-1]),
+                    (self.fret_x1[0], self.fret_y1[0]),
+                    (self.fret_x2[0], self.fret_y2[0]),
+                    (self.fret_x2[-1], self.fret_y2[-1]),
+                ]
+            )
+        return np.array(
+            [
+                (self.fret_x[-1], self.fret_y1[-1]),
+                (self.scale, self.midline_y - self.nut_width / 2),
+                (self.scale, self.midline_y + self.nut_width / 2),
+                (self.fret_x[-1], self.fret_y2[-1]),
+            ]
+        )
+
+    @property
+    def fret_segments(self) -> np.ndarray:
+        """Fret lines, from y1 to y2, shape (frets + 2, 2, 2)"""
+        return np.stack(
+            [
+                np.stack([self.fret_x1, self.fret_y1], axis=-1),
+                np.stack([self.fret_x2, self.fret_y2], axis=-1),
+            ],
+            axis=1,
+        )
+
+    @property
+    def pass_points(self) -> int:
+        """Points of a fret line, and of each slot pass"""
+        return self.strings + 2 if self.temperament.compensated else 2
+
+    @property
+    def fret_lines(self) -> np.ndarray:
+        """Fret lines from y1 to y2, shape (frets + 2, pass_points, 2)
+
+        fret_segments, or with a compensated temperament one segment per
+        string: the line goes through every string at its own position and
+        ends on the outline, moved along x as much as the outer strings.
+        """
+        if not self.temperament.compensated:
+            return self.fret_segments
+        x = self.fret_string_x
+        uncompensated_x = (
+            self.string_lines[:, 2]
+            - self.string_scales
+            * fret_table(
+                scale=1.0,
+                frets=self.frets,
+                temperament=self.temperament._replace(offsets=()),
+            )[:, np.newaxis]
+        )
+        lines = np.empty((self.frets + 2, self.strings + 2, 2))
+        lines[:, 1:-1, 0] = x
+        lines[:, 1:-1, 1] = self.string_y(np.arange(self.strings), x)
+        lines[:, 0, 0] = self.fret_x1 + x[:, 0] - uncompensated_x[:, 0]
+        lines[:, 0, 1] = (
+            self.midline_y
+            - self.bridge_width / 2
+            + lines[:, 0, 0] * self.fretboard_angle_tan
+        )
+        lines[:, -1, 0] = self.fret_x2 + x[:, -1] - uncompensated_x[:, -1]
+        lines[:, -1, 1] = (
+            self.midline_y
+            + self.bridge_width / 2
+            - lines[:, -1, 0] * self.fretboard_angle_tan
+        )
+        return lines
+
+    @staticmethod
+    def slot_pass_count(
+        tool_diameter: float, tool_stepover: float, slot_width: float
+    ) -> int:
+        # 1 full pass min + remaining / cutting width
+        return math.ceil(
+            1 + (slot_width - tool_diameter) / (tool_diameter * tool_stepover / 100)
+        )
+
+    @staticmethod
+    def slot_pass_offsets(
+        tool_diameter: float, tool_stepover: float, slot_width: float
+    ) -> np.ndarray:
+        """Tool centre of the fixed stepover passes, from the fret line towards
+        the nut: from the bridge side wall by stepover, the last one clamped on
+        the nut side wall"""
+        passes = FretboardGeometry.slot_pass_count(
+            tool_diameter, tool_stepover, slot_width
+        )
+        offsets = -slot_width / 2 + tool_diameter * tool_stepover / 100 * np.arange(
+            1, passes + 1
+        )
+        offsets[0] = -slot_width / 2 + tool_diameter / 2
+        return np.minimum(offsets, slot_width / 2 - tool_diameter / 2)
+
+    def slot_pass_lines(
+        self, offsets: np.ndarray, tool_diameter: float, slot_margin: float
+    ) -> np.ndarray:
+        """Passes of every real fret slot with their tool centre offsets from
+        the fret line towards the nut, each from y1 to y2,
+        shape (frets, passes, pass_points, 2)
+
+        Fanned slots step over square to their fret, compensated ones follow
+        their fret line string by string.
+        """
+        offsets = np.asarray(offsets, dtype=float)
+        if self.temperament.compensated or self.fanned:
+            segments = self.fret_segments[1:-1]
+            along = segments[:, 1] - segments[:, 0]
+            along /= np.linalg.norm(along, axis=-1, keepdims=True)
+            # towards the nut, (1, 0) for a square fret
+            normal = np.stack([along[:, 1], -along[:, 0]], axis=-1)
+            lines = self.fret_lines[1:-1].copy()
+            lines[:, 0] += along * (slot_margin + tool_diameter / 2)
+            lines[:, -1] -= along * (slot_margin + tool_diameter / 2)
+            return (
+                lines[:, np.newaxis]
+                + offsets[np.newaxis, :, np.newaxis, np.newaxis]
+                * normal[:, np.newaxis, np.newaxis]
+            )
+
+        points = np.empty((self.frets, len(offsets), 2, 2))
+        points[..., 0] = (
+            self.fret_x[1:-1, np.newaxis, np.newaxis] + offsets[:, np.newaxis]
+        )
+        points[..., 1] = np.stack(
+            [
+                self.fret_y1[1:-1] + slot_margin + tool_diameter / 2,
+                self.fret_y2[1:-1] - slot_margin - tool_diameter / 2,
+            ],
+            axis=-1,
+        )[:, np.newaxis, :]
+        return points
+
+    def slot_passes(
+        self,
+        tool_diameter: float,
+        tool_stepover: float,
+        slot_width: float,
+        slot_margin: float,
+    ) -> np.ndarray:
+        """Fixed stepover toolpath points of every real fret slot,
+        shape (frets, pass_points * passes, 2)
+
+        Passes step over from the bridge side of the slot by tool_stepover
+        and go back and forth along it, the last one is clamped on the nut
+        side of the slot.
+        """
+        points = self.slot_pass_lines(
+            self.slot_pass_offsets(tool_diameter, tool_stepover, slot_width),
+            tool_diameter=tool_diameter,
+            slot_margin=slot_margin,
+        )
+        points[:, 1::2] = points[:, 1::2, ::-1]
+        return points.reshape(self.frets, -1, 2)
+
+    def radius_at(
+        self, x: Union[float, np.ndarray], nut_radius: float, bridge_radius: float
+    ) -> Union[float, np.ndarray]:
+        """Conical compound radius, bridge_radius at x=0 and nut_radius at x=length"""
+        return (
+            bridge_radius + (nut_radius - bridge_radius) * np.asarray(x) / self.length
+        )
+
+    def surface_z(
+        self,
+        x: Union[float, np.ndarray],
+        y: Union[float, np.ndarray],
+        nut_radius: float,
+        bridge_radius: float,
+    ) -> Union[float, np.ndarray]:
+        """Height of the radiused top at (x, y), 0 along the midline"""
+        radius = self.radius_at(x, nut_radius, bridge_radius)
+        offset = np.asarray(y) - self.midline_y
+        if np.any(np.abs(offset) > radius):
+            raise ValueError("fretboard radius smaller than its half width")
+        return np.sqrt(radius**2 - offset**2) - radius
+
+    def radiused_passes(
+        self,
+        slot_passes: np.ndarray,
+        nut_radius: float,
+        bridge_radius: float,
+        chord_tolerance: float,
+    ) -> np.ndarray:
+        """slot_passes sampled along the radiused top, shape (frets, points, 3)
+
+        Each segment of a pass is split in arcs of equal angle, as many for
+        every segment, so that no chord strays more than chord_tolerance from
+        the surface.
+        """
+        frets = slot_passes.shape[0]
+        vertices = slot_passes.reshape(frets, -1, self.pass_points, 2)
+        radius = self.radius_at(vertices[..., 0], nut_radius, bridge_radius)
+        sines = (vertices[..., 1] - self.midline_y) / radius
+        if np.any(np.abs(sines) > 1):
+            raise ValueError("fretboard radius smaller than its half width")
+        angles = np.arcsin(sines)
+        max_angle = 2 * np.arccos(np.clip(1 - chord_tolerance / radius, -1, 1))
+        spans = np.diff(angles, axis=-1)
+        segments = max(
+            1,
+            math.ceil(
+                np.max(
+                    np.abs(spans) / np.minimum(max_angle[..., :-1], max_angle[..., 1:])
+                )
+            ),
+        )
+
+        # (frets, passes, pass segments, segments + 1)
+        t = np.linspace(0, 1, segments + 1)
+        alpha = angles[..., :-1, np.newaxis] + spans[..., np.newaxis] * t
+        x = (
+            vertices[..., :-1, 0, np.newaxis]
+            + np.diff(vertices[..., 0], axis=-1)[..., np.newaxis] * t
+        )
+        radius = self.radius_at(x, nut_radius, bridge_radius)
+        points = np.empty(alpha.shape + (3,))
+        points[..., 0] = x
+        points[..., 1] = self.midline_y + radius * np.sin(alpha)
+        points[..., 2] = radius * (np.cos(alpha) - 1)
+        # segments share their ends
+        points = np.concatenate(
+            [
+                points[..., :-1, :].reshape(frets, -1, segments * (alpha.shape[2]), 3),
+                points[:, :, -1:, -1],
+            ],
+            axis=2,
+        )
+        return points.reshape(frets, -1, 3)
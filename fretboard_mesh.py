@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Fretboard solid as a triangle mesh: the radiused top with the fret slots cut
+to depth, flat bottom, edges and ends, streamed to binary STL or OBJ
+
+Coordinates are the G-code ones: millimetres, Y pointing up (svg y negated),
+Z=0 on the top of the fretboard midline, the bottom at -thickness.
+
+The top is a grid of rows, lines from edge to edge interpolated between fret
+lines (polylines on compensated boards), and of columns spread along each
+row. Columns are as close as the chord tolerance allows across the smallest
+radius, rows as close as it allows along the compound radius: a cylinder
+needs a row per fret interval, a steep compound radius more. A slot adds
+four rows, the surface and the slot floor on each of its walls; on fanned
+boards the slot width is exact at the middle of the fret.
+"""
+
+import math
+import struct
+from typing import Any, BinaryIO, Iterator, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from fretboard_geometry import FretboardGeometry
+
+MESH_FORMATS = ("stl", "obj")
+# vertices computed at once: bounds memory whatever the resolution
+CHUNK_VERTICES = 1 << 16
+STL_TRIANGLE = np.dtype(
+    [("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attributes", "<u2")]
+)
+
+# first vertex index, vertices, triangles (global vertex indexes)
+MeshChunk = Tuple[int, np.ndarray, np.ndarray]
+
+
+class MeshRows(NamedTuple):
+    interval: np.ndarray  # fret line the row is interpolated from
+    s: np.ndarray  # 0 on that fret line, 1 on the next one
+    depth: np.ndarray  # below the surface, on slot floors
+    wall: np.ndarray  # row pairs on one station, shape (rows - 1,)
+
+
+class FretboardMesh:
+    """Grid of the fretboard solid, each row holding its top vertices then the
+    two bottom corners"""
+
+    __slots__ = (
+        "geometry",
+        "nut_radius",
+        "bridge_radius",
+        "thickness",
+        "columns",
+        "rows",
+    )
+
+    def __init__(
+        self,
+        geometry: FretboardGeometry,
+        nut_radius: float,
+        bridge_radius: float,
+        thickness: float,
+        slot_width: float,
+        slot_depth: float,
+        chord_tolerance: float,
+        max_edge: Optional[float] = None,
+    ) -> None:
+        """Raises ValueError when the radius is smaller than the half width or
+        slots are wider than the fret spacing"""
+        self.geometry = geometry
+        self.nut_radius = nut_radius
+        self.bridge_radius = bridge_radius
+        self.thickness = thickness
+
+        half_width = float(np.max(np.abs(geometry.outline[:, 1] - geometry.midline_y)))
+        radius = min(nut_radius, bridge_radius)
+        if half_width >= radius:
+            raise ValueError("fretboard radius smaller than its half width")
+        steepness = (radius**2 - half_width**2) ** 1.5
+
+        # across: chord of the smallest radius, projected at the steepest edge
+        chord = (
+            2
+            * math.sqrt(chord_tolerance * (2 * radius - chord_tolerance))
+            * math.sqrt(1 - (half_width / radius) ** 2)
+        )
+        lines = geometry.fret_lines
+        segments = np.hypot(*np.diff(lines, axis=1).T)
+        self.columns = max(
+            1, math.ceil(np.max(segments) / min(chord, max_edge or chord))
+        )
+
+        # along: curvature of the compound radius and of the taper across it
+        slope = (nut_radius - bridge_radius) / geometry.length
+        curvature = (
+            slope**2 * half_width**2 + radius**2 * geometry.fretboard_angle_tan**2
+        ) / steepness
+        step = math.sqrt(8 * chord_tolerance / curvature) if curvature else math.inf
+        step = min(step, max_edge or step)
+
+        self.rows = self.mesh_rows(
+            lengths=np.max(lines[:-1, :, 0] - lines[1:, :, 0], axis=1),
+            gaps=geometry.fret_x[:-1] - geometry.fret_x[1:],
+            step=step,
+            slot_width=slot_width,
+            slot_depth=slot_depth,
+        )
+
+    @classmethod
+    def from_params(
+        cls, params: Mapping[str, Any], max_edge: Optional[float] = None
+    ) -> "FretboardMesh":
+        """Mesh of extension parameters already converted to millimetres"""
+        return cls(
+            FretboardGeometry.from_params(params),
+            nut_radius=params["nut_radius"],
+            bridge_radius=params["bridge_radius"],
+            thickness=params["fretboard_thickness"],
+            slot_width=params["ftp_slot_width"],
+            slot_depth=params["ftp_slot_depth"],
+            chord_tolerance=params["ftp_chord_tolerance"],
+            max_edge=max_edge,
+        )
+
+    def mesh_rows(
+        self,
+        lengths: np.ndarray,
+        gaps: np.ndarray,
+        step: float,
+        slot_width: float,
+        slot_depth: float,
+    ) -> MeshRows:
+        """Rows of every fret interval, nut first, slot walls in between"""
+        frets = self.geometry.frets
+        slotted = slot_width > 0 and slot_depth > 0
+        half = slot_width / 2 / gaps if slotted else np.zeros_like(gaps)
+        starts = np.where(np.arange(frets + 1) > 0, half, 0.0)
+        ends = np.where(np.arange(frets + 1) < frets, 1 - half, 1.0)
+        if np.any(starts >= ends):
+            raise ValueError("fret slots wider than the fret spacing")
+
+        interval, s, depth = [], [], []
+        for fret_i in range(frets + 1):
+            count = max(
+                1, math.ceil(lengths[fret_i] * (ends[fret_i] - starts[fret_i]) / step)
+            )
+            surface = np.linspace(starts[fret_i], ends[fret_i], count + 1)
+            if not slotted and fret_i < frets:
+                # the next interval starts on this one end
+                surface = surface[:-1]
+            interval.append(np.full(len(surface), fret_i))
+            s.append(surface)
+            depth.append(np.zeros(len(surface)))
+            if slotted and fret_i < frets:
+                interval.append(np.array([fret_i, fret_i + 1]))
+                s.append(np.array([ends[fret_i], starts[fret_i + 1]]))
+                depth.append(np.full(2, slot_depth))
+        interval, s = np.concatenate(interval), np.concatenate(s)
+        return MeshRows(
+            interval=interval,
+            s=s,
+            depth=np.concatenate(depth),
+            wall=(interval[1:] == interval[:-1]) & (s[1:] == s[:-1]),
+        )
+
+    @property
+    def row_vertices(self) -> int:
+        return self.columns * (self.geometry.pass_points - 1) + 3
+
+    @property
+    def vertices(self) -> int:
+        return len(self.rows.s) * self.row_vertices
+
+    @property
+    def triangles(self) -> int:
+        top = self.row_vertices - 3
+        wall, floor_before, floor_after = self.edge_splits()
+        solid = np.count_nonzero(~wall)
+        splits = np.count_nonzero(floor_before[~wall]) + np.count_nonzero(
+            floor_after[~wall]
+        )
+        # top, edges and bottom, fanned ends
+        return int(2 * top * len(wall) + 6 * solid + 2 * splits + 2 * (top + 1))
+
+    def edge_splits(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """For every row pair: whether it is a wall, whether the row before its
+        first one is a slot floor under it, and whether the row after its last
+        one is a slot floor under it; edge faces then go through that floor
+        corner, which keeps the solid watertight"""
+        wall, depth = self.rows.wall, self.rows.depth
+        under = np.append(depth[:-1] > depth[1:], False)
+        floor_before = np.insert(wall & under[:-1], 0, False)[:-1]
+        floor_after = np.append(wall[1:] & ~under[1:-1], False)
+        return wall, floor_before, floor_after
+
+    def chunks(self, rows: Optional[int] = None) -> Iterator[MeshChunk]:
+        """Vertices and triangles, rows at a time: each chunk holds the vertices
+        of its rows and of the rows on either side"""
+        rows = rows or max(1, CHUNK_VERTICES // self.row_vertices)
+        total = len(self.rows.s)
+        first = 0
+        while True:
+            last = min(first + rows, total - 1)
+            yield self.chunk(first, last)
+            if last == total - 1:
+                return
+            first = last
+
+    def chunk(self, first: int, last: int) -> MeshChunk:
+        """Vertices of rows first - 1 to last + 1 and the triangles of the row
+        pairs between first and last"""
+        low, high = max(first - 1, 0), min(last + 1, len(self.rows.s) - 1)
+        interval = self.rows.interval[low : high + 1]
+        lines = self.geometry.fret_lines
+        a, b = lines[interval], lines[interval + 1]
+        stations = a + (b - a) * self.rows.s[low : high + 1, np.newaxis, np.newaxis]
+        t = np.linspace(0, 1, self.columns, endpoint=False)
+        top = np.concatenate(
+            [
+                (
+                    stations[:, :-1, np.newaxis, :]
+                    + np.diff(stations, axis=1)[:, :, np.newaxis, :] * t[:, np.newaxis]
+                ).reshape(len(stations), -1, 2),
+                stations[:, -1:, :],
+            ],
+            axis=1,
+        )
+        width = self.row_vertices
+        vertices = np.empty((len(stations), width, 3))
+        vertices[:, :-2, :2] = top
+        vertices[:, :-2, 2] = (
+            self.geometry.surface_z(
+                top[..., 0], top[..., 1], self.nut_radius, self.bridge_radius
+            )
+            - self.rows.depth[low : high + 1, np.newaxis]
+        )
+        vertices[:, -2:, :2] = top[:, [0, -1]]
+        vertices[:, -2:, 2] = -self.thickness
+        # machine coordinates, Y up
+        vertices[..., 1] *= -1
+
+        wall, floor_before, floor_after = (
+            splits[first:last] for splits in self.edge_splits()
+        )
+        pair = np.arange(first, last)
+        columns = width - 3
+        j = np.arange(columns)
+        a, b = (pair[:, np.newaxis] * width + j, (pair[:, np.newaxis] + 1) * width + j)
+        faces = [
+            np.stack([a, b + 1, b], axis=-1).reshape(-1, 3),
+            np.stack([a, a + 1, b + 1], axis=-1).reshape(-1, 3),
+        ]
+        # floor rows after a wall stand on the corners of the row before it
+        bottom_row = np.arange(first - 1, last + 2)
+        after_wall = (bottom_row >= 1) & (bottom_row < len(self.rows.s))
+        after_wall[after_wall] = self.rows.wall[bottom_row[after_wall] - 1]
+        bottom_row[after_wall] -= 1
+        solid = ~wall
+        pair, floor_before, floor_after = (
+            pair[solid],
+            floor_before[solid],
+            floor_after[solid],
+        )
+        row_a, row_b = bottom_row[pair - first + 1], bottom_row[pair - first + 2]
+        for corner, top_j, reverse in ((0, 0, False), (1, columns, True)):
+            faces.append(
+                self.edge_faces(
+                    a_top=pair * width + top_j,
+                    b_top=(pair + 1) * width + top_j,
+                    a_bottom=row_a * width + width - 2 + corner,
+                    b_bottom=row_b * width + width - 2 + corner,
+                    floor_before=floor_before,
+                    floor_after=floor_after,
+                    reverse=reverse,
+                )
+            )
+        bottom_a, bottom_b = row_a * width + width - 2, row_b * width + width - 2
+        faces.append(np.column_stack([bottom_a, bottom_b, bottom_b + 1]))
+        faces.append(np.column_stack([bottom_a, bottom_b + 1, bottom_a + 1]))
+        if first == 0:
+            faces.append(self.end_cap(0, reverse=False))
+        if last == len(self.rows.s) - 1:
+            faces.append(self.end_cap(last * width, reverse=True))
+        faces = np.concatenate(faces)
+        # Y flipped: clockwise in drawing coordinates is counterclockwise
+        return low * width, vertices.reshape(-1, 3), faces[:, [0, 2, 1]]
+
+    def edge_faces(
+        self,
+        a_top: np.ndarray,
+        b_top: np.ndarray,
+        a_bottom: np.ndarray,
+        b_bottom: np.ndarray,
+        floor_before: np.ndarray,
+        floor_after: np.ndarray,
+        reverse: bool,
+    ) -> np.ndarray:
+        """Edge quads of row pairs, split at the slot floor corners on their
+        vertical sides"""
+        width = self.row_vertices
+        floor_a, floor_b = a_top - width, b_top + width
+        faces = np.concatenate(
+            [
+                np.column_stack([a_top, b_top, b_bottom])[~floor_after],
+                np.column_stack([a_top, b_top, floor_b])[floor_after],
+                np.column_stack([a_top, floor_b, b_bottom])[floor_after],
+                np.column_stack([a_top, b_bottom, a_bottom])[~floor_before],
+                np.column_stack([b_bottom, a_bottom, floor_a])[floor_before],
+                np.column_stack([b_bottom, floor_a, a_top])[floor_before],
+            ]
+        )
+        return faces[:, ::-1] if reverse else faces
+
+    def end_cap(self, row: int, reverse: bool) -> np.ndarray:
+        """Triangle fan from the y1 bottom corner, the section being convex"""
+        top_vertices = self.row_vertices - 2
+        corner = row + top_vertices
+        j = row + np.arange(top_vertices - 1)
+        fan = np.column_stack([np.full(len(j), corner), j + 1, j])
+        fan = np.vstack([fan, [corner, corner + 1, row + top_vertices - 1]])
+        return fan[:, ::-1] if reverse else fan
+
+
+def write_stl(output: BinaryIO, mesh: FretboardMesh) -> None:
+    """Binary STL, a chunk of triangles at a time"""
+    output.write(b"fretboard_extension binary STL, millimetres".ljust(80))
+    output.write(struct.pack("<I", mesh.triangles))
+    for first, vertices, faces in mesh.chunks():
+        corners = vertices[faces - first]
+        normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        triangles = np.zeros(len(faces), dtype=STL_TRIANGLE)
+        triangles["normal"] = np.divide(
+            normals, lengths, out=np.zeros_like(normals), where=lengths > 0
+        )
+        triangles["vertices"] = corners
+        output.write(triangles.tobytes())
+
+
+def write_obj(output: BinaryIO, mesh: FretboardMesh) -> None:
+    """Wavefront OBJ, vertices and faces of a chunk at a time"""
+    output.write(b"# fretboard_extension mesh, millimetres\n")
+    written = 0
+    for first, vertices, faces in mesh.chunks():
+        output.write(obj_lines("v %.4f %.4f %.4f\n", vertices[written - first :]))
+        written = first + len(vertices)
+        output.write(obj_lines("f %d %d %d\n", faces + 1))
+
+
+def obj_lines(line: str, values: np.ndarray) -> bytes:
+    # one formatting for the whole chunk, far faster than line by line
+    return ((line * len(values)) % tuple(values.ravel().tolist())).encode("ascii")
+
+
+def write_mesh(output: BinaryIO, mesh: FretboardMesh, format: str = "stl") -> None:
+    if format not in MESH_FORMATS:
+        raise ValueError(f"unknown mesh format {format}")
+    (write_stl if format == "stl" else write_obj)(output, mesh)
@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Sheet nesting: many fretboards and their fret slots on one fixture, one CNC run
+
+    python fretboard_nest.py boards.csv --sheet-width 1300 --sheet-height 600 \
+        --output sheet.svg --gcode sheet.ngc --dxf sheet.dxf
+    python fretboard_nest.py --copies 8 --frets=22 --output sheet.svg
+
+Boards are a manifest (as fretboard_batch.py reads them) and/or --copies of
+each row, `--name=value` arguments applying to every board. Footprints are
+the fretboard outline bounding boxes, packed in shelves (first fit,
+decreasing height): O(n log n) sort plus one pass over the shelves per board.
+The sheet document holds every board fretboard group (side views and params
+reminders are left out), streamed to the file part by part. The G-code
+program cuts every slot, boards taken shelf by shelf in serpentine order and
+slots nearest first within each one. Tool diameter, pass planner options,
+feeds, spindle speed, safe Z, slot depth and ramp are shared: boards
+differing on them are refused. The DXF file holds the outlines, fret tangs
+and strings of every board, and the slot toolpaths of boards drawing them,
+streamed a board at a time.
+"""
+
+import argparse
+import math
+import sys
+import time
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+from lxml import etree
+
+from fretboard_batch import read_manifest
+from fretboard_cli import parse_params
+from fretboard_dxf import Entity, board_entities, dxf_lines, write_dxf
+from fretboard_gcode import gcode_program, write_gcode
+from fretboard_geometry import FretboardGeometry
+from fretboard_params import normalize_units, typed_params
+from fretboard_toolpaths import Slot, order_slots, plan_slots, toolpath_stats
+
+SVG_NS = "http://www.w3.org/2000/svg"
+INKSCAPE_NS = "http://www.inkscape.org/namespaces/inkscape"
+NSMAP = {None: SVG_NS, "inkscape": INKSCAPE_NS}
+# parameters of the whole sheet G-code program: one tool, one pass plan
+MACHINING_PARAMS = (
+    "ftp_tool_diameter",
+    "ftp_passes",
+    "ftp_tool_stepover",
+    "ftp_scallop",
+    "ftp_finish_allowance",
+    "ftp_direction",
+    "ftp_feed",
+    "ftp_plunge_feed",
+    "ftp_rapid_feed",
+    "ftp_spindle_speed",
+    "ftp_safe_z",
+    "ftp_slot_depth",
+    "ftp_ramp_length",
+)
+
+
+class Placement(NamedTuple):
+    board: int
+    shelf: int
+    x: float
+    y: float
+
+
+class Board(NamedTuple):
+    name: str
+    params: Dict[str, Any]
+    geometry: FretboardGeometry
+    slots: List[Slot]
+
+    @property
+    def bounds(self) -> np.ndarray:
+        """Outline and slots bounding box, ((x min, y min), (x max, y max))"""
+        points = np.concatenate(
+            [self.geometry.outline] + [points[:, :2] for _, points in self.slots]
+        )
+        return np.array([points.min(axis=0), points.max(axis=0)])
+
+
+def board(name: str, params: Dict[str, Any]) -> Board:
+    """Geometry and slots of a parameter set"""
+    mm_params = normalize_units(typed_params(params))
+    geometry = FretboardGeometry.from_params(mm_params)
+    slots = plan_slots(
+        geometry,
+        mm_params,
+        warn=lambda message: print(f"{name}: {message}", file=sys.stderr),
+    )
+    return Board(name, params, geometry, slots)
+
+
+def shelf_pack(
+    sizes: np.ndarray, sheet_width: float, sheet_height: float, spacing: float
+) -> List[Optional[Placement]]:
+    """Positions of (width, height) rectangles, None for those left out"""
+    placements: List[Optional[Placement]] = [None] * len(sizes)
+    # shelf: y, height, used width
+    shelves: List[List[float]] = []
+    for board_i in np.argsort(-sizes[:, 1], kind="stable").tolist():
+        width, height = sizes[board_i].tolist()
+        if width > sheet_width:
+            continue
+        for shelf_i, shelf in enumerate(shelves):
+            if shelf[2] + width <= sheet_width:
+                break
+        else:
+            y = shelves[-1][0] + shelves[-1][1] + spacing if shelves else 0.0
+            if y + height > sheet_height:
+                continue
+            shelves.append([y, height, 0.0])
+            shelf_i, shelf = len(shelves) - 1, shelves[-1]
+        placements[board_i] = Placement(board_i, shelf_i, shelf[2], shelf[0])
+        shelf[2] += width + spacing
+    return placements
+
+
+def machining_order(placements: Sequence[Placement]) -> List[Placement]:
+    """Shelf by shelf, left to right then right to left"""
+    return sorted(
+        placements, key=lambda p: (p.shelf, p.x if p.shelf % 2 == 0 else -p.x)
+    )
+
+
+def sheet_slots(
+    boards: Sequence[Board], placements: Sequence[Placement]
+) -> Iterator[Slot]:
+    """Every board slot moved to its place, in machining order, a board at a time"""
+    position = np.zeros(2)
+    for placement in machining_order(placements):
+        offset = (
+            np.array([placement.x, placement.y]) - boards[placement.board].bounds[0]
+        )
+        moved = []
+        for fret_i, points in boards[placement.board].slots:
+            points = points.copy()
+            points[:, :2] += offset
+            moved.append((fret_i, points))
+        moved = order_slots(moved, start=position)
+        if moved:
+            position = moved[-1][1][-1, :2]
+        yield from moved
+
+
+def sheet_entities(
+    boards: Sequence[Board], placements: Sequence[Placement]
+) -> Iterator[Entity]:
+    """Every board DXF entities moved to its place, a board at a time"""
+    # copies share their parameters, typed once
+    tool_draw: Dict[Tuple[Tuple[str, Any], ...], bool] = {}
+    for placement in placements:
+        board = boards[placement.board]
+        key = params_key(board.params)
+        if key not in tool_draw:
+            tool_draw[key] = typed_params(board.params)["ftp_tool_draw"]
+        yield from board_entities(
+            board.geometry,
+            board.slots if tool_draw[key] else (),
+            offset=np.array([placement.x, placement.y]) - board.bounds[0],
+        )
+
+
+def write_sheet(
+    output: BinaryIO,
+    boards: Sequence[Board],
+    placements: Sequence[Placement],
+    sheet_width: float,
+    sheet_height: float,
+) -> None:
+    """Stream the sheet svg: every board is drawn and written part by part, so
+    memory does not grow with the number of boards or toolpath passes"""
+    from fretboard_extension import prepared_extension
+
+    # copies share their extension, parameters being drawn the same way
+    extensions: Dict[Tuple[Tuple[str, Any], ...], Any] = {}
+    with etree.xmlfile(output, encoding="utf-8") as xf:
+        xf.write_declaration()
+        with xf.element(
+            f"{{{SVG_NS}}}svg",
+            {
+                "width": f"{sheet_width}mm",
+                "height": f"{sheet_height}mm",
+                "viewBox": f"0 0 {sheet_width} {sheet_height}",
+            },
+            nsmap=NSMAP,
+        ):
+            xf.write(
+                etree.Element(
+                    f"{{{SVG_NS}}}rect",
+                    id="sheet",
+                    x="0",
+                    y="0",
+                    width=str(sheet_width),
+                    height=str(sheet_height),
+                    style="fill:none;stroke:#0000ff;stroke-width:0.2",
+                    nsmap=NSMAP,
+                )
+            )
+            for placement in placements:
+                board = boards[placement.board]
+                key = params_key(board.params)
+                if key not in extensions:
+                    extensions[key] = prepared_extension(
+                        dict(board.params, draw_profile=False, ftp_export="svg")
+                    )
+                x, y = np.array([placement.x, placement.y]) - board.bounds[0]
+                extensions[key].write_fretboard(
+                    xf,
+                    id_prefix=f"b{placement.board + 1}_",
+                    id=f"board_{placement.board + 1}",
+                    transform=f"translate({x},{y})",
+                    **{f"{{{INKSCAPE_NS}}}label": board.name},
+                )
+                xf.flush()
+            # compact mode classes, named after their content
+            css_classes = {}
+            for extension in extensions.values():
+                css_classes.update(extension.css_classes)
+            if css_classes:
+                style = etree.Element(f"{{{SVG_NS}}}style", nsmap=NSMAP)
+                style.text = "\n".join(
+                    f".{name}{{{declarations}}}"
+                    for name, declarations in sorted(css_classes.items())
+                )
+                with xf.element(f"{{{SVG_NS}}}defs"):
+                    xf.write(style)
+
+
+def machining_conflicts(boards: Sequence[Board]) -> List[str]:
+    """Machining parameters some boards don't share with the first one, lengths
+    compared in mm"""
+    values: Dict[Tuple[Tuple[str, Any], ...], Dict[str, Any]] = {}
+    for board in boards:
+        key = params_key(board.params)
+        if key not in values:
+            mm_params = normalize_units(typed_params(board.params))
+            values[key] = {name: mm_params[name] for name in MACHINING_PARAMS}
+    first, *others = values.values()
+    return [
+        name
+        for name in MACHINING_PARAMS
+        if any(not same_value(other[name], first[name]) for other in others)
+    ]
+
+
+def same_value(a: Any, b: Any) -> bool:
+    if isinstance(a, float) and isinstance(b, float):
+        return math.isclose(a, b)
+    return a == b
+
+
+def params_key(params: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    return tuple(sorted(params.items()))
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("manifest", nargs="?", help="CSV or JSON parameter sets")
+    parser.add_argument("--copies", type=int, default=1, help="Boards per row")
+    parser.add_argument("--sheet-width", type=float, default=1300, help="mm")
+    parser.add_argument("--sheet-height", type=float, default=600, help="mm")
+    parser.add_argument("--spacing", type=float, default=10, help="mm")
+    parser.add_argument("--output", required=True, help="Sheet svg")
+    parser.add_argument("--gcode", help="Sheet slots G-code")
+    parser.add_argument("--dxf", help="Sheet DXF")
+    args, extra = parser.parse_known_args(argv)
+    try:
+        common = parse_params(extra)
+    except ValueError as e:
+        parser.error(str(e))
+
+    rows = read_manifest(args.manifest) if args.manifest else [{}]
+    start = time.perf_counter()
+    boards = []
+    for row_i, row in enumerate(rows, 1):
+        row = dict(row)
+        name = row.pop("name", "") or f"board_{row_i}"
+        # copies share geometry and slots
+        template = board(name, {**row, **common})
+        for copy_i in range(1, args.copies + 1):
+            suffix = f"_{copy_i}" if args.copies > 1 else ""
+            boards.append(template._replace(name=f"{name}{suffix}"))
+
+    sizes = np.array([b.bounds[1] - b.bounds[0] for b in boards])
+    placements = shelf_pack(sizes, args.sheet_width, args.sheet_height, args.spacing)
+    left_out = [b.name for b, p in zip(boards, placements) if p is None]
+    if left_out:
+        print(
+            f"{len(left_out)} boards don't fit: {', '.join(left_out)}", file=sys.stderr
+        )
+        return 1
+
+    conflicts = machining_conflicts(boards) if args.gcode else []
+    if conflicts:
+        print(
+            f"boards differ on {', '.join(conflicts)}: one G-code program"
+            " can't cut them",
+            file=sys.stderr,
+        )
+        return 1
+
+    with open(args.output, "wb") as output:
+        write_sheet(output, boards, placements, args.sheet_width, args.sheet_height)
+
+    if args.dxf:
+        with open(args.dxf, "w", encoding="ascii") as output:
+            write_dxf(output, dxf_lines(sheet_entities(boards, placements)))
+
+    if args.gcode:
+        machining = normalize_units(typed_params(boards[0].params))
+        # slots are generated twice rather than held: header, then program
+        stats = toolpath_stats(
+            sheet_slots(boards, placements),
+            feed=machining["ftp_feed"],
+            plunge_feed=machining["ftp_plunge_feed"],
+            rapid_feed=machining["ftp_rapid_feed"],
+            safe_z=machining["ftp_safe_z"],
+            slot_depth=machining["ftp_slot_depth"],
+            ramp_length=machining["ftp_ramp_length"],
+        )
+        write_gcode(
+            args.gcode,
+            gcode_program(
+                sheet_slots(boards, placements),
+                feed=machining["ftp_feed"],
+                plunge_feed=machining["ftp_plunge_feed"],
+                safe_z=machining["ftp_safe_z"],
+                slot_depth=machining["ftp_slot_depth"],
+                ramp_length=machining["ftp_ramp_length"],
+                spindle_speed=machining["ftp_spindle_speed"],
+                comments=[f"boards: {len(boards)}", *stats.report()],
+            ),
+        )
+        print("\n".join(stats.report()), file=sys.stderr)
+    print(
+        f"{len(boards)} boards nested in {time.perf_counter() - start:.2f} s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Fretboard parameters helpers: defaults read from the .inx description and
+conversion of parameter sets to extension command lines
+"""
+
+import atexit
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Tuple, Union
+
+INX_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "fretboard_extension.inx"
+)
+INX_NS = "{http://www.inkscape.org/namespace/inkscape/extension}"
+
+BLANK_DOCUMENT = b"""<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg"
+  xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape"
+  xmlns:sodipodi="http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd"
+  width="1000mm" height="400mm" viewBox="0 0 1000 400">
+  <sodipodi:namedview id="namedview" inkscape:current-layer="layer1"/>
+  <g id="layer1" inkscape:groupmode="layer" inkscape:label="Layer 1"/>
+</svg>
+"""
+
+
+@lru_cache(maxsize=1)
+def inx_params() -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Default value and type of every extension parameter, keyed by its
+    command line name"""
+    defaults = {}
+    kinds = {}
+    for param in ET.parse(INX_PATH).getroot().iter(f"{INX_NS}param"):
+        kind = param.get("type")
+        text = (param.text or "").strip()
+        if kind == "notebook":
+            continue
+        if kind == "optiongroup" and not text:
+            text = param.find(f"{INX_NS}option").get("value")
+        elif kind == "color":
+            # inkscape hands colors over as unsigned RGBA integers
+            text = str(int(text, 0))
+        defaults[param.get("name")] = text
+        kinds[param.get("name")] = kind
+    return defaults, kinds
+
+
+def inx_defaults() -> Dict[str, str]:
+    """Default value of every extension parameter, keyed by its command line name"""
+    return inx_params()[0]
+
+
+def option_name(key: str) -> str:
+    """Command line name of a parameter given as `nut_width` or `nut-width`"""
+    return key.strip().lstrip("-").replace("_", "-")
+
+
+def typed_params(params: Mapping[str, Any]) -> Dict[str, Any]:
+    """params merged with the .inx defaults and converted as the extension
+    arguments are, keyed like its options (`nut_width`); no inkex needed"""
+    defaults, kinds = inx_params()
+    merged = dict(defaults)
+    for key, value in params.items():
+        merged[option_name(key)] = value
+    typed = {}
+    for name, value in merged.items():
+        kind = kinds.get(name, "string")
+        if kind == "bool":
+            value = str(value).strip().lower() in ("true", "1", "yes")
+        elif kind in ("int", "color"):
+            value = int(value)
+        elif kind == "float":
+            value = float(value)
+        else:
+            value = str(value)
+        typed[name.replace("-", "_")] = value
+    return typed
+
+
+def to_argv(params: Mapping[str, Any]) -> List[str]:
+    """Extension command line for params, missing parameters take .inx defaults"""
+    merged = dict(inx_defaults())
+    for key, value in params.items():
+        if isinstance(value, bool):
+            value = str(value).lower()
+        merged[option_name(key)] = str(value)
+    return [f"--{name}={value}" for name, value in merged.items()]
+
+
+@lru_cache(maxsize=1)
+def blank_document() -> str:
+    """Path of an empty millimetre based document, created once per process"""
+    fd, path = tempfile.mkstemp(prefix="fretboard_", suffix=".svg")
+    with os.fdopen(fd, "wb") as document:
+        document.write(BLANK_DOCUMENT)
+    atexit.register(os.remove, path)
+    return path
+
+
+def to_mm(inches: Union[int, float]) -> float:
+    return inches * 25.4
+
+
+def normalize_units(options: Mapping[str, Any]) -> Dict[str, Any]:
+    """options with every parameter given in inches converted to millimetres"""
+    return {
+        option: (
+            to_mm(inches=value) if options.get(f"{option}_unit") == "in" else value
+        )
+        for option, value in options.items()
+    }
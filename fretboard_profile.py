@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Per-stage timing of a generation
+
+Stages are timed with time.perf_counter and accumulated by name (calls,
+seconds, elements created); stages given a `fret` also keep one entry per
+fret. The whole run can be put under cProfile. The report is a JSON sidecar,
+one file per run, meant to be compared across versions and configurations.
+"""
+
+import cProfile
+import json
+import os
+import platform
+import pstats
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+DEFAULT_PROFILE_FILE = os.path.join(tempfile.gettempdir(), "fretboard_profile.json")
+CPROFILE_ENTRIES = 40
+
+
+class StageProfiler:
+    __slots__ = ("enabled", "stages", "started", "cprofile")
+
+    def __init__(self, enabled: bool = False, cprofile: bool = False) -> None:
+        self.enabled = enabled
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.started = time.perf_counter()
+        self.cprofile = cProfile.Profile() if enabled and cprofile else None
+        if self.cprofile is not None:
+            self.cprofile.enable()
+
+    def timed(
+        self,
+        stage: str,
+        func: Callable[..., T],
+        *args: Any,
+        count: Optional[Callable[[T], int]] = None,
+        fret: Optional[int] = None,
+    ) -> T:
+        """func(*args), timed under stage, count(result) being the elements it made"""
+        if not self.enabled:
+            return func(*args)
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        record = self.stages.setdefault(stage, {"calls": 0, "time": 0.0, "elements": 0})
+        record["calls"] += 1
+        record["time"] += elapsed
+        if count is not None:
+            record["elements"] += count(result)
+        if fret is not None:
+            record.setdefault("frets", []).append({"fret": fret, "time": elapsed})
+        return result
+
+    def report(self, params: Mapping[str, Any], versions: Mapping[str, str]) -> Dict:
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "versions": {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                **versions,
+            },
+            "params": dict(params),
+            "wall_time": time.perf_counter() - self.started,
+            "stages": self.stages,
+        }
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            report["cprofile"] = self.cprofile_entries()
+        return report
+
+    def cprofile_entries(self) -> List[Dict[str, Any]]:
+        """Functions taking the most cumulative time"""
+        stats = pstats.Stats(self.cprofile)
+        entries = []
+        for (path, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            entries.append(
+                {
+                    "function": f"{os.path.basename(path)}:{line}({name})",
+                    "calls": calls,
+                    "tottime": tottime,
+                    "cumtime": cumtime,
+                }
+            )
+        entries.sort(key=lambda entry: entry["cumtime"], reverse=True)
+        return entries[:CPROFILE_ENTRIES]
+
+    def write(
+        self, path: str, params: Mapping[str, Any], versions: Mapping[str, str]
+    ) -> None:
+        with open(path, "w", encoding="utf-8") as sidecar:
+            json.dump(self.report(params, versions), sidecar, indent=1, default=str)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Fret top leveling analysis along the compound radius
+
+Every fret x string crown top is computed at once: the fret position under
+the string (compensated and fanned frets included), the radius there,
+interpolated from bridge to nut, the fretboard surface and crown top heights
+(Z=0 on the top of the fretboard midline). Along each string path, a
+straightedge on the first and last frets gives the deviation of every crown,
+and a short one on the two neighbours of a fret whether it rocks (positive:
+the fret stands proud and must be leveled).
+"""
+
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+from fretboard_geometry import FretboardGeometry
+
+# points of a fret cross-section
+SECTION_SAMPLES = 64
+# rocker (mm) below which a fret is taken as level
+ROCKER_TOLERANCE = 0.001
+
+
+class FretRelief(NamedTuple):
+    """Arrays of shape (frets, strings), fret 1 and the y1 side string first"""
+
+    x: np.ndarray
+    y: np.ndarray
+    radius: np.ndarray
+    surface_z: np.ndarray
+    crown_z: np.ndarray
+    # along the string, from the nut
+    distance: np.ndarray
+    # above the straightedge lying on the first and last frets
+    deviation: np.ndarray
+    # above the straightedge lying on both neighbours, nan for the outer frets
+    rocker: np.ndarray
+
+
+def fret_relief(
+    geometry: FretboardGeometry,
+    nut_radius: float,
+    bridge_radius: float,
+    crown_height: float,
+) -> FretRelief:
+    """Crown tops under every string at every fret
+
+    Raises ValueError when the radius is smaller than the half width.
+    """
+    x = geometry.fret_string_x[1:-1]
+    strings = np.arange(geometry.strings)
+    y = geometry.string_y(strings, x)
+    surface_z = geometry.surface_z(x, y, nut_radius, bridge_radius)
+    crown_z = surface_z + crown_height
+    nut = geometry.string_lines[:, 2:]
+    distance = np.hypot(x - nut[:, 0], y - nut[:, 1])
+
+    if geometry.frets > 1:
+        deviation = crown_z - straightedge(
+            distance, distance[[0]], crown_z[[0]], distance[[-1]], crown_z[[-1]]
+        )
+    else:
+        # a lone fret is both ends of the straightedge
+        deviation = np.zeros_like(crown_z)
+    rocker = np.full_like(crown_z, np.nan)
+    rocker[1:-1] = crown_z[1:-1] - straightedge(
+        distance[1:-1], distance[:-2], crown_z[:-2], distance[2:], crown_z[2:]
+    )
+    return FretRelief(
+        x=x,
+        y=y,
+        radius=geometry.radius_at(x, nut_radius, bridge_radius),
+        surface_z=surface_z,
+        crown_z=crown_z,
+        distance=distance,
+        deviation=deviation,
+        rocker=rocker,
+    )
+
+
+def straightedge(
+    u: np.ndarray, u1: np.ndarray, z1: np.ndarray, u2: np.ndarray, z2: np.ndarray
+) -> np.ndarray:
+    """Height at u of the straightedge through (u1, z1) and (u2, z2)"""
+    return z1 + (z2 - z1) * (u - u1) / (u2 - u1)
+
+
+def fret_sections(
+    geometry: FretboardGeometry,
+    nut_radius: float,
+    bridge_radius: float,
+    samples: int = SECTION_SAMPLES,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Fretboard cross-sections along every fret line, shape (frets, points):
+    distance from the y1 edge, x, y of each point and the surface z there"""
+    lines = geometry.fret_lines[1:-1]
+    lengths = np.hypot(*np.diff(lines, axis=1).T).T
+    # every fret line segment sampled as finely
+    t = np.linspace(0, 1, samples, endpoint=False)
+    points = np.concatenate(
+        [
+            (
+                lines[:, :-1, np.newaxis, :]
+                + np.diff(lines, axis=1)[:, :, np.newaxis, :] * t[:, np.newaxis]
+            ).reshape(len(lines), -1, 2),
+            lines[:, -1:, :],
+        ],
+        axis=1,
+    )
+    along = np.concatenate(
+        [
+            np.zeros((len(lines), 1)),
+            np.cumsum(np.repeat(lengths / samples, samples, axis=1), axis=1),
+        ],
+        axis=1,
+    )
+    z = geometry.surface_z(points[..., 0], points[..., 1], nut_radius, bridge_radius)
+    return along, points, z
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Local generation server: keeps inkex and the extension loaded between runs
+
+    python fretboard_server.py
+    python fretboard_server.py --unix /tmp/fretboard.sock
+    python fretboard_server.py --port 8765
+
+Endpoints, parameter sets being JSON objects as in batch manifests:
+
+    POST /svg       params -> svg drawing
+    POST /gcode     params -> fret slots G-code
+    POST /geometry  params -> fret, string, outline and slot coordinates (JSON)
+    POST /run       {"argv": [...], "cwd": "..."} -> {"output", "messages", "status"},
+                    an extension run as Inkscape does it (see fretboard_client.py)
+    GET  /health
+
+Requests are served one at a time, on a Unix socket (readable by its owner
+only) by default or on a loopback address. As /run reads and writes local
+files, web pages must not reach it: POSTs need an application/json body, a
+Host header naming the server (localhost or 127.0.0.1 and its port, localhost
+on a socket) and no Origin header, which browsers send on cross-site requests
+and DNS rebinding can't forge. /svg, /gcode and /geometry drop file path
+parameters.
+"""
+
+import argparse
+import contextlib
+import getpass
+import http.server
+import io
+import ipaddress
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import inkex
+
+from fretboard_extension import (
+    FretboardExtension,
+    prepared_extension,
+    render_gcode,
+    render_svg,
+)
+
+DEFAULT_PORT = 8765
+DEFAULT_SOCKET = os.path.join(
+    tempfile.gettempdir(), f"fretboard-{getpass.getuser()}.sock"
+)
+# parameters naming files the extension writes
+FILE_PARAMS = ("output", "debug_file", "profile_file", "ftp_gcode_file")
+POST_PATHS = ("/svg", "/gcode", "/geometry", "/run")
+
+
+def geometry_json(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Coordinates of a board in millimetres, drawing axes"""
+    extension = prepared_extension(params)
+    geometry = extension.geometry
+    return {
+        "length": geometry.length,
+        "midline_y": geometry.midline_y,
+        "scale_outline": geometry.scale_outline.tolist(),
+        "outline": geometry.outline.tolist(),
+        "frets": geometry.fret_lines.tolist(),
+        "fret_string_x": geometry.fret_string_x.tolist(),
+        "strings": geometry.string_lines.tolist(),
+        "slots": [
+            {"fret": fret_i, "points": points.tolist()}
+            for fret_i, points in extension.slots
+        ],
+    }
+
+
+def without_files(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        name: value
+        for name, value in params.items()
+        if name.replace("-", "_") not in FILE_PARAMS
+    }
+
+
+def checked(path: str, payload: Any) -> Dict[str, Any]:
+    """payload if its shape suits path, ValueError otherwise"""
+    if not isinstance(payload, dict):
+        raise ValueError("a JSON object is expected")
+    if path == "/run":
+        argv = payload.get("argv")
+        if not isinstance(argv, list) or not all(isinstance(a, str) for a in argv):
+            raise ValueError("argv must be a list of strings")
+        if not isinstance(payload.get("cwd", ""), str):
+            raise ValueError("cwd must be a string")
+    return payload
+
+
+def run_extension(argv, cwd: str) -> Dict[str, Any]:
+    """FretboardExtension run on argv from cwd, output and messages captured"""
+    output = io.BytesIO()
+    messages = io.StringIO()
+    status = 0
+    previous_cwd = os.getcwd()
+    os.environ.pop("DOCUMENT_PATH", None)
+    try:
+        os.chdir(cwd)
+        with contextlib.redirect_stderr(messages):
+            FretboardExtension().run(args=list(argv), output=output)
+    except SystemExit as e:
+        # sys.exit() and sys.exit(None) are successes, sys.exit("message") not
+        status = e.code if isinstance(e.code, int) else int(e.code is not None)
+    finally:
+        os.chdir(previous_cwd)
+    return {
+        "output": output.getvalue().decode("utf-8"),
+        "messages": messages.getvalue(),
+        "status": status,
+    }
+
+
+class FretboardHandler(http.server.BaseHTTPRequestHandler):
+    server_version = "fretboard/1"
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self.reply(200, "application/json", b'{"status": "ok"}')
+        else:
+            self.reply(404, "text/plain", b"not found")
+
+    def do_POST(self) -> None:
+        if self.headers.get("Host") not in self.server.hosts or self.headers.get(
+            "Origin"
+        ):
+            self.reply(403, "text/plain", b"forbidden")
+            return
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip()
+        if content_type != "application/json":
+            self.reply(415, "text/plain", b"application/json expected")
+            return
+        if self.path not in POST_PATHS:
+            self.reply(404, "text/plain", b"not found")
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            content_type, body = self.respond(self.path, checked(self.path, payload))
+        except (ValueError, inkex.AbortExtension) as e:
+            self.reply(400, "text/plain", str(e).encode())
+        except SystemExit:
+            self.reply(400, "text/plain", b"generation aborted, see the server log")
+        except Exception as e:  # pylint: disable=broad-except
+            self.log_error("%s failed: %r", self.path, e)
+            self.reply(500, "text/plain", b"internal error, see the server log")
+        else:
+            self.reply(200, content_type, body)
+
+    def respond(self, path: str, payload: Dict[str, Any]) -> Tuple[str, bytes]:
+        if path in ("/svg", "/gcode", "/geometry"):
+            payload = without_files(payload)
+        if path == "/svg":
+            output = io.BytesIO()
+            render_svg(payload, output)
+            return "image/svg+xml", output.getvalue()
+        if path == "/gcode":
+            return "text/plain", "\n".join([*render_gcode(payload), ""]).encode()
+        if path == "/geometry":
+            return "application/json", json.dumps(geometry_json(payload)).encode()
+        if path == "/run":
+            result = run_extension(payload["argv"], payload.get("cwd", os.getcwd()))
+            return "application/json", json.dumps(result).encode()
+        raise ValueError(f"unknown path {path}")
+
+    def reply(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class FretboardServer(http.server.HTTPServer):
+    verbose = False
+
+    @property
+    def hosts(self) -> Tuple[str, ...]:
+        """Host headers accepted"""
+        return tuple(
+            f"{host}:{self.server_port}" for host in ("localhost", "127.0.0.1")
+        )
+
+
+class UnixFretboardServer(FretboardServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self) -> None:
+        # owner only from the start, not after a chmod other users could race
+        umask = os.umask(0o177)
+        try:
+            socketserver.TCPServer.server_bind(self)
+        finally:
+            os.umask(umask)
+        self.server_name, self.server_port = "localhost", 0
+
+    @property
+    def hosts(self) -> Tuple[str, ...]:
+        return ("localhost",)
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: Optional[int] = None,
+    unix: str = DEFAULT_SOCKET,
+    verbose: bool = False,
+) -> None:
+    if port is None:
+        if os.path.exists(unix):
+            os.remove(unix)
+        server: FretboardServer = UnixFretboardServer(unix, FretboardHandler)
+    else:
+        unix = ""
+        if not ipaddress.ip_address(socket.gethostbyname(host)).is_loopback:
+            raise ValueError(f"{host} is not a loopback address")
+        server = FretboardServer((host, port), FretboardHandler)
+    server.verbose = verbose
+    # stop on SIGTERM as on Ctrl-C, removing the socket
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    # warm up caches: blank document, .inx defaults, fret tables
+    start = time.perf_counter()
+    render_svg({}, io.BytesIO())
+    print(
+        f"fretboard server on {unix or f'http://{host}:{port}'},"
+        f" warmed up in {time.perf_counter() - start:.3f} s",
+        file=sys.stderr,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if unix and os.path.exists(unix):
+            os.remove(unix)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="Loopback address")
+    parser.add_argument(
+        "--port",
+        type=int,
+        help=f"TCP port ({DEFAULT_PORT} is usual), instead of --unix",
+    )
+    parser.add_argument("--unix", default=DEFAULT_SOCKET, help="Unix socket path")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+    try:
+        serve(host=args.host, port=args.port, unix=args.unix, verbose=args.verbose)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
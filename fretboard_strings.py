@@ -0,0 +1,306 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+String sets: gauges, spacing, edge margins and tension
+
+Gauges are written as on string packs, in thousandths of an inch from the
+treble string, "p" or "w" telling plain from wound strings (wound from
+WOUND_FROM without one). Tunings are note names or frequencies, also from the
+treble string:
+
+    parse_gauges("10,13,17p,26,36,46", strings=6)
+    parse_tuning("E4,B3,G3,D3,A2,E2", strings=6)
+
+Parsed arrays are bass first, as the strings of FretboardGeometry. Strings are
+spaced center to center ("center"), or with equal room between them ("gap"),
+thicker strings taking more of it; the outer ones stay where the string
+spaces put them.
+
+solve_string_sets evaluates catalogs of sets against a board at once: every
+set, nut string space and spacing, keeping those whose strings stay clear of
+the fretboard edges at every fret and of each other, at tensions within range.
+"""
+
+import csv
+import json
+import math
+import re
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from fretboard_geometry import FretboardGeometry
+
+SPACINGS = ("center", "gap")
+WOUND_FROM = 20
+STEEL_DENSITY = 7850.0  # kg/m3
+# unit weight of nickel roundwound strings over plain steel of the same gauge
+WOUND_DENSITY_RATIO = 0.82
+STANDARD_GRAVITY = 9.80665
+A4_FREQUENCY = 440.0
+NOTE_STEPS = {"c": -9, "d": -7, "e": -5, "f": -4, "g": -2, "a": 0, "b": 2}
+MIN_EDGE_MARGIN = 1.0  # mm
+TENSION_RANGE = (4.0, 12.0)  # kgf
+# set x space x fret margins evaluated at once
+CHUNK_MARGINS = 1 << 20
+STRING_SETS = {
+    "9-42": "9,11,16,24,32,42",
+    "9-46": "9,11,16,26,36,46",
+    "10-46": "10,13,17,26,36,46",
+    "10-52": "10,13,17,30,42,52",
+    "11-49": "11,14,18,28,38,49",
+    "11-52": "11,14,18,28,38,52",
+    "12-52": "12,16,24w,32,42,52",
+    "12-53": "12,16,24w,32,42,53",
+    "13-56": "13,17,26w,35,45,56",
+    "10-59": "10,13,17,26,36,46,59",
+    "10-74": "10,13,17,26,36,46,64,74",
+    "45-105": "45,65,80,105",
+    "45-130": "45,65,80,100,130",
+}
+
+
+class Gauges(NamedTuple):
+    gauges: np.ndarray  # thousandths of an inch, bass first
+    wound: np.ndarray
+
+    @property
+    def diameters(self) -> np.ndarray:
+        """Millimetres"""
+        return self.gauges / 100 * 2.54
+
+
+class StringSolutions(NamedTuple):
+    """Feasible set, nut string space and spacing combinations, most even
+    tensions first"""
+
+    set_index: np.ndarray
+    nut_string_space: np.ndarray
+    spacing: np.ndarray  # index in the spacings solved
+    margin: np.ndarray  # smallest edge margin, mm
+    gap: np.ndarray  # smallest room between strings, mm
+    tension: np.ndarray  # (solutions, strings) kgf
+
+
+def parse_gauges(text: str, strings: int) -> Gauges:
+    """Raises ValueError on an invalid gauge or a count other than strings"""
+    items = [item.strip().lower() for item in text.split(",") if item.strip()]
+    if len(items) != strings:
+        raise ValueError(f"{len(items)} gauges for {strings} strings")
+    gauges = np.empty(strings)
+    wound = np.empty(strings, dtype=bool)
+    for item_i, item in enumerate(items):
+        kind = item[-1] if item[-1] in "pw" else ""
+        gauges[item_i] = float(item.rstrip("pw"))
+        if not gauges[item_i] > 0:
+            raise ValueError(f"invalid gauge {item}")
+        wound[item_i] = kind == "w" or (not kind and gauges[item_i] >= WOUND_FROM)
+    return Gauges(gauges[::-1].copy(), wound[::-1].copy())
+
+
+def parse_note(text: str) -> float:
+    """Frequency of "A4", "F#3", "Bb1" or of a number of hertz"""
+    text = text.strip()
+    match = re.fullmatch(r"([A-Ga-g])([#b]?)(-?\d+)", text)
+    if match is None:
+        frequency = float(text)
+        if not frequency > 0:
+            raise ValueError(f"invalid frequency {text}")
+        return frequency
+    letter, accidental, octave = match.groups()
+    steps = NOTE_STEPS[letter.lower()] + {"#": 1, "b": -1, "": 0}[accidental]
+    return A4_FREQUENCY * 2 ** (steps / 12 + int(octave) - 4)
+
+
+def parse_tuning(text: str, strings: int) -> np.ndarray:
+    """Open string frequencies, bass first
+
+    Raises ValueError on an invalid note or a count other than strings.
+    """
+    notes = [note for note in text.split(",") if note.strip()]
+    if len(notes) != strings:
+        raise ValueError(f"{len(notes)} notes for {strings} strings")
+    return np.array([parse_note(note) for note in reversed(notes)])
+
+
+def string_tensions(
+    gauges: np.ndarray,
+    wound: np.ndarray,
+    scales: np.ndarray,
+    frequencies: np.ndarray,
+) -> np.ndarray:
+    """Tension in kgf of strings tuned to frequencies over scales in mm"""
+    diameters = np.asarray(gauges) * 2.54e-5
+    unit_weight = (
+        STEEL_DENSITY
+        * math.pi
+        / 4
+        * diameters**2
+        * np.where(wound, WOUND_DENSITY_RATIO, 1.0)
+    )
+    return (
+        unit_weight * (2 * np.asarray(scales) / 1000 * frequencies) ** 2
+    ) / STANDARD_GRAVITY
+
+
+def string_offsets(
+    span: np.ndarray, diameters: np.ndarray, spacing: str = "center"
+) -> np.ndarray:
+    """String centres from the midline, outer ones span apart,
+    shape (..., strings) of span and diameters broadcast"""
+    span = np.asarray(span, dtype=float)[..., np.newaxis]
+    diameters = np.asarray(diameters, dtype=float)
+    strings = diameters.shape[-1]
+    steps = max(strings - 1, 1)
+    string_i = np.arange(strings)
+    if spacing == "center":
+        return np.broadcast_to(
+            -span / 2 + span / steps * string_i,
+            np.broadcast_shapes(span.shape[:-1], diameters.shape[:-1]) + (strings,),
+        )
+    # from the first string centre to each one, strings excluding the gaps
+    width = np.cumsum((diameters[..., :-1] + diameters[..., 1:]) / 2, axis=-1)
+    width = np.concatenate([np.zeros_like(diameters[..., :1]), width], axis=-1)
+    return -span / 2 + width + (span - width[..., -1:]) / steps * string_i
+
+
+def string_gaps(offsets: np.ndarray, diameters: np.ndarray) -> np.ndarray:
+    """Smallest room between neighbour strings, shape (...)"""
+    if offsets.shape[-1] < 2:
+        return np.full(offsets.shape[:-1], np.inf)
+    gaps = np.diff(offsets, axis=-1) - (diameters[..., :-1] + diameters[..., 1:]) / 2
+    return gaps.min(axis=-1)
+
+
+def edge_margins(
+    geometry: "FretboardGeometry",
+    diameters: np.ndarray,
+    nut_offsets: np.ndarray = None,
+    bridge_offsets: np.ndarray = None,
+) -> np.ndarray:
+    """Room between the outer strings and the fretboard edges at every fret,
+    nut and fretboard end included, shape (..., 2, frets + 2), bass side first
+
+    Offsets are string centres from the midline at the nut and bridge ends of
+    the strings, those of geometry by default.
+    """
+    lines = geometry.string_lines
+    if nut_offsets is None:
+        nut_offsets = lines[:, 3] - geometry.midline_y
+    if bridge_offsets is None:
+        bridge_offsets = lines[:, 1] - geometry.midline_y
+    diameters = np.asarray(diameters)
+    margins = []
+    for string_i, side in ((0, -1), (-1, 1)):
+        x = geometry.fret_string_x[:, string_i]
+        along = (x - lines[string_i, 0]) / (lines[string_i, 2] - lines[string_i, 0])
+        bridge = np.asarray(bridge_offsets)[..., string_i, np.newaxis]
+        nut = np.asarray(nut_offsets)[..., string_i, np.newaxis]
+        offset = bridge + (nut - bridge) * along
+        edge = geometry.bridge_width / 2 - x * geometry.fretboard_angle_tan
+        margins.append(edge - side * offset - diameters[..., string_i, np.newaxis] / 2)
+    return np.stack(np.broadcast_arrays(*margins), axis=-2)
+
+
+def solve_string_sets(
+    geometry: "FretboardGeometry",
+    gauges: np.ndarray,
+    wound: np.ndarray,
+    frequencies: np.ndarray,
+    nut_string_spaces: np.ndarray,
+    spacings: Sequence[str] = SPACINGS,
+    min_margin: float = MIN_EDGE_MARGIN,
+    min_gap: float = 0.0,
+    tension_range: Tuple[float, float] = TENSION_RANGE,
+) -> StringSolutions:
+    """Feasible combinations of gauge sets, shape (sets, strings) bass first,
+    nut string spaces and spacings on geometry, its bridge string space kept
+
+    Sets with a tension out of tension_range are left out at once; margins at
+    every fret are then evaluated for as many sets as fit CHUNK_MARGINS.
+    """
+    gauges = np.atleast_2d(np.asarray(gauges, dtype=float))
+    wound = np.atleast_2d(wound)
+    spaces = np.asarray(nut_string_spaces, dtype=float).reshape(-1)
+    tension = string_tensions(gauges, wound, geometry.string_scales, frequencies)
+    in_range = np.all(
+        (tension >= tension_range[0]) & (tension <= tension_range[1]), axis=-1
+    )
+    candidates = np.flatnonzero(in_range)
+    bridge_span = geometry.bridge_string_space * (geometry.strings - 1)
+    chunk = max(1, CHUNK_MARGINS // (len(spaces) * (geometry.frets + 2) * 2))
+    found = []
+    for spacing_i, spacing in enumerate(spacings):
+        for first in range(0, len(candidates), chunk):
+            set_i = candidates[first : first + chunk]
+            # (sets, spaces, strings)
+            diameters = gauges[set_i, np.newaxis] / 100 * 2.54
+            nut = string_offsets(spaces, diameters, spacing)
+            bridge = string_offsets(bridge_span, diameters, spacing)
+            margin = edge_margins(geometry, diameters, nut, bridge).min(axis=(-2, -1))
+            gap = np.minimum(
+                string_gaps(nut, diameters), string_gaps(bridge, diameters)
+            )
+            feasible = (margin >= min_margin) & (gap >= min_gap)
+            chunk_set, space_i = np.nonzero(feasible)
+            found.append(
+                (
+                    set_i[chunk_set],
+                    spaces[space_i],
+                    np.full(len(space_i), spacing_i),
+                    margin[feasible],
+                    gap[feasible],
+                )
+            )
+    if not found:
+        found = [(np.empty(0, dtype=int),) + (np.empty(0),) * 4]
+    set_index, space, spacing, margin, gap = (np.concatenate(c) for c in zip(*found))
+    set_tension = tension[set_index]
+    spread = set_tension.max(axis=-1, initial=0) / set_tension.min(
+        axis=-1, initial=np.inf
+    )
+    order = np.lexsort((-margin, spread))
+    return StringSolutions(
+        set_index=set_index[order],
+        nut_string_space=space[order],
+        spacing=spacing[order].astype(int),
+        margin=margin[order],
+        gap=gap[order],
+        tension=set_tension[order],
+    )
+
+
+def read_catalog(path: str) -> Dict[str, str]:
+    """Set name to gauges text, from a CSV file with name and gauges columns
+    or a JSON object of them"""
+    with open(path, encoding="utf-8", newline="") as catalog:
+        if path.lower().endswith(".json"):
+            return {
+                str(name): str(gauges) for name, gauges in json.load(catalog).items()
+            }
+        return {row["name"]: row["gauges"] for row in csv.DictReader(catalog)}
+
+
+def catalog_gauges(catalog: Dict[str, str], strings: int) -> Tuple[List[str], Gauges]:
+    """Names and stacked gauges, shape (sets, strings), of the catalog sets
+    valid for strings"""
+    names = []
+    parsed = []
+    for name, text in catalog.items():
+        try:
+            parsed.append(parse_gauges(text, strings))
+        except ValueError:
+            continue
+        names.append(name)
+    if not parsed:
+        return names, Gauges(np.empty((0, strings)), np.empty((0, strings), bool))
+    return names, Gauges(*(np.stack(column) for column in zip(*parsed)))
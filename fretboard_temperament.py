@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Fret position definitions
+
+A temperament is either equal divisions of the octave (12, 19, 24, 31...) or
+the frequency ratios of the frets of one period, the last one being the
+period itself (2 for an octave), repeated up the neck. Per-string offsets, in
+cents, move each fret under each string, as on compensated (true temperament)
+boards; strings are given treble first, as gauges and tuning are:
+
+    parse_temperament("19")
+    parse_temperament("16/15,9/8,6/5,5/4,4/3,45/32,3/2,8/5,5/3,9/5,15/8,2/1")
+    parse_temperament("12", offsets="-2,1.5,0;3,-1")  # treble first, ; between
+"""
+
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+CENTS_PER_OCTAVE = 1200.0
+
+
+class Temperament(NamedTuple):
+    """Hashable, so that fret tables can be cached per temperament"""
+
+    divisions: int = 12
+    steps: Tuple[float, ...] = ()
+    offsets: Tuple[Tuple[float, ...], ...] = ()  # per string, treble first
+
+    @property
+    def compensated(self) -> bool:
+        return any(any(string) for string in self.offsets)
+
+
+def parse_ratio(text: str) -> float:
+    """Ratio as "3/2", "1.5", or cents above the open string as "701.955c" """
+    text = text.strip()
+    if text.endswith("c"):
+        return 2 ** (float(text[:-1]) / CENTS_PER_OCTAVE)
+    if "/" in text:
+        numerator, denominator = text.split("/")
+        return float(numerator) / float(denominator)
+    return float(text)
+
+
+def parse_temperament(definition: str, offsets: str = "") -> Temperament:
+    definition = definition.strip() or "12"
+    if definition.isdigit():
+        divisions = int(definition)
+        if divisions < 1:
+            raise ValueError("at least one division of the octave is needed")
+        temperament = Temperament(divisions=divisions)
+    else:
+        steps = tuple(parse_ratio(step) for step in definition.split(","))
+        if any(low >= high for low, high in zip((1.0,) + steps, steps)):
+            raise ValueError("temperament ratios must increase from above 1")
+        temperament = Temperament(steps=steps)
+    return temperament._replace(
+        offsets=tuple(
+            tuple(float(cents) if cents.strip() else 0.0 for cents in row.split(","))
+            for row in offsets.split(";")
+            if row.strip()
+        )
+    )
+
+
+def fret_ratios(temperament: Temperament, n: np.ndarray) -> np.ndarray:
+    """Frequency ratio to the open string of frets n, ignoring offsets"""
+    if not temperament.steps:
+        return np.power(2.0, np.asarray(n, dtype=float) / temperament.divisions)
+    steps = np.array((1.0,) + temperament.steps[:-1])
+    periods, step = np.divmod(np.asarray(n, dtype=int), len(steps))
+    return np.power(temperament.steps[-1], periods) * steps[step]
+
+
+def fret_cents(temperament: Temperament, frets: int, strings: int) -> np.ndarray:
+    """Offsets of frets 0 to frets + 1 under every string, shape (frets + 2, strings)
+
+    The nut and the end of the fretboard are never moved, missing offsets are 0.
+    Strings are bass first, as the strings of FretboardGeometry.
+    """
+    cents = np.zeros((frets + 2, strings))
+    for row_i, row in enumerate(temperament.offsets[:strings]):
+        row = row[:frets]
+        cents[1 : len(row) + 1, strings - 1 - row_i] = row
+    return cents
+
+
+def fret_matrix(
+    scale: float, frets: int, strings: int, temperament: Temperament
+) -> np.ndarray:
+    """Distances to nut of frets 0 to frets + 1 under every string,
+    shape (frets + 2, strings)"""
+    ratios = fret_ratios(temperament, np.arange(frets + 2))[:, np.newaxis]
+    if temperament.compensated:
+        ratios = ratios * np.power(
+            2.0, fret_cents(temperament, frets, strings) / CENTS_PER_OCTAVE
+        )
+    return scale - scale / np.broadcast_to(ratios, (frets + 2, strings))
@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Fret slot passes planning, toolpaths sequencing and machining time estimate
+
+A slot is a (fret number, points) tuple, points being (x, y) or (x, y, z)
+rows cut in order. Consecutive slots of the same fret are passes of one slot
+cut between two retracts, as climb or conventional passes are.
+"""
+
+import itertools
+import math
+from typing import Any, Callable, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from fretboard_gcode import cut_points
+from fretboard_geometry import FretboardGeometry
+from fretboard_trace import Tracer
+
+Slot = Tuple[int, np.ndarray]
+PASS_PLANNERS = ("adaptive", "fixed")
+DIRECTIONS = ("zigzag", "climb", "conventional")
+
+
+class PassPlan(NamedTuple):
+    """Passes of every fret slot, in cutting order"""
+
+    offsets: np.ndarray  # tool centre from the fret line, towards the nut
+    material: np.ndarray  # uncut side, 1 towards the nut, -1 towards the bridge
+
+
+class PassReport(NamedTuple):
+    planner: str
+    passes: int
+    fixed_passes: int
+    repeated_passes: int  # fixed stepover passes over an earlier one
+    cut_length: float
+    fixed_cut_length: float
+
+    @property
+    def removed_length(self) -> float:
+        """Cut length saved on the fixed stepover passes, negative when longer"""
+        return self.fixed_cut_length - self.cut_length
+
+    def report(self) -> List[str]:
+        lines = [
+            f"passes per slot: {self.passes} (fixed stepover: {self.fixed_passes},"
+            f" {self.repeated_passes} repeated)"
+        ]
+        if self.planner != "fixed":
+            lines.append(
+                f"cut length removed from fixed stepover: {self.removed_length:.1f} mm"
+            )
+        return lines
+
+
+class ToolpathStats(NamedTuple):
+    cut_length: float
+    rapid_length: float
+    plunge_length: float
+    slots: int
+    cycle_time: float  # minutes
+
+    def report(self) -> List[str]:
+        return [
+            f"slots: {self.slots}",
+            f"cut length: {self.cut_length:.1f} mm",
+            f"rapid length: {self.rapid_length:.1f} mm",
+            f"plunge length: {self.plunge_length:.1f} mm",
+            f"estimated cycle time: {self.cycle_time:.2f} min",
+        ]
+
+
+def fixed_passes(
+    tool_diameter: float, tool_stepover: float, slot_width: float
+) -> PassPlan:
+    """Passes of FretboardGeometry.slot_passes"""
+    offsets = FretboardGeometry.slot_pass_offsets(
+        tool_diameter, tool_stepover, slot_width
+    )
+    return PassPlan(offsets, np.ones(len(offsets)))
+
+
+def adaptive_passes(
+    tool_diameter: float,
+    tool_stepover: float,
+    slot_width: float,
+    scallop: float = 0.0,
+    finish_allowance: float = 0.0,
+) -> PassPlan:
+    """Fewest evenly spaced passes clearing the slot width
+
+    Passes are at most tool_stepover % of the tool apart, and close enough for
+    a ball or bull nose tool to leave no ridge higher than scallop (0 for a
+    flat end mill). With a finish allowance, roughing passes stay that far
+    from the walls, a finishing pass then follows each of them; the allowance
+    is at most a step and what the slot width leaves.
+    """
+    radius = tool_diameter / 2
+    step = tool_diameter * tool_stepover / 100
+    if 0 < scallop < radius:
+        step = min(step, 2 * math.sqrt(scallop * (tool_diameter - scallop)))
+    wall = slot_width / 2 - radius
+    allowance = min(finish_allowance, wall, step) if finish_allowance > 0 else 0.0
+    roughing = wall - allowance
+    passes = 1 + math.ceil(round(2 * roughing / step, 9))
+    offsets = np.linspace(-roughing, roughing, passes)
+    material = np.ones(passes)
+    if allowance > 0:
+        offsets = np.append(offsets, [wall, -wall])
+        material = np.append(material, [1, -1])
+    return PassPlan(offsets, material)
+
+
+def pass_plan(params: Mapping[str, Any]) -> PassPlan:
+    """Passes of extension parameters in millimetres"""
+    if params["ftp_passes"] == "fixed":
+        return fixed_passes(
+            params["ftp_tool_diameter"],
+            params["ftp_tool_stepover"],
+            params["ftp_slot_width"],
+        )
+    return adaptive_passes(
+        params["ftp_tool_diameter"],
+        params["ftp_tool_stepover"],
+        params["ftp_slot_width"],
+        scallop=params["ftp_scallop"],
+        finish_allowance=params["ftp_finish_allowance"],
+    )
+
+
+def pass_reversed(plan: PassPlan, direction: str) -> np.ndarray:
+    """Passes cut from y2 to y1
+
+    zigzag goes back and forth. With a clockwise spindle a pass from y1 to y2
+    has the nut side on its left: it is a conventional cut when the material
+    is there, else a climb cut.
+    """
+    if direction == "zigzag":
+        return np.arange(len(plan.offsets)) % 2 == 1
+    return (plan.material > 0) == (direction == "climb")
+
+
+def pass_lines(
+    geometry: FretboardGeometry, params: Mapping[str, Any], plan: PassPlan
+) -> np.ndarray:
+    """Flat passes of every real fret slot, in their cutting direction,
+    shape (frets, passes, pass_points, 2)"""
+    lines = geometry.slot_pass_lines(
+        plan.offsets,
+        tool_diameter=params["ftp_tool_diameter"],
+        slot_margin=params["ftp_slot_margin"],
+    )
+    reverse = pass_reversed(plan, params["ftp_direction"])
+    lines[:, reverse] = lines[:, reverse, ::-1]
+    return lines
+
+
+def plan_slots(
+    geometry: FretboardGeometry,
+    params: Mapping[str, Any],
+    tracer: Optional[Tracer] = None,
+    warn: Optional[Callable[[str], None]] = None,
+) -> List[Slot]:
+    """Slot toolpaths of extension parameters in millimetres, in machining order
+
+    Flat, with a warning to warn, when the radius is too small for the
+    fretboard, none when the tool is wider than the slot. Zigzag passes of a
+    fret make one slot, climb or conventional ones a slot each.
+    """
+    tracer = tracer or Tracer()
+    if params["ftp_tool_diameter"] > params["ftp_slot_width"]:
+        return []
+    plan = pass_plan(params)
+    lines = pass_lines(geometry, params, plan)
+    tracer(
+        "toolpaths",
+        passes=len(plan.offsets),
+        offsets=plan.offsets,
+        reversed=lambda: pass_reversed(plan, params["ftp_direction"]),
+    )
+    passes = lines.reshape(geometry.frets, -1, 2)
+    if params["ftp_3d"]:
+        try:
+            passes = geometry.radiused_passes(
+                passes,
+                nut_radius=params["nut_radius"],
+                bridge_radius=params["bridge_radius"],
+                chord_tolerance=params["ftp_chord_tolerance"],
+            )
+        except ValueError as e:
+            tracer("toolpaths", error=e, flat=True)
+            if warn is not None:
+                warn(f"Flat fret slot toolpaths instead of 3D ones: {e}")
+    if params["ftp_direction"] == "zigzag":
+        slots = list(enumerate(passes, 1))
+    else:
+        slots = [
+            (fret_i, cut)
+            for fret_i, points in enumerate(passes, 1)
+            for cut in points.reshape(len(plan.offsets), -1, points.shape[-1])
+        ]
+    if params["ftp_order"] == "optimized":
+        slots = order_slots(slots)
+    return slots
+
+
+def pass_report(geometry: FretboardGeometry, params: Mapping[str, Any]) -> PassReport:
+    """Passes of extension parameters in millimetres against the fixed stepover
+    ones, flat cut lengths with stepovers at depth"""
+    plan = pass_plan(params)
+    lines = pass_lines(geometry, params, plan)
+    if params["ftp_direction"] == "zigzag":
+        lines = lines.reshape(geometry.frets, 1, -1, 2)
+    fixed = geometry.slot_pass_offsets(
+        params["ftp_tool_diameter"],
+        params["ftp_tool_stepover"],
+        params["ftp_slot_width"],
+    )
+    repeated = np.triu(np.isclose(fixed[:, np.newaxis], fixed), 1).any(axis=0)
+    fixed_lines = geometry.slot_pass_lines(
+        fixed,
+        tool_diameter=params["ftp_tool_diameter"],
+        slot_margin=params["ftp_slot_margin"],
+    )
+    fixed_lines[:, 1::2] = fixed_lines[:, 1::2, ::-1]
+    return PassReport(
+        planner=params["ftp_passes"],
+        passes=len(plan.offsets),
+        fixed_passes=len(fixed),
+        repeated_passes=int(repeated.sum()),
+        cut_length=float(np.linalg.norm(np.diff(lines, axis=2), axis=-1).sum()),
+        fixed_cut_length=float(
+            np.linalg.norm(
+                np.diff(fixed_lines.reshape(geometry.frets, -1, 2), axis=1), axis=-1
+            ).sum()
+        ),
+    )
+
+
+def order_slots(
+    slots: Iterable[Slot], start: Optional[np.ndarray] = None
+) -> List[Slot]:
+    """Slots sequenced to shorten rapids between them
+
+    Starting from the first slot, or the one closest to start, the next one
+    is always the closest, entered from its closest end (its passes are then
+    run backwards), which gives a serpentine across the board. Passes of a
+    same fret following each other stay together, in order and direction.
+    """
+    runs = [list(run) for _, run in itertools.groupby(slots, key=lambda s: s[0])]
+    if not runs:
+        return []
+    starts = np.array([run[0][1][0, :2] for run in runs])
+    ends = np.array([run[-1][1][-1, :2] for run in runs])
+    reversible = np.array([len(run) == 1 for run in runs])
+    todo = np.ones(len(runs), dtype=bool)
+    position = start if start is not None else starts[0]
+    ordered = []
+    for _ in range(len(runs)):
+        to_start = np.where(todo, np.hypot(*(starts - position).T), np.inf)
+        to_end = np.where(todo & reversible, np.hypot(*(ends - position).T), np.inf)
+        if start is None and not ordered:
+            to_start[1:] = to_end[:] = np.inf
+        run_i = int(np.argmin(np.minimum(to_start, to_end)))
+        todo[run_i] = False
+        if to_end[run_i] < to_start[run_i]:
+            fret_i, points = runs[run_i][0]
+            ordered.append((fret_i, points[::-1]))
+            position = starts[run_i]
+        else:
+            ordered.extend(runs[run_i])
+            position = ends[run_i]
+    return ordered
+
+
+def toolpath_stats(
+    slots: Iterable[Slot],
+    feed: float,
+    plunge_feed: float,
+    rapid_feed: float,
+    safe_z: float,
+    slot_depth: float,
+    ramp_length: float = 0.0,
+) -> ToolpathStats:
+    """Lengths and cycle time of slots cut in order, as gcode_program does"""
+    cut_length = rapid_length = plunge_length = 0.0
+    position = None
+    count = 0
+    for count, (_, points) in enumerate(slots, 1):
+        points = cut_points(points, slot_depth, ramp_length)
+        cut_length += float(np.linalg.norm(np.diff(points, axis=0), axis=1).sum())
+        if position is not None:
+            rapid_length += float(np.hypot(*(points[0, :2] - position)))
+        plunge_length += safe_z - points[0, 2]
+        rapid_length += safe_z - points[-1, 2]
+        position = points[-1, :2]
+    return ToolpathStats(
+        cut_length=cut_length,
+        rapid_length=rapid_length,
+        plunge_length=plunge_length,
+        slots=count,
+        cycle_time=(
+            cut_length / feed + plunge_length / plunge_feed + rapid_length / rapid_feed
+        ),
+    )
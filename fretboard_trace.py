@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""
+Structured debug trace
+
+A record is a stage name and keyword values. Nothing is formatted unless the
+tracer is enabled; values given as callables are only called then, which
+keeps costly ones (large arrays to list, reprs) out of disabled runs.
+Records go to a text sink (Inkscape messages) and/or a JSON lines file.
+"""
+
+import json
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+
+class Tracer:
+    __slots__ = ("enabled", "message_sink", "file")
+
+    def __init__(
+        self,
+        message_sink: Optional[Callable[[str], None]] = None,
+        path: Optional[str] = None,
+    ) -> None:
+        self.message_sink = message_sink
+        self.file = open(path, "w", encoding="utf-8") if path else None
+        self.enabled = message_sink is not None or self.file is not None
+
+    def __call__(self, stage: str, **values: Any) -> None:
+        if not self.enabled:
+            return
+        record = self.record(stage, values)
+        if self.message_sink is not None:
+            self.message_sink(
+                ", ".join(
+                    [stage] + [f"{k}={v}" for k, v in record.items() if k != "stage"]
+                )
+            )
+        if self.file is not None:
+            self.file.write(json.dumps(record, default=str))
+            self.file.write("\n")
+
+    @staticmethod
+    def record(stage: str, values: Dict[str, Any]) -> Dict[str, Any]:
+        record = {"stage": stage}
+        for key, value in values.items():
+            if callable(value):
+                value = value()
+            if isinstance(value, (np.ndarray, np.generic)):
+                value = value.tolist()
+            record[key] = value
+        return record
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.enabled = self.message_sink is not None
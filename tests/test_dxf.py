@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""DXF export, read back with ezdxf"""
+
+from collections import Counter
+
+import pytest
+
+from fretboard_dxf import board_entities, dxf_lines, write_dxf
+from fretboard_geometry import FretboardGeometry
+from fretboard_params import normalize_units, typed_params
+from fretboard_toolpaths import plan_slots
+
+ezdxf = pytest.importorskip("ezdxf")
+from ezdxf import recover  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def entities():
+    params = dict(frets=12, ftp_tool_draw=True, temperament_offsets="-5,3;0,2")
+    params = normalize_units(typed_params(params))
+    geometry = FretboardGeometry.from_params(params)
+    return list(board_entities(geometry, plan_slots(geometry, params)))
+
+
+def test_recovered_without_audit_errors(entities, tmp_path):
+    path = tmp_path / "board.dxf"
+    with open(path, "w", encoding="ascii") as output:
+        write_dxf(output, dxf_lines(entities))
+    doc, auditor = recover.readfile(path)
+    assert not auditor.has_errors
+    assert doc.dxfversion == "AC1015"
+    assert not ezdxf.readfile(path).audit().has_errors
+
+    layers = Counter(entity.dxf.layer for entity in doc.modelspace())
+    assert layers == Counter(layer for layer, _, _ in entities)
+    outline = next(
+        entity for entity in doc.modelspace() if entity.dxf.layer == "fretboard_outline"
+    )
+    points = [value for point in outline.get_points() for value in point[:2]]
+    # Y points up, as in the G-code
+    drawing = [value for x, y in entities[1][1].tolist() for value in (x, -y)]
+    assert points == pytest.approx(drawing)
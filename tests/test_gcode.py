@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""G-code of fret slot toolpaths: spindle, ramped entry, cutting direction"""
+
+import numpy as np
+import pytest
+
+from fretboard_gcode import gcode_program
+from fretboard_geometry import FretboardGeometry
+from fretboard_params import normalize_units, typed_params
+from fretboard_toolpaths import pass_plan, plan_slots
+
+SLOT = np.array([[5.0, 0.0], [5.0, 10.0]])
+
+
+def program(**kwargs):
+    options = dict(feed=600, plunge_feed=100, safe_z=5, slot_depth=2)
+    return list(gcode_program([(1, SLOT)], **{**options, **kwargs}))
+
+
+def words(line):
+    return {word[0]: float(word[1:]) for word in line.split()[1:]}
+
+
+def moves(lines, axis):
+    return [
+        words(line)[axis]
+        for line in lines
+        if line.startswith("G1") and axis in words(line)
+    ]
+
+
+def test_spindle_runs_while_cutting():
+    lines = program(spindle_speed=18000)
+    cuts = [i for i, line in enumerate(lines) if line.startswith("G1")]
+    assert lines.index("M3 S18000") < cuts[0]
+    assert lines.index("M5") > cuts[-1]
+
+
+def test_plunge_without_ramp():
+    assert moves(program(), "Z")[0] == pytest.approx(-2)
+
+
+def test_ramped_entry():
+    lines = program(ramp_length=4)
+    z = moves(lines, "Z")
+    # plunge to the surface, down the ramp, back at depth, then the slot
+    assert z[0] == pytest.approx(0)
+    assert np.all(np.diff(z) <= 0)
+    assert z[-1] == pytest.approx(-2)
+    y = [-value for value in moves(lines, "Y")]
+    assert y == pytest.approx([4, 0, 10])
+
+
+@pytest.mark.parametrize("direction", ["climb", "conventional"])
+def test_pass_direction(direction):
+    params = normalize_units(
+        typed_params(
+            dict(
+                frets=2,
+                ftp_tool_draw=True,
+                ftp_direction=direction,
+                ftp_order="index",
+                ftp_tool_diameter=0.2,
+            )
+        )
+    )
+    geometry = FretboardGeometry.from_params(params)
+    plan = pass_plan(params)
+    assert len(plan.offsets) > 1
+    slots = plan_slots(geometry, params)[: len(plan.offsets)]
+    for (_, points), material in zip(slots, plan.material):
+        # G-code Y is the negated svg y; with a clockwise spindle a climb cut
+        # has the material (towards the nut, +X, when positive) on its right
+        gcode_dy = -(points[-1, 1] - points[0, 1])
+        assert (gcode_dy * material > 0) == (direction == "climb")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""Fretboard geometry: multiscale fret positions"""
+
+import numpy as np
+import pytest
+
+from fretboard_geometry import FretboardGeometry
+from fretboard_params import normalize_units, typed_params
+
+SCALE = 25.5 * 25.4
+BASS_SCALE = 27 * 25.4
+
+
+@pytest.fixture
+def fanned():
+    params = dict(
+        frets=24,
+        strings=7,
+        scale=25.5,
+        scale_unit="in",
+        multiscale=True,
+        bass_scale=27,
+        bass_scale_unit="in",
+        perpendicular_fret=7,
+    )
+    return FretboardGeometry.from_params(normalize_units(typed_params(params)))
+
+
+def test_fanned_string_scales(fanned):
+    lengths = fanned.string_lines[:, 2] - fanned.string_lines[:, 0]
+    # string 0 is the bass one
+    assert lengths[[0, -1]] == pytest.approx([BASS_SCALE, SCALE])
+
+
+@pytest.mark.parametrize("fret", [0, 24])
+def test_fanned_fret_positions(fanned, fret):
+    nut_x = fanned.string_lines[:, 2]
+    distances = nut_x - fanned.fret_string_x[fret]
+    expected = np.array([BASS_SCALE, SCALE]) * (1 - 2 ** (-fret / 12))
+    assert distances[[0, -1]] == pytest.approx(expected)
+
+
+def test_perpendicular_fret(fanned):
+    assert fanned.fret_x1[7] == pytest.approx(fanned.fret_x2[7])
+    assert fanned.fret_x1[0] != pytest.approx(fanned.fret_x2[0])
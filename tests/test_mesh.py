@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""Fretboard mesh: a closed, consistently wound solid"""
+
+import numpy as np
+import pytest
+
+from fretboard_mesh import FretboardMesh
+from fretboard_params import normalize_units, typed_params
+
+
+@pytest.fixture(
+    params=[
+        {"frets": 5},
+        {
+            "frets": 5,
+            "strings": 7,
+            "multiscale": True,
+            "temperament_offsets": "-5,3;0,2;4",
+        },
+    ],
+    ids=["straight", "fanned-compensated"],
+)
+def mesh(request):
+    params = normalize_units(typed_params(request.param))
+    return FretboardMesh.from_params(params, max_edge=5)
+
+
+def triangles(mesh, rows):
+    vertices = np.zeros((mesh.vertices, 3))
+    faces = []
+    for first, chunk_vertices, chunk_faces in mesh.chunks(rows):
+        vertices[first : first + len(chunk_vertices)] = chunk_vertices
+        faces.append(chunk_faces)
+    return vertices, np.concatenate(faces)
+
+
+@pytest.mark.parametrize("rows", [None, 3])
+def test_closed_and_consistently_wound(mesh, rows):
+    _, faces = triangles(mesh, rows)
+    assert len(faces) == mesh.triangles
+    edges = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+    directed = set(map(tuple, edges.tolist()))
+    # every edge is used once in each direction by two triangles
+    assert len(directed) == len(edges)
+    assert all((b, a) in directed for a, b in directed)
+
+
+def test_positive_volume(mesh):
+    vertices, faces = triangles(mesh, None)
+    a, b, c = (vertices[faces[:, i]] for i in range(3))
+    volume = np.einsum("ij,ij->i", a, np.cross(b, c)).sum() / 6
+    outline = mesh.geometry.outline
+    box = np.ptp(outline[:, 0]) * np.ptp(outline[:, 1]) * mesh.thickness
+    assert 0.4 * box < volume < box
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""Fret relief along the compound radius"""
+
+import numpy as np
+import pytest
+
+from fretboard_cli import tables
+from fretboard_geometry import FretboardGeometry
+from fretboard_params import normalize_units, typed_params
+from fretboard_relief import fret_relief
+
+
+def relief(frets):
+    params = normalize_units(typed_params({"frets": frets, "bridge_radius": 16}))
+    return fret_relief(
+        FretboardGeometry.from_params(params),
+        nut_radius=params["nut_radius"],
+        bridge_radius=params["bridge_radius"],
+        crown_height=params["frets_crown_height"],
+    )
+
+
+@pytest.mark.parametrize("frets", [1, 2])
+def test_first_and_last_frets_on_the_straightedge(frets):
+    result = relief(frets)
+    assert np.all(result.deviation == pytest.approx(0))
+    assert np.all(np.isnan(result.rocker))
+
+
+def test_compound_radius_deviation():
+    deviation = relief(22).deviation
+    assert np.all(np.isfinite(deviation))
+    # the crowns between the ends sit off the straightedge
+    assert np.abs(deviation[1:-1]).max() > 0
+
+
+def test_single_fret_table():
+    records = tables({"frets": 1}, ["relief"])["relief"]
+    assert [record["deviation"] for record in records] == [0] * len(records)
+    assert [record["rocker"] for record in records] == [None] * len(records)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""Generation server: request guards and error statuses"""
+
+import http.client
+import json
+import threading
+
+import pytest
+
+from fretboard_server import FretboardHandler, FretboardServer, run_extension
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = FretboardServer(("127.0.0.1", 0), FretboardHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, path, payload, **headers):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_port)
+    headers = {
+        "Host": f"localhost:{server.server_port}",
+        "Content-Type": "application/json",
+        **headers,
+    }
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    connection.request("POST", path, body=body, headers=headers)
+    response = connection.getresponse()
+    result = response.status, response.read()
+    connection.close()
+    return result
+
+
+def test_geometry(server):
+    frets = {}
+    for count in (12, 24):
+        status, body = post(server, "/geometry", {"frets": count})
+        assert status == 200
+        frets[count] = json.loads(body)["frets"]
+    assert len(frets[24]) - len(frets[12]) == 12
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        {"Host": "evil.example:80"},
+        {"Host": "localhost:1"},
+        {"Origin": "http://evil.example"},
+    ],
+)
+def test_foreign_request_refused(server, tmp_path, headers):
+    argv = [f"--output={tmp_path / 'out.svg'}"]
+    status, _ = post(server, "/run", {"argv": argv}, **headers)
+    assert status == 403
+    assert not (tmp_path / "out.svg").exists()
+
+
+@pytest.mark.parametrize(
+    "content_type", ["text/plain", "application/x-www-form-urlencoded"]
+)
+def test_content_type_refused(server, content_type):
+    status, _ = post(server, "/svg", {}, **{"Content-Type": content_type})
+    assert status == 415
+
+
+def test_file_params_dropped(server, tmp_path):
+    status, _ = post(server, "/svg", {"debug_file": str(tmp_path / "debug.txt")})
+    assert status == 200
+    assert not (tmp_path / "debug.txt").exists()
+
+
+@pytest.mark.parametrize(
+    "path, payload",
+    [
+        ("/svg", [1, 2]),
+        ("/svg", b"{not json"),
+        ("/run", {"argv": "--frets=12"}),
+        ("/run", {"argv": [12]}),
+        ("/run", {"argv": [], "cwd": 1}),
+        ("/gcode", {"ftp_tool_diameter": 2, "ftp_slot_width": 0.6}),
+    ],
+)
+def test_bad_request(server, path, payload):
+    status, _ = post(server, path, payload)
+    assert status == 400
+
+
+def test_unknown_path(server):
+    assert post(server, "/nothing", {})[0] == 404
+
+
+def test_internal_error(server, monkeypatch):
+    def broken(params):
+        raise KeyError("frets")
+
+    monkeypatch.setattr("fretboard_server.geometry_json", broken)
+    assert post(server, "/geometry", {})[0] == 500
+
+
+def test_run_exit_status(monkeypatch, tmp_path):
+    def exits(code):
+        def run(self, args, output):
+            raise SystemExit(code)
+
+        return run
+
+    for code, status in ((None, 0), (0, 0), (2, 2), ("failed", 1)):
+        monkeypatch.setattr("fretboard_server.FretboardExtension.run", exits(code))
+        assert run_extension([], str(tmp_path))["status"] == status
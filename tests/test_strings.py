@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""String sets: tensions listed treble first"""
+
+import pytest
+
+from fretboard_cli import string_sets
+from fretboard_strings import parse_gauges, parse_tuning, string_tensions
+
+GAUGES = "10,13,17,26w,36,46"
+TUNING = "E4,B3,G3,D3,A2,E2"
+
+
+def test_tensions_treble_first():
+    params = {"scale": 25.5, "scale_unit": "in", "strings_tuning": TUNING}
+    sets = string_sets(params, {"10-46": GAUGES}, spans=[34], spacings=["center"])
+    (record,) = sets
+    gauges = parse_gauges(GAUGES, 6)
+    # bass first, as the geometry strings
+    tensions = string_tensions(
+        gauges.gauges, gauges.wound, 25.5 * 25.4, parse_tuning(TUNING, 6)
+    )
+    listed = [record[f"tension_{string}"] for string in range(1, 7)]
+    assert listed == pytest.approx(tensions[::-1].tolist())
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""Temperaments and per string offsets"""
+
+import numpy as np
+
+from fretboard_geometry import FretboardGeometry
+from fretboard_params import normalize_units, typed_params
+from fretboard_temperament import fret_cents, parse_temperament
+
+
+def test_first_offsets_row_is_the_treble_string():
+    cents = fret_cents(parse_temperament("12", offsets="5,-3"), frets=12, strings=6)
+    assert cents[1:3, 5].tolist() == [5, -3]
+    assert not np.any(cents[:, :5])
+
+
+def test_first_offsets_row_moves_the_treble_string():
+    def fret_string_x(offsets):
+        params = dict(frets=12, strings=6, temperament_offsets=offsets)
+        params = normalize_units(typed_params(params))
+        return FretboardGeometry.from_params(params).fret_string_x
+
+    moved = fret_string_x("10") != fret_string_x("")
+    # string 0 is the bass one, on the y1 side
+    assert moved[1].tolist() == [False] * 5 + [True]
+    assert not np.any(np.delete(moved, 1, axis=0))
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""Fret slot toolpaths planning"""
+
+import numpy as np
+
+from fretboard_geometry import FretboardGeometry
+from fretboard_params import normalize_units, typed_params
+from fretboard_toolpaths import plan_slots
+
+
+def slots(warnings, **params):
+    params = normalize_units(typed_params(dict(params, ftp_tool_draw=True)))
+    geometry = FretboardGeometry.from_params(params)
+    return plan_slots(geometry, params, warn=warnings.append)
+
+
+def test_default_radius_gives_3d_passes():
+    warnings = []
+    planned = slots(warnings, ftp_3d=True)
+    assert not warnings
+    z = np.concatenate([points[:, 2] for _, points in planned])
+    assert np.ptp(z) > 0
+
+
+def test_small_radius_warns_and_falls_back_to_flat():
+    warnings = []
+    planned = slots(
+        warnings, ftp_3d=True, nut_radius_unit="mm", bridge_radius_unit="mm"
+    )
+    assert len(warnings) == 1 and "Flat" in warnings[0]
+    assert all(points.shape[1] == 2 for _, points in planned)
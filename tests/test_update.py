@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# This file is part of fretboard_extension.
+
+# fretboard_extension is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+# fretboard_extension is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License along with fretboard_extension. If not, see <https://www.gnu.org/licenses/>.
+"""Updating a previously generated fretboard in place"""
+
+import io
+
+from lxml import etree
+
+from fretboard_extension import FretboardExtension, render_svg
+from fretboard_params import to_argv
+
+SVG = {
+    "svg": "http://www.w3.org/2000/svg",
+    "inkscape": "http://www.inkscape.org/namespaces/inkscape",
+}
+FRETBOARD_GROUPS = "//svg:g[@inkscape:label='fretboard']"
+
+
+def generated(tmp_path, params):
+    path = tmp_path / "board.svg"
+    with open(path, "wb") as output:
+        render_svg(params, output)
+    return path
+
+
+def updated(path, params):
+    output = io.BytesIO()
+    argv = to_argv(dict(params, update_existing=True)) + [str(path)]
+    FretboardExtension().run(args=argv, output=output)
+    return etree.fromstring(output.getvalue())
+
+
+def test_compact_stylesheet_removed(tmp_path):
+    path = generated(tmp_path, {"compact": True})
+    assert etree.parse(str(path)).xpath("//svg:style", namespaces=SVG)
+    root = updated(path, {"compact": False})
+    assert not root.xpath("//svg:style", namespaces=SVG)
+    assert not root.xpath("//*[starts-with(@class, 'fretboard-')]")
+
+
+def test_compact_stylesheet_kept_for_other_boards(tmp_path):
+    path = generated(tmp_path, {"compact": True})
+    with open(tmp_path / "two.svg", "wb") as output:
+        render_svg({"compact": True, "frets": 12}, output, document=str(path))
+    root = updated(tmp_path / "two.svg", {"compact": False, "frets": 12})
+    rules = "".join(root.xpath("//svg:style/text()", namespaces=SVG)).split("\n")
+    used = {
+        name
+        for classes in root.xpath("//@class")
+        for name in classes.split()
+        if name.startswith("fretboard-")
+    }
+    assert used
+    assert {rule[1:].split("{")[0] for rule in rules} == used
+
+
+def test_incomplete_fretboard_prepared_once(tmp_path, monkeypatch):
+    path = generated(tmp_path, {})
+    document = etree.parse(str(path))
+    for group in document.xpath(FRETBOARD_GROUPS, namespaces=SVG):
+        group.getparent().remove(group)
+    document.write(str(path))
+    calls = []
+    prepare = FretboardExtension.prepare
+    monkeypatch.setattr(
+        FretboardExtension,
+        "prepare",
+        lambda self: calls.append(1) or prepare(self),
+    )
+    root = updated(path, {})
+    assert len(calls) == 1
+    assert len(root.xpath(FRETBOARD_GROUPS, namespaces=SVG)) == 1